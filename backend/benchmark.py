@@ -0,0 +1,458 @@
+"""
+Recommendation Engine Benchmarks
+Times the scoring, recommendation, explanation and normalization paths on
+synthetic students and scholarship catalogues, and writes the results as JSON
+so runs can be compared across commits
+
+Run with: python benchmark.py [--scales 10,1000,100000] [--output bench.json] [--baseline old.json]
+         python benchmark.py --storage memory,sqlite --only storage --scales 1000,100000
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from models.types import StudentProfile
+from services.scholarship_recommendation_engine import (
+    calculate_match_score,
+    configure_recommendation_cache,
+    find_matching_scholarships,
+    get_recommendation_cache_stats,
+    get_scholarships,
+    install_scholarships
+)
+from services.explainability_service import explain_all_scholarships
+from services.normalization_service import normalize_student_profile
+from services.storage_service import InMemoryStorage, SQLiteStorage
+
+CATEGORIES = ["SC", "ST", "OBC", "General", "EWS"]
+GENDERS = ["Male", "Female", "Other"]
+INCOME_LEVELS = ["< 1 LPA", "< 2 LPA", "2-5 LPA", "< 5 LPA", "5-8 LPA", "> 8 LPA"]
+REGIONS = ["Karnataka", "Tamil Nadu", "Kerala", "Maharashtra", "Delhi", "Uttar Pradesh", "West Bengal"]
+EDUCATION_LEVELS = ["10th", "12th", "Diploma", "Bachelor", "Master", "PhD"]
+OCCUPATIONS = ["Farmer", "Daily Wage Worker", "Teacher", "Government Employee", "Business", "Fisherman"]
+RELIGIONS = ["Hindu", "Muslim", "Christian", "Sikh", "Buddhist", "Jain"]
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Biology", "English", "Computer Science", "Economics"]
+
+DEFAULT_SCALES = [10, 1000, 100000]
+
+
+# ==================== SYNTHETIC DATA ====================
+
+def _subset(rng: random.Random, values: List[str], k_max: int = 3) -> List[str]:
+    return rng.sample(values, rng.randint(1, k_max))
+
+
+def generate_scholarship(rng: random.Random, n: int) -> Dict[str, Any]:
+    """One synthetic scholarship with a random mix of eligibility rules"""
+    rules: Dict[str, Any] = {}
+
+    if rng.random() < 0.7:
+        rules["category"] = _subset(rng, CATEGORIES)
+    if rng.random() < 0.8:
+        rules["maxIncome"] = rng.choice([100000, 200000, 250000, 500000, 800000, 1000000])
+    if rng.random() < 0.8:
+        rules["minMarks"] = rng.choice([40, 50, 55, 60, 65, 70, 75, 80, 85, 90])
+    if rng.random() < 0.5:
+        rules["educationLevel"] = _subset(rng, EDUCATION_LEVELS)
+    if rng.random() < 0.15:
+        rules["gender"] = "Female"
+    if rng.random() < 0.2:
+        rules["state"] = rng.choice(REGIONS)
+    if rng.random() < 0.1:
+        rules["isFirstGraduate"] = True
+    if rng.random() < 0.1:
+        rules["parentOccupations"] = _subset(rng, OCCUPATIONS)
+    if rng.random() < 0.05:
+        rules["religions"] = _subset(rng, RELIGIONS, 2)
+    if rng.random() < 0.1:
+        rules["minAge"] = rng.choice([14, 16, 18])
+        rules["maxAge"] = rng.choice([25, 30, 35])
+    if rng.random() < 0.1:
+        rules["subjects"] = _subset(rng, SUBJECTS)
+
+    return {
+        "id": f"bench-{n}",
+        "title": f"Benchmark Scholarship {n}",
+        "provider": "Benchmark Trust",
+        "amount": f"Rs. {rng.randint(5, 100) * 1000}",
+        "deadline": "2026-12-31",
+        "category": rng.choice(["Merit", "Need-Based", "Category", "Minority"]),
+        "criteria": "Synthetic benchmark entry",
+        "tags": _subset(rng, ["Merit", "Need-Based", "Girls", "Rural", "STEM"]),
+        "rules": rules
+    }
+
+
+def generate_catalogue(size: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Synthetic catalogue of `size` scholarships"""
+    rng = random.Random(seed)
+    return [generate_scholarship(rng, n) for n in range(size)]
+
+
+def generate_student(rng: random.Random, n: int) -> Dict[str, Any]:
+    """One synthetic student profile (camelCase dict, as stored)"""
+    marks = [
+        {"subject": subject, "score": round(rng.uniform(35, 100), 1), "maxScore": 100}
+        for subject in rng.sample(SUBJECTS, rng.randint(3, 6))
+    ]
+    # Some students report CGPA instead of a percentage
+    overall = round(rng.uniform(5.0, 10.0), 2) if rng.random() < 0.3 else round(rng.uniform(35, 100), 1)
+
+    return {
+        "id": f"student-{n}",
+        "name": f"Student {n}",
+        "gender": rng.choice(GENDERS),
+        "age": rng.randint(15, 30),
+        "region": rng.choice(REGIONS),
+        "educationLevel": rng.choice(EDUCATION_LEVELS),
+        "marks": marks,
+        "overallPercentage": overall,
+        "incomeLevel": rng.choice(INCOME_LEVELS),
+        "parentOccupation": rng.choice(OCCUPATIONS),
+        "isFirstGraduate": rng.random() < 0.4,
+        "category": rng.choice(CATEGORIES),
+        "religion": rng.choice(RELIGIONS)
+    }
+
+
+def generate_students(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Synthetic student profiles"""
+    rng = random.Random(seed)
+    return [generate_student(rng, n) for n in range(count)]
+
+
+# ==================== MEASUREMENT ====================
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(
+    name: str,
+    scale: int,
+    fn: Callable[[Any], Any],
+    inputs: List[Any],
+    max_iterations: int,
+    time_budget: float
+) -> Dict[str, Any]:
+    """
+    Time fn over the inputs (cycled) until max_iterations or time_budget is hit
+
+    Latency is measured per call; peak memory is traced on a separate call so
+    tracemalloc overhead does not skew the timings.
+    """
+    # Warm-up
+    fn(inputs[0])
+
+    latencies: List[float] = []
+    gc.collect()
+    started = time.perf_counter()
+
+    while len(latencies) < max_iterations:
+        item = inputs[len(latencies) % len(inputs)]
+        t0 = time.perf_counter_ns()
+        fn(item)
+        latencies.append((time.perf_counter_ns() - t0) / 1e6)
+        if time.perf_counter() - started >= time_budget:
+            break
+
+    elapsed = time.perf_counter() - started
+
+    # Peak memory of one call
+    tracemalloc.start()
+    fn(inputs[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    result = {
+        "benchmark": name,
+        "scale": scale,
+        "iterations": len(latencies),
+        "opsPerSec": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0,
+        "latencyMs": {
+            "mean": round(sum(latencies) / len(latencies), 4),
+            "p50": round(_percentile(latencies, 50), 4),
+            "p90": round(_percentile(latencies, 90), 4),
+            "p99": round(_percentile(latencies, 99), 4),
+            "max": round(latencies[-1], 4)
+        },
+        "peakMemoryKB": round(peak / 1024, 1)
+    }
+    print(
+        f"[OK] {name:<28} scale={scale:<7} n={result['iterations']:<6} "
+        f"{result['opsPerSec']:>10.1f} ops/s  p50={result['latencyMs']['p50']:.3f}ms  "
+        f"p99={result['latencyMs']['p99']:.3f}ms  peak={result['peakMemoryKB']}KB"
+    )
+    return result
+
+
+def run_benchmarks(
+    scales: List[int],
+    students: int = 200,
+    max_iterations: int = 2000,
+    time_budget: float = 5.0,
+    only: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run every benchmark at each catalogue scale
+
+    Args:
+        scales: Catalogue sizes (number of scholarships)
+        students: Synthetic students per scale
+        max_iterations: Call cap per benchmark
+        time_budget: Seconds per benchmark (stops early when exceeded)
+        only: Benchmark names to run (default: all)
+
+    Returns:
+        List of result dicts
+    """
+    original_catalogue = get_scholarships()
+    original_cache_size = get_recommendation_cache_stats()["maxSize"]
+    student_dicts = generate_students(students)
+    profiles = [StudentProfile(**s) for s in student_dicts]
+    results = []
+
+    def wanted(name: str) -> bool:
+        return not only or name in only
+
+    # Measure raw engine work, not cache hits
+    configure_recommendation_cache(max_size=0)
+
+    try:
+        for scale in scales:
+            catalogue = generate_catalogue(scale)
+            install_scholarships(catalogue)
+            rng = random.Random(scale)
+
+            if wanted("calculate_match_score"):
+                pairs = [(rng.choice(profiles), rng.choice(catalogue)) for _ in range(1000)]
+                results.append(measure(
+                    "calculate_match_score", scale,
+                    lambda pair: calculate_match_score(pair[0], pair[1]),
+                    pairs, max_iterations * 10, time_budget
+                ))
+
+            if wanted("find_matching_scholarships"):
+                results.append(measure(
+                    "find_matching_scholarships", scale,
+                    lambda student: find_matching_scholarships(student, 50),
+                    profiles, max_iterations, time_budget
+                ))
+
+            if wanted("explain_all_scholarships"):
+                results.append(measure(
+                    "explain_all_scholarships", scale,
+                    lambda student: explain_all_scholarships(student, catalogue),
+                    student_dicts, max_iterations, time_budget
+                ))
+
+        # Independent of the catalogue: scale is the number of distinct profiles (capped at 10k)
+        if wanted("normalize_student_profile"):
+            for scale in scales:
+                results.append(measure(
+                    "normalize_student_profile", scale,
+                    normalize_student_profile,
+                    generate_students(min(scale, 10000), seed=scale), max_iterations * 10, time_budget
+                ))
+    finally:
+        install_scholarships(original_catalogue)
+        configure_recommendation_cache(max_size=original_cache_size)
+
+    return results
+
+
+def _storage_backend(name: str, directory: str):
+    if name == "memory":
+        return InMemoryStorage({}, {})
+    if name == "sqlite":
+        return SQLiteStorage(os.path.join(directory, "benchmark.db"))
+    raise ValueError(f"Storage benchmarks support memory and sqlite, not {name}")
+
+
+def run_storage_benchmarks(
+    backends: List[str],
+    scales: List[int],
+    max_iterations: int = 2000,
+    time_budget: float = 5.0
+) -> List[Dict[str, Any]]:
+    """
+    Time storage operations against a store preloaded with `scale` students
+    (and two applications per student)
+
+    Firestore is not included: it needs credentials and network access.
+    """
+    statuses = ["Pending", "Approved", "Rejected", "Withdrawn"]
+    results = []
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+
+    try:
+        for backend in backends:
+            for scale in scales:
+                with tempfile.TemporaryDirectory() as directory:
+                    storage = _storage_backend(backend, directory)
+                    rng = random.Random(scale)
+
+                    # Preload
+                    student_ids = []
+                    for student in generate_students(scale):
+                        student_id = run(storage.create_student(student))
+                        student_ids.append(student_id)
+                        for scholarship_id in rng.sample(range(50), 2):
+                            run(storage.create_application({
+                                "studentId": student_id,
+                                "scholarshipId": f"bench-{scholarship_id}",
+                                "status": rng.choice(statuses),
+                                "appliedAt": datetime.utcnow().isoformat(),
+                                "updatedAt": datetime.utcnow().isoformat()
+                            }))
+
+                    label = f"storage[{backend}]"
+                    new_students = generate_students(min(scale, 1000), seed=scale + 1)
+
+                    results.append(measure(
+                        f"{label}.create_student", scale,
+                        lambda student: run(storage.create_student(dict(student))),
+                        new_students, max_iterations, time_budget
+                    ))
+                    results.append(measure(
+                        f"{label}.get_student", scale,
+                        lambda student_id: run(storage.get_student(student_id)),
+                        student_ids, max_iterations, time_budget
+                    ))
+                    results.append(measure(
+                        f"{label}.list_applications", scale,
+                        lambda student_id: run(storage.list_applications(student_id=student_id)),
+                        student_ids, max_iterations, time_budget
+                    ))
+                    results.append(measure(
+                        f"{label}.count_applications", scale,
+                        lambda status: run(storage.count_applications(status=status)),
+                        statuses, max_iterations, time_budget
+                    ))
+
+                    run(storage.close())
+    finally:
+        loop.close()
+
+    return results
+
+
+# ==================== REPORTING ====================
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap results with the environment they were measured in"""
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine()
+        },
+        "results": results
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 10.0) -> List[Dict[str, Any]]:
+    """
+    Compare two reports on throughput and p50 latency
+
+    Returns:
+        One row per benchmark/scale present in both, with "regression" set when
+        throughput dropped or p50 grew by more than threshold percent
+    """
+    old = {(r["benchmark"], r["scale"]): r for r in baseline.get("results", [])}
+    rows = []
+
+    for result in current.get("results", []):
+        previous = old.get((result["benchmark"], result["scale"]))
+        if not previous:
+            continue
+
+        ops_change = (result["opsPerSec"] / previous["opsPerSec"] - 1) * 100 if previous["opsPerSec"] else 0.0
+        p50_old = previous["latencyMs"]["p50"]
+        p50_change = (result["latencyMs"]["p50"] / p50_old - 1) * 100 if p50_old else 0.0
+
+        rows.append({
+            "benchmark": result["benchmark"],
+            "scale": result["scale"],
+            "opsPerSecChangePct": round(ops_change, 1),
+            "p50ChangePct": round(p50_change, 1),
+            "regression": ops_change < -threshold or p50_change > threshold
+        })
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation engine on synthetic data")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES), help="Catalogue sizes, comma separated")
+    parser.add_argument("--students", type=int, default=200, help="Synthetic students per scale")
+    parser.add_argument("--iterations", type=int, default=2000, help="Max calls per benchmark")
+    parser.add_argument("--time-budget", type=float, default=5.0, help="Seconds per benchmark")
+    parser.add_argument("--only", default=None, help="Comma separated benchmark names")
+    parser.add_argument("--storage", default=None, help="Also benchmark storage backends (memory,sqlite)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--baseline", default=None, help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+
+    results = run_benchmarks(scales, args.students, args.iterations, args.time_budget, only)
+    if args.storage:
+        backends = [b.strip() for b in args.storage.split(",") if b.strip()]
+        results += run_storage_benchmarks(backends, scales, args.iterations, args.time_budget)
+    report = build_report(results)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        rows = compare_reports(baseline, report, args.threshold)
+        regressions = [r for r in rows if r["regression"]]
+        for row in rows:
+            status = "[WARN]" if row["regression"] else "[OK]"
+            print(f"{status} {row['benchmark']:<28} scale={row['scale']:<7} "
+                  f"ops/s {row['opsPerSecChangePct']:+.1f}%  p50 {row['p50ChangePct']:+.1f}%")
+
+        if regressions:
+            print(f"[ERROR] {len(regressions)} benchmark(s) regressed by more than {args.threshold}%")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Bulk Recommendation Job
+Runs find_matching_scholarships for every stored student across a process pool
+and writes the results back in batches (resumable via a checkpoint file)
+
+Run with: python bulk_recommend.py [--workers 4] [--batch-size 1000] [--min-score 50]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from models.types import StudentProfile
+from services.scholarship_recommendation_engine import find_matching_scholarships, get_scholarships, install_scholarships
+
+# Progress file for resuming (kept out of git, see .gitignore)
+DEFAULT_CHECKPOINT = os.environ.get("BULK_RECOMMEND_CHECKPOINT", "bulk_recommend.checkpoint.json")
+
+
+def _recommend_for_student(student_data: Dict[str, Any], min_score: float) -> Tuple[str, Optional[List[Dict[str, Any]]], Optional[str]]:
+    """Worker: score one stored student (returns id, recommendations, error)"""
+    student_id = student_data.get("id")
+    try:
+        student = StudentProfile(**student_data)
+        matches = find_matching_scholarships(student, min_score)
+        return student_id, [m.model_dump(by_alias=True) for m in matches], None
+    except Exception as e:
+        return student_id, None, str(e)
+
+
+def load_checkpoint(checkpoint_path: Optional[str]) -> Dict[str, Any]:
+    """Load job progress from the checkpoint file (empty dict if none)"""
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return {}
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(checkpoint_path: Optional[str], progress: Dict[str, Any]) -> None:
+    """Atomically write job progress to the checkpoint file"""
+    if not checkpoint_path:
+        return
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(progress, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _batched(items: Iterable[Dict[str, Any]], batch_size: int) -> Iterable[List[Dict[str, Any]]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_bulk_recommendations(
+    student_source: Callable[[Optional[str]], Iterable[Dict[str, Any]]],
+    write_batch: Callable[[Dict[str, List[Dict[str, Any]]]], Any],
+    workers: Optional[int] = None,
+    batch_size: int = 1000,
+    min_score: float = 50,
+    checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT,
+    restart: bool = False
+) -> Dict[str, Any]:
+    """
+    Compute recommendations for every student and write them back in batches
+
+    Args:
+        student_source: Callable returning students in ID order, starting after the given ID
+        write_batch: Callable persisting {studentId: [MatchResult dicts]}
+        workers: Worker processes (defaults to CPU count)
+        batch_size: Students per write batch / checkpoint
+        min_score: Minimum match score passed to find_matching_scholarships
+        checkpoint_path: Progress file used to resume an interrupted run (None disables)
+        restart: Ignore an existing checkpoint and start from the first student
+
+    Returns:
+        Job summary with counts and throughput
+    """
+    progress = {} if restart else load_checkpoint(checkpoint_path)
+    start_after = progress.get("lastStudentId")
+    processed = progress.get("processed", 0)
+    failed = progress.get("failed", 0)
+
+    if start_after:
+        print(f"[INFO] Resuming after student {start_after} ({processed} already processed)")
+
+    start_time = time.time()
+    processed_this_run = 0
+    worker = partial(_recommend_for_student, min_score=min_score)
+
+    # Workers score against the catalogue snapshot active when the job started
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=install_scholarships,
+        initargs=(get_scholarships(),)
+    ) as executor:
+        chunksize = max(1, batch_size // ((workers or os.cpu_count() or 1) * 4))
+
+        for batch in _batched(student_source(start_after), batch_size):
+            results: Dict[str, List[Dict[str, Any]]] = {}
+
+            for student_id, recommendations, error in executor.map(worker, batch, chunksize=chunksize):
+                if error is not None:
+                    failed += 1
+                    print(f"[WARN] Skipping student {student_id}: {error}")
+                    continue
+                results[student_id] = recommendations
+
+            if results and write_batch(results) is False:
+                raise RuntimeError(f"Failed to write recommendations batch ending at {batch[-1].get('id')}")
+
+            processed += len(batch)
+            processed_this_run += len(batch)
+            save_checkpoint(checkpoint_path, {
+                "lastStudentId": batch[-1].get("id"),
+                "processed": processed,
+                "failed": failed,
+                "updatedAt": datetime.utcnow().isoformat()
+            })
+
+            elapsed = time.time() - start_time
+            rate = processed_this_run / elapsed if elapsed > 0 else 0
+            print(f"[INFO] {processed} students processed ({rate:.0f} students/sec)")
+
+    elapsed = time.time() - start_time
+
+    # Finished cleanly - the next run starts a fresh campaign
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    summary = {
+        "processed": processed,
+        "processedThisRun": processed_this_run,
+        "failed": failed,
+        "elapsedSeconds": round(elapsed, 3),
+        "studentsPerSecond": round(processed_this_run / elapsed, 1) if elapsed > 0 else 0
+    }
+    print(f"[OK] Bulk recommendations complete: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute scholarship recommendations for all stored students")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Students per write batch")
+    parser.add_argument("--min-score", type=float, default=50, help="Minimum match score")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file for resuming")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    from services.firebase_service import initialize_firebase, stream_students, save_recommendations
+
+    if not initialize_firebase():
+        print("[ERROR] Firebase is required for the bulk job (in-memory data lives in the API process)")
+        raise SystemExit(1)
+
+    run_bulk_recommendations(
+        student_source=lambda start_after: stream_students(start_after=start_after),
+        write_batch=save_recommendations,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        min_score=args.min_score,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart
+    )
+
+
+if __name__ == "__main__":
+    main()
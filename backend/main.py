@@ -2,37 +2,62 @@
 Student Scholarship Backend API
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+import asyncio
 import uuid
 import os
 import tempfile
-import shutil
 
-from models.types import StudentProfile, ApplicationStatus
-from services.ocr_service import extract_text_from_file, preprocess_image
+from models.types import StudentProfile, ApplicationStatus, BulkStatusUpdate, StatusUpdate
+from services.ocr_executor import ocr_executor, OCRQueueFullError, OCRTimeoutError
+from services.ocr_service import get_tesseract_version
+from services.extraction_cache import extraction_cache, hash_bytes
+from services.upload_service import read_upload, UploadTooLargeError
 from services.scholarship_recommendation_engine import (
-    SCHOLARSHIPS_DATABASE, 
+    get_scholarships,
     find_matching_scholarships, 
-    get_scholarship_by_id
+    get_scholarship_by_id,
+    get_recommendation_cache_stats
 )
+from services.storage_service import (
+    StorageBackend,
+    InMemoryStorage,
+    CachedStorage,
+    DuplicateApplicationError,
+    create_storage,
+    encode_page_cursor,
+    decode_page_cursor,
+    next_page_cursor,
+    STORAGE_BACKENDS
+)
+from services.application_lifecycle import (
+    WITHDRAWN,
+    allowed_transitions,
+    change_status,
+    change_status_bulk,
+    review_queue
+)
+from services.recommendation_store import recommendation_store
+from services.reverse_match_service import student_index, encode_cursor, decode_cursor
 from services.firebase_service import (
     initialize_firebase,
     create_student as fb_create_student,
     get_student as fb_get_student,
-    update_student as fb_update_student,
-    delete_student as fb_delete_student,
-    list_students as fb_list_students,
-    create_application as fb_create_application,
-    get_application as fb_get_application,
-    update_application as fb_update_application,
-    delete_application as fb_delete_application,
-    list_applications as fb_list_applications,
     FIREBASE_AVAILABLE
 )
 
+from services.scholarship_catalogue import (
+    reload_catalogue,
+    check_catalogue_path,
+    get_catalogue_info,
+    start_catalogue_watcher,
+    CatalogueError
+)
+from bulk_recommend import run_bulk_recommendations, DEFAULT_CHECKPOINT
+
 # Import authentication routes
 from routes.auth_routes import router as auth_router, get_current_user, get_optional_user, require_admin
 
@@ -59,26 +84,86 @@ USE_FIREBASE = False  # Will be set to True if Firebase initializes successfully
 
 @app.on_event("startup")
 async def startup_event():
-    global USE_FIREBASE
-    if FIREBASE_AVAILABLE:
-        if initialize_firebase():
-            USE_FIREBASE = True
-            print("[OK] Firebase ENABLED - Data will persist!")
+    global USE_FIREBASE, storage
+    
+    # STORAGE_BACKEND=memory|firestore|sqlite; unset keeps the old behaviour
+    # (Firestore when it initializes, in-memory otherwise)
+    backend = os.environ.get("STORAGE_BACKEND", "").lower()
+    if backend and backend not in STORAGE_BACKENDS:
+        print(f"[ERROR] Unknown STORAGE_BACKEND '{backend}' (supported: {', '.join(STORAGE_BACKENDS)}) - Using in-memory storage")
+        backend = "memory"
+    
+    if backend in ("", "firestore"):
+        if FIREBASE_AVAILABLE:
+            if initialize_firebase():
+                USE_FIREBASE = True
+                backend = "firestore"
+                print("[OK] Firebase ENABLED - Data will persist!")
+            else:
+                print("[WARN] Firebase failed - Using in-memory storage")
         else:
-            print("[WARN] Firebase failed - Using in-memory storage")
-    else:
-        print("[WARN] Firebase not available - Using in-memory storage")
-
-# In-memory storage (fallback when Firebase unavailable)
+            print("[WARN] Firebase not available - Using in-memory storage")
+        
+        if not USE_FIREBASE:
+            backend = "memory"
+    
+    if backend != "memory":
+        storage = create_storage(backend)
+        print(f"[OK] Storage backend: {storage.name}")
+        
+        # Read-through cache for student lookups (STUDENT_CACHE_SIZE=0 disables it)
+        cache_size = int(os.environ.get("STUDENT_CACHE_SIZE", 10000))
+        if cache_size > 0:
+            storage = CachedStorage(
+                storage,
+                max_size=cache_size,
+                ttl_seconds=float(os.environ.get("STUDENT_CACHE_TTL", 60))
+            )
+            print(f"[OK] Student cache enabled ({cache_size} entries)")
+    
+    # Load external scholarship catalogue (falls back to the built-in list)
+    catalogue_path = os.environ.get("SCHOLARSHIP_CATALOGUE_PATH")
+    if catalogue_path:
+        try:
+            reload_catalogue(catalogue_path)
+            watch_interval = float(os.environ.get("SCHOLARSHIP_CATALOGUE_WATCH_INTERVAL", 0))
+            if watch_interval > 0:
+                start_catalogue_watcher(catalogue_path, watch_interval)
+        except CatalogueError as e:
+            print(f"[ERROR] Failed to load scholarship catalogue, using built-in list: {e}")
+    
+    # Ask tesseract for its version once now (a subprocess), so the first
+    # upload does not pay for it
+    await asyncio.to_thread(get_tesseract_version)
+
+# In-memory storage (fallback when no persistent backend is configured)
 students_db: dict[str, dict] = {}
 applications_db: dict[str, dict] = {}
+recommendations_db: dict[str, dict] = {}
+
+# Storage repository used by every handler (replaced on startup)
+storage: StorageBackend = InMemoryStorage(students_db, applications_db, recommendations_db)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await storage.close()
+    ocr_executor.shutdown()
+    extraction_cache.close()
+
+
+def ocr_http_error(e: Exception) -> HTTPException:
+    """Map OCR executor backpressure and timeouts to HTTP errors"""
+    if isinstance(e, OCRQueueFullError):
+        return HTTPException(status_code=503, detail="OCR service busy, please retry shortly", headers={"Retry-After": "5"})
+    return HTTPException(status_code=504, detail=f"OCR extraction timed out: {e}")
 
 
 @app.get("/")
 def root():
     return {
         "message": "Student Scholarship API is running",
-        "storage": "Firebase (persistent)" if USE_FIREBASE else "In-memory (temporary)"
+        "storage": f"{storage.name} (temporary)" if isinstance(storage, InMemoryStorage) else f"{storage.name} (persistent)"
     }
 
 
@@ -87,14 +172,17 @@ def test_api():
     """Simple test endpoint to verify backend is working"""
     return {
         "status": "Backend working",
-        "storage": "Firebase" if USE_FIREBASE else "In-memory"
+        "storage": storage.name
     }
 
 
 # ==================== STUDENT APIs ====================
 
+# Largest batch accepted by the bulk endpoints
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 10000))
+
 @app.post("/api/students/register")
-def register_student(profile: StudentProfile):
+async def register_student(profile: StudentProfile):
     """
     Register a new student profile (stored in Firebase if available)
     """
@@ -106,41 +194,68 @@ def register_student(profile: StudentProfile):
     student_data["createdAt"] = now
     student_data["updatedAt"] = now
     
-    if USE_FIREBASE:
-        # Store in Firebase (persistent)
-        student_id = fb_create_student(student_data)
-        if not student_id:
-            raise HTTPException(status_code=500, detail="Failed to save to Firebase")
-    else:
-        # Fallback to in-memory
-        student_id = str(uuid.uuid4())
-        student_data["id"] = student_id
-        students_db[student_id] = student_data
+    student_id = await storage.create_student(student_data)
+    if not student_id:
+        raise HTTPException(status_code=500, detail=f"Failed to save to {storage.name}")
     
     student_data["id"] = student_id
+    student_index.upsert(student_id, profile)
     
     return {
         "success": True,
         "message": "Student registered successfully",
         "studentId": student_id,
-        "storage": "Firebase" if USE_FIREBASE else "In-memory",
+        "storage": storage.name,
         "data": student_data
     }
 
 
+@app.post("/api/students/bulk", dependencies=[Depends(require_admin)])
+async def register_students_bulk(profiles: List[StudentProfile]):
+    """
+    Register many student profiles in batched writes (Admin only)
+    
+    For onboarding a whole school at once; up to BULK_MAX_ITEMS profiles per call
+    """
+    if not profiles:
+        raise HTTPException(status_code=400, detail="No students given")
+    if len(profiles) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} students per request")
+    
+    now = datetime.utcnow().isoformat()
+    students = []
+    for profile in profiles:
+        student_data = profile.model_dump(by_alias=True, exclude_none=True)
+        student_data["createdAt"] = now
+        student_data["updatedAt"] = now
+        students.append(student_data)
+    
+    student_ids = await storage.create_students_bulk(students)
+    
+    for student_id, profile in zip(student_ids, profiles):
+        if student_id:
+            student_index.upsert(student_id, profile)
+    
+    created = sum(1 for student_id in student_ids if student_id)
+    
+    return {
+        "success": created == len(profiles),
+        "message": f"Registered {created} of {len(profiles)} students",
+        "created": created,
+        "failed": len(profiles) - created,
+        "studentIds": student_ids,
+        "storage": storage.name
+    }
+
+
 @app.get("/api/students/{student_id}")
-def get_student_profile(student_id: str):
+async def get_student_profile(student_id: str):
     """
     Get student profile by ID
     """
-    if USE_FIREBASE:
-        student_data = fb_get_student(student_id)
-        if not student_data:
-            raise HTTPException(status_code=404, detail="Student not found")
-    else:
-        if student_id not in students_db:
-            raise HTTPException(status_code=404, detail="Student not found")
-        student_data = students_db[student_id]
+    student_data = await storage.get_student(student_id)
+    if not student_data:
+        raise HTTPException(status_code=404, detail="Student not found")
     
     return {
         "success": True,
@@ -149,31 +264,28 @@ def get_student_profile(student_id: str):
 
 
 @app.put("/api/students/{student_id}")
-def update_student_profile(student_id: str, profile: StudentProfile):
+async def update_student_profile(student_id: str, profile: StudentProfile):
     """
     Update an existing student profile
     """
-    # Prepare update data
-    student_data = profile.model_dump(by_alias=True, exclude_none=True)
-    student_data["updatedAt"] = datetime.utcnow().isoformat()
+    # Prepare update data (None clears fields the new profile leaves out).
+    # id and createdAt are not profile fields the client can clear.
+    updates = profile.model_dump(by_alias=True, exclude={"id", "created_at", "updated_at"})
+    updates["updatedAt"] = datetime.utcnow().isoformat()
     
-    if USE_FIREBASE:
-        existing = fb_get_student(student_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Student not found")
-        
-        student_data["id"] = student_id
-        student_data["createdAt"] = existing.get("createdAt")
-        
-        if not fb_update_student(student_id, student_data):
-            raise HTTPException(status_code=500, detail="Failed to update in Firebase")
-    else:
-        if student_id not in students_db:
-            raise HTTPException(status_code=404, detail="Student not found")
-        
-        student_data["id"] = student_id
-        student_data["createdAt"] = students_db[student_id].get("createdAt")
-        students_db[student_id] = student_data
+    # Update-if-exists: one round trip, no separate existence read
+    updated = await storage.update_student(student_id, updates)
+    if updated is None:
+        raise HTTPException(status_code=500, detail=f"Failed to update in {storage.name}")
+    if not updated:
+        raise HTTPException(status_code=404, detail="Student not found")
+    
+    student_data = {key: value for key, value in updates.items() if value is not None}
+    student_data["id"] = student_id
+    
+    # Re-score only the scholarships whose rules read a changed field (off the event loop)
+    await asyncio.to_thread(recommendation_store.update, student_id, profile)
+    student_index.upsert(student_id, profile)
     
     return {
         "success": True,
@@ -183,21 +295,18 @@ def update_student_profile(student_id: str, profile: StudentProfile):
 
 
 @app.delete("/api/students/{student_id}")
-def delete_student(student_id: str):
+async def delete_student(student_id: str):
     """
     Delete a student profile
     """
-    if USE_FIREBASE:
-        existing = fb_get_student(student_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Student not found")
-        
-        if not fb_delete_student(student_id):
-            raise HTTPException(status_code=500, detail="Failed to delete from Firebase")
-    else:
-        if student_id not in students_db:
-            raise HTTPException(status_code=404, detail="Student not found")
-        students_db.pop(student_id)
+    deleted = await storage.delete_student(student_id)
+    if deleted is None:
+        raise HTTPException(status_code=500, detail=f"Failed to delete from {storage.name}")
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Student not found")
+    
+    recommendation_store.discard(student_id)
+    student_index.remove(student_id)
     
     return {
         "success": True,
@@ -207,18 +316,28 @@ def delete_student(student_id: str):
 
 
 @app.get("/api/students")
-def list_all_students(limit: int = 100, skip: int = 0):
+async def list_all_students(limit: int = 100, cursor: Optional[str] = None, skip: int = 0):
     """
     List all registered students (with pagination)
+    
+    - **cursor**: `nextCursor` from the previous page (every page costs the same)
+    - **skip**: Legacy offset paging, ignored when a cursor is given
     """
-    if USE_FIREBASE:
-        all_students = fb_list_students(limit=limit, offset=skip)
-        total = len(all_students)  # Note: Firebase doesn't give total easily
+    if limit <= 0:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    
+    try:
+        start_after = decode_page_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if start_after is None and skip:
+        page_query = storage.list_students(limit=limit, offset=skip)
     else:
-        all_students = list(students_db.values())
-        total = len(all_students)
-        # Apply pagination for in-memory
-        all_students = all_students[skip:skip + limit]
+        page_query = storage.list_students_after(start_after, limit)
+    
+    all_students, counters = await asyncio.gather(page_query, storage.get_counters())
+    total = counters["students"]
     
     return {
         "success": True,
@@ -226,7 +345,8 @@ def list_all_students(limit: int = 100, skip: int = 0):
         "count": len(all_students),
         "skip": skip,
         "limit": limit,
-        "storage": "Firebase" if USE_FIREBASE else "In-memory",
+        "nextCursor": next_page_cursor(all_students, limit),
+        "storage": storage.name,
         "students": all_students
     }
 
@@ -237,6 +357,11 @@ def list_all_students(limit: int = 100, skip: int = 0):
 uploads_db: dict[str, dict] = {}
 
 
+def write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
 @app.post("/api/ocr/upload")
 async def upload_marksheet(file: UploadFile = File(...)):
     """
@@ -263,8 +388,12 @@ async def upload_marksheet(file: UploadFile = File(...)):
     file_path = os.path.join(temp_dir, f"{upload_id}{file_ext}")
     
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        data = await read_upload(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    try:
+        await asyncio.to_thread(write_file, file_path, data)
         
         # Store upload info
         uploads_db[upload_id] = {
@@ -272,6 +401,7 @@ async def upload_marksheet(file: UploadFile = File(...)):
             "filename": file.filename,
             "filePath": file_path,
             "fileType": file_ext,
+            "contentHash": await asyncio.to_thread(hash_bytes, data),
             "uploadedAt": datetime.utcnow().isoformat(),
             "status": "uploaded"
         }
@@ -302,12 +432,15 @@ async def extract_text(upload_id: str):
         raise HTTPException(status_code=404, detail="File no longer exists")
     
     try:
-        # Preprocess image for better OCR (only for images, not PDFs)
-        if upload_info["fileType"] != ".pdf":
-            preprocess_image(file_path)
-        
-        # Extract text
-        extracted_text = extract_text_from_file(file_path)
+        # Preprocess image for better OCR (only for images, not PDFs, and in
+        # memory - the stored upload is left as it is), then extract text -
+        # both run in the OCR process pool
+        document = await ocr_executor.extract_document(
+            file_path,
+            preprocess=upload_info["fileType"] != ".pdf",
+            content_hash=upload_info.get("contentHash")
+        )
+        extracted_text = document["text"]
         
         # Update status
         uploads_db[upload_id]["status"] = "extracted"
@@ -318,9 +451,13 @@ async def extract_text(upload_id: str):
             "uploadId": upload_id,
             "filename": upload_info["filename"],
             "extractedText": extracted_text,
-            "characterCount": len(extracted_text)
+            "characterCount": len(extracted_text),
+            "pages": document["pages"],
+            "cached": document["cached"]
         }
         
+    except (OCRQueueFullError, OCRTimeoutError) as e:
+        raise ocr_http_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR extraction failed: {str(e)}")
 
@@ -334,7 +471,7 @@ def get_all_scholarships(category: Optional[str] = None, limit: int = 100):
     """
     scholarships = []
     
-    for s in SCHOLARSHIPS_DATABASE:
+    for s in get_scholarships():
         # Filter by category if specified
         if category and s.get("category") != category:
             continue
@@ -368,7 +505,7 @@ def search_scholarships(q: str, limit: int = 20):
     query = q.lower()
     results = []
     
-    for s in SCHOLARSHIPS_DATABASE:
+    for s in get_scholarships():
         # Search in multiple fields
         searchable = f"{s['title']} {s['provider']} {s['criteria']} {' '.join(s.get('tags', []))}".lower()
         
@@ -421,26 +558,100 @@ def get_scholarship_details(scholarship_id: str):
     }
 
 
+@app.get("/api/scholarships/{scholarship_id}/eligible-students", dependencies=[Depends(require_admin)])
+async def get_eligible_students(
+    scholarship_id: str,
+    min_score: float = 50,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """
+    Reverse match: students eligible for a scholarship, best match first (Admin only)
+    
+    - **limit**: Page size
+    - **cursor**: `nextCursor` from the previous page
+    """
+    scholarship = get_scholarship_by_id(scholarship_id)
+    if not scholarship:
+        raise HTTPException(status_code=404, detail="Scholarship not found")
+    
+    if limit <= 0:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Index is built from the store on first use and rebuilt once older than
+    # STUDENT_INDEX_MAX_AGE; in between the student endpoints keep it current
+    if student_index.stale:
+        students = [student async for student in storage.iter_students()]
+        await asyncio.to_thread(student_index.ensure_loaded, lambda: students)
+    
+    page = await asyncio.to_thread(student_index.match, scholarship, min_score, limit, after)
+    next_cursor = encode_cursor(*page[-1]) if len(page) == limit else None
+    
+    return {
+        "success": True,
+        "scholarshipId": scholarship_id,
+        "count": len(page),
+        "students": [{"studentId": student_id, "matchScore": score} for student_id, score in page],
+        "nextCursor": next_cursor
+    }
+
+
+# ==================== CATALOGUE APIs ====================
+
+@app.get("/api/catalogue")
+def get_catalogue_status():
+    """
+    Get information about the active scholarship catalogue
+    """
+    return {
+        "success": True,
+        "catalogue": get_catalogue_info()
+    }
+
+
+@app.post("/api/catalogue/reload", dependencies=[Depends(require_admin)])
+def reload_scholarship_catalogue(path: Optional[str] = None):
+    """
+    Reload the scholarship catalogue from file (Admin only)
+    
+    - **path**: Catalogue file (JSON/JSONL/CSV/SQLite); defaults to SCHOLARSHIP_CATALOGUE_PATH.
+      Must be that file or a file inside SCHOLARSHIP_CATALOGUE_DIR
+    
+    The new catalogue is validated and swapped in atomically; on error the current one stays active.
+    """
+    try:
+        info = reload_catalogue(check_catalogue_path(path) if path else None)
+    except CatalogueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "success": True,
+        "message": "Scholarship catalogue reloaded",
+        "catalogue": info
+    }
+
+
 @app.get("/api/scholarships/recommend/{student_id}")
-def recommend_scholarships(student_id: str, min_score: float = 50):
+async def recommend_scholarships(student_id: str, min_score: float = 50, limit: Optional[int] = None):
     """
     Get scholarship recommendations for a student based on their profile
+    
+    - **limit**: Return only the top N matches (cheaper than ranking everything)
     """
-    # Get student data from Firebase or in-memory
-    if USE_FIREBASE:
-        student_data = fb_get_student(student_id)
-        if not student_data:
-            raise HTTPException(status_code=404, detail="Student not found. Register student first via POST /api/students/register")
-    else:
-        if student_id not in students_db:
-            raise HTTPException(status_code=404, detail="Student not found. Register student first via POST /api/students/register")
-        student_data = students_db[student_id]
+    student_data = await storage.get_student(student_id)
+    if not student_data:
+        raise HTTPException(status_code=404, detail="Student not found. Register student first via POST /api/students/register")
     
     try:
         student = StudentProfile(**student_data)
         
-        # Find matching scholarships
-        matches = find_matching_scholarships(student, min_score)
+        # Find matching scholarships (from the student's stored scores) off the event loop
+        matches = await asyncio.to_thread(recommendation_store.recommend, student_id, student, min_score, limit)
         
         # Convert to dict for response
         recommendations = []
@@ -460,10 +671,12 @@ def recommend_scholarships(student_id: str, min_score: float = 50):
 
 
 @app.post("/api/scholarships/recommend-direct")
-def recommend_scholarships_direct(profile: StudentProfile, min_score: float = 50):
+def recommend_scholarships_direct(profile: StudentProfile, min_score: float = 50, limit: Optional[int] = None):
     """
     Get scholarship recommendations directly from profile data (no registration needed)
     
+    - **limit**: Return only the top N matches (cheaper than ranking everything)
+    
     Example body:
     {
         "name": "Test Student",
@@ -475,7 +688,7 @@ def recommend_scholarships_direct(profile: StudentProfile, min_score: float = 50
     """
     try:
         # Find matching scholarships
-        matches = find_matching_scholarships(profile, min_score)
+        matches = find_matching_scholarships(profile, min_score, top_k=limit)
         
         # Convert to dict for response
         recommendations = []
@@ -508,36 +721,21 @@ def recommend_scholarships_direct(profile: StudentProfile, min_score: float = 50
 # ==================== APPLICATION APIs ====================
 
 @app.post("/api/applications/apply")
-def apply_scholarship(student_id: str, scholarship_id: str):
+async def apply_scholarship(student_id: str, scholarship_id: str):
     """
     Apply for a scholarship (stored in Firebase if available)
     """
-    # Validate student exists
-    if USE_FIREBASE:
-        student = fb_get_student(student_id)
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-    else:
-        if student_id not in students_db:
-            raise HTTPException(status_code=404, detail="Student not found")
-        student = students_db[student_id]
-    
     # Validate scholarship exists
     scholarship = get_scholarship_by_id(scholarship_id)
+    
+    # Validate student exists
+    student = await storage.get_student(student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    
     if not scholarship:
         raise HTTPException(status_code=404, detail="Scholarship not found")
     
-    # Check if already applied
-    if USE_FIREBASE:
-        existing_apps = fb_list_applications(student_id=student_id)
-        for app in existing_apps:
-            if app.get("scholarshipId") == scholarship_id:
-                raise HTTPException(status_code=400, detail="Already applied for this scholarship")
-    else:
-        for app in applications_db.values():
-            if app["studentId"] == student_id and app["scholarshipId"] == scholarship_id:
-                raise HTTPException(status_code=400, detail="Already applied for this scholarship")
-    
     # Create application
     now = datetime.utcnow().isoformat()
     
@@ -552,14 +750,13 @@ def apply_scholarship(student_id: str, scholarship_id: str):
         "updatedAt": now
     }
     
-    if USE_FIREBASE:
-        application_id = fb_create_application(application)
-        if not application_id:
-            raise HTTPException(status_code=500, detail="Failed to save application to Firebase")
-    else:
-        application_id = str(uuid.uuid4())
-        application["id"] = application_id
-        applications_db[application_id] = application
+    # Duplicate check and insert are one atomic step (uniqueness index on student + scholarship)
+    try:
+        application_id = await storage.create_application(application)
+    except DuplicateApplicationError:
+        raise HTTPException(status_code=400, detail="Already applied for this scholarship")
+    if not application_id:
+        raise HTTPException(status_code=500, detail=f"Failed to save application to {storage.name}")
     
     application["id"] = application_id
     
@@ -567,24 +764,19 @@ def apply_scholarship(student_id: str, scholarship_id: str):
         "success": True,
         "message": "Application submitted successfully",
         "applicationId": application_id,
-        "storage": "Firebase" if USE_FIREBASE else "In-memory",
+        "storage": storage.name,
         "data": application
     }
 
 
 @app.get("/api/applications/status/{application_id}")
-def get_application_status(application_id: str):
+async def get_application_status(application_id: str):
     """
     Get status of a scholarship application
     """
-    if USE_FIREBASE:
-        app_data = fb_get_application(application_id)
-        if not app_data:
-            raise HTTPException(status_code=404, detail="Application not found")
-    else:
-        if application_id not in applications_db:
-            raise HTTPException(status_code=404, detail="Application not found")
-        app_data = applications_db[application_id]
+    app_data = await storage.get_application(application_id)
+    if not app_data:
+        raise HTTPException(status_code=404, detail="Application not found")
     
     return {
         "success": True,
@@ -593,23 +785,17 @@ def get_application_status(application_id: str):
 
 
 @app.get("/api/applications/student/{student_id}")
-def get_student_applications(student_id: str):
+async def get_student_applications(student_id: str):
     """
     Get all applications for a student
     """
-    # Validate student exists
-    if USE_FIREBASE:
-        student = fb_get_student(student_id)
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-        student_apps = fb_list_applications(student_id=student_id)
-    else:
-        if student_id not in students_db:
-            raise HTTPException(status_code=404, detail="Student not found")
-        student_apps = [
-            app for app in applications_db.values() 
-            if app["studentId"] == student_id
-        ]
+    # Validate student exists (fetched concurrently with the applications)
+    student, student_apps = await asyncio.gather(
+        storage.get_student(student_id),
+        storage.list_applications(student_id=student_id)
+    )
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
     
     return {
         "success": True,
@@ -620,75 +806,185 @@ def get_student_applications(student_id: str):
 
 
 @app.put("/api/applications/{application_id}/withdraw")
-def withdraw_application(application_id: str):
+async def withdraw_application(application_id: str):
     """
     Withdraw/cancel a scholarship application
     """
-    if USE_FIREBASE:
-        app_data = fb_get_application(application_id)
-        if not app_data:
-            raise HTTPException(status_code=404, detail="Application not found")
-        
-        # Can only withdraw pending applications
-        if app_data["status"] != ApplicationStatus.PENDING.value:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Cannot withdraw application with status: {app_data['status']}"
-            )
-        
-        # Update status
-        updates = {
-            "status": "Withdrawn",
-            "updatedAt": datetime.utcnow().isoformat()
-        }
-        fb_update_application(application_id, updates)
-        app_data.update(updates)
-    else:
-        if application_id not in applications_db:
-            raise HTTPException(status_code=404, detail="Application not found")
-        
-        app_data = applications_db[application_id]
-        
-        # Can only withdraw pending applications
-        if app_data["status"] != ApplicationStatus.PENDING.value:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Cannot withdraw application with status: {app_data['status']}"
-            )
-        
-        # Update status
-        app_data["status"] = "Withdrawn"
-        app_data["updatedAt"] = datetime.utcnow().isoformat()
+    # Can only withdraw pending applications (checked and changed atomically)
+    change = await change_status(storage, application_id, WITHDRAWN, actor="student")
+    if change is None:
+        raise HTTPException(status_code=500, detail=f"Failed to update application in {storage.name}")
+    if not change.found:
+        raise HTTPException(status_code=404, detail="Application not found")
+    if not change.applied:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Cannot withdraw application with status: {change.application['status']}"
+        )
     
     return {
         "success": True,
         "message": "Application withdrawn successfully",
-        "data": app_data
+        "data": change.application
+    }
+
+
+@app.put("/api/applications/bulk/status")
+async def update_application_status_bulk(request: BulkStatusUpdate, admin: dict = Depends(require_admin)):
+    """
+    Set the status of many applications in batched writes (Admin only)
+    
+    Applications whose current status does not allow the change are left as they are
+    """
+    application_ids = list(dict.fromkeys(request.application_ids))
+    if not application_ids:
+        raise HTTPException(status_code=400, detail="No applications given")
+    if len(application_ids) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} applications per request")
+    
+    results = await change_status_bulk(
+        storage, application_ids, request.status, actor=admin.get("email"), reason=request.reason
+    )
+    
+    updated = [application_id for application_id, change in results.items() if change and change.applied]
+    
+    return {
+        "success": len(updated) == len(application_ids),
+        "message": f"Updated {len(updated)} of {len(application_ids)} applications to {request.status}",
+        "updated": len(updated),
+        "notUpdated": [application_id for application_id, change in results.items() if not (change and change.applied)],
+        "notFound": [application_id for application_id, change in results.items() if change and not change.found],
+        "invalidTransitions": {
+            application_id: change.application["status"]
+            for application_id, change in results.items()
+            if change and change.found and not change.applied
+        },
+        "failed": [application_id for application_id, change in results.items() if change is None],
+        "storage": storage.name
+    }
+
+
+@app.put("/api/applications/{application_id}/status")
+async def update_application_status(application_id: str, request: StatusUpdate, admin: dict = Depends(require_admin)):
+    """
+    Move an application to a new status (Admin only)
+    
+    Pending -> Verified, Approved, Rejected or Withdrawn; Verified -> Approved or Rejected
+    """
+    change = await change_status(storage, application_id, request.status, actor=admin.get("email"), reason=request.reason)
+    if change is None:
+        raise HTTPException(status_code=500, detail=f"Failed to update application in {storage.name}")
+    if not change.found:
+        raise HTTPException(status_code=404, detail="Application not found")
+    if not change.applied:
+        current = change.application["status"]
+        allowed = ", ".join(sorted(allowed_transitions(current))) or "none"
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot change status from {current} to {request.status} (allowed: {allowed})"
+        )
+    
+    return {
+        "success": True,
+        "message": f"Application status changed to {request.status}",
+        "data": change.application
+    }
+
+
+@app.get("/api/applications/{application_id}/history")
+async def get_application_history(application_id: str):
+    """
+    Get the status transition log of an application, oldest first
+    """
+    application, transitions = await asyncio.gather(
+        storage.get_application(application_id),
+        storage.list_application_transitions(application_id)
+    )
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    return {
+        "success": True,
+        "applicationId": application_id,
+        "status": application["status"],
+        "count": len(transitions),
+        "transitions": transitions
+    }
+
+
+@app.get("/api/applications/review", dependencies=[Depends(require_admin)])
+async def get_review_queue(
+    status: ApplicationStatus = ApplicationStatus.PENDING,
+    scholarship_id: Optional[str] = None,
+    older_than_days: Optional[float] = Query(None, ge=0, le=36500),
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """
+    Oldest-first applications with a status, e.g. Pending for one scholarship
+    and older than N days (Admin only)
+    
+    - **cursor**: `nextCursor` from the previous page
+    """
+    if limit <= 0:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    
+    start_after = None
+    if cursor:
+        try:
+            applied_at, _, last_id = decode_page_cursor(cursor).partition("|")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not last_id:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        start_after = (applied_at, last_id)
+    
+    applications = await review_queue(
+        storage,
+        status=status.value,
+        scholarship_id=scholarship_id,
+        older_than_days=older_than_days,
+        limit=limit,
+        start_after=start_after
+    )
+    
+    next_cursor = None
+    if applications and len(applications) >= limit:
+        last = applications[-1]
+        next_cursor = encode_page_cursor(f"{last['appliedAt']}|{last['id']}")
+    
+    return {
+        "success": True,
+        "status": status.value,
+        "count": len(applications),
+        "nextCursor": next_cursor,
+        "storage": storage.name,
+        "applications": applications
     }
 
 
 @app.get("/api/applications")
-def get_all_applications(status: Optional[str] = None, limit: int = 100):
+async def get_all_applications(status: Optional[str] = None, limit: int = 100, cursor: Optional[str] = None):
     """
     Get all applications, optionally filtered by status
+    
+    - **cursor**: `nextCursor` from the previous page
     """
-    if USE_FIREBASE:
-        all_apps = fb_list_applications(limit=limit)
-        if status:
-            all_apps = [app for app in all_apps if app.get("status") == status]
-    else:
-        all_apps = []
-        for app in applications_db.values():
-            if status and app["status"] != status:
-                continue
-            all_apps.append(app)
-            if len(all_apps) >= limit:
-                break
+    if limit <= 0:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    
+    try:
+        start_after = decode_page_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    all_apps = await storage.list_applications(status=status, limit=limit, start_after=start_after)
     
     return {
         "success": True,
         "count": len(all_apps),
-        "storage": "Firebase" if USE_FIREBASE else "In-memory",
+        "nextCursor": next_page_cursor(all_apps, limit),
+        "storage": storage.name,
         "applications": all_apps
     }
 
@@ -696,45 +992,171 @@ def get_all_applications(status: Optional[str] = None, limit: int = 100):
 # ==================== STATS API ====================
 
 @app.get("/api/stats")
-def get_stats():
+async def get_stats():
     """
-    Get system statistics
+    Get system statistics (from the maintained counters, no documents are read)
     """
-    if USE_FIREBASE:
-        students = fb_list_students()
-        applications = fb_list_applications()
-        
-        return {
-            "success": True,
-            "storage": "Firebase",
-            "stats": {
-                "totalStudents": len(students),
-                "totalScholarships": len(SCHOLARSHIPS_DATABASE),
-                "totalApplications": len(applications),
-                "applicationsByStatus": {
-                    "Pending": sum(1 for a in applications if a.get("status") == "Pending"),
-                    "Approved": sum(1 for a in applications if a.get("status") == "Approved"),
-                    "Rejected": sum(1 for a in applications if a.get("status") == "Rejected"),
-                    "Withdrawn": sum(1 for a in applications if a.get("status") == "Withdrawn")
-                }
-            }
-        }
-    else:
-        return {
-            "success": True,
-            "storage": "In-memory",
-            "stats": {
-                "totalStudents": len(students_db),
-                "totalScholarships": len(SCHOLARSHIPS_DATABASE),
-                "totalApplications": len(applications_db),
-                "applicationsByStatus": {
-                    "Pending": sum(1 for a in applications_db.values() if a["status"] == "Pending"),
-                    "Approved": sum(1 for a in applications_db.values() if a["status"] == "Approved"),
-                    "Rejected": sum(1 for a in applications_db.values() if a["status"] == "Rejected"),
-                    "Withdrawn": sum(1 for a in applications_db.values() if a["status"] == "Withdrawn")
-                }
-            }
+    counters = await storage.get_counters()
+    
+    by_status = {status.value: 0 for status in ApplicationStatus}
+    by_status.update(counters["applicationsByStatus"])
+    
+    return {
+        "success": True,
+        "storage": storage.name,
+        "stats": {
+            "totalStudents": counters["students"],
+            "totalScholarships": len(get_scholarships()),
+            "totalApplications": counters["applications"],
+            "applicationsByStatus": by_status
         }
+    }
+
+
+@app.post("/api/stats/rebuild", dependencies=[Depends(require_admin)])
+async def rebuild_stats():
+    """
+    Recount students and applications and reset the stats counters (Admin only)
+    
+    Only needed after data was changed outside the API
+    """
+    counters = await storage.rebuild_counters()
+    
+    return {
+        "success": True,
+        "storage": storage.name,
+        "counters": counters
+    }
+
+
+@app.get("/api/stats/recommendation-cache")
+def get_recommendation_cache_statistics():
+    """
+    Get hit/miss counters of the recommendation score cache and the
+    incremental per-student score store
+    """
+    return {
+        "success": True,
+        "cache": get_recommendation_cache_stats(),
+        "store": recommendation_store.stats()
+    }
+
+
+@app.get("/api/stats/ocr")
+def get_ocr_statistics():
+    """
+    Get OCR process pool size, queue depth and job counters
+    """
+    return {
+        "success": True,
+        "ocr": ocr_executor.stats()
+    }
+
+
+@app.get("/api/stats/extraction-cache")
+def get_extraction_cache_statistics():
+    """
+    Get hit ratio and size of the OCR / marksheet parse cache
+    """
+    return {
+        "success": True,
+        "cache": extraction_cache.stats()
+    }
+
+
+@app.get("/api/stats/student-cache")
+def get_student_cache_statistics():
+    """
+    Get hit ratio, size and approximate memory of the student profile cache
+    (only used in front of a persistent backend)
+    """
+    if not isinstance(storage, CachedStorage):
+        return {"success": True, "enabled": False}
+    
+    return {
+        "success": True,
+        "enabled": True,
+        "cache": storage.stats()
+    }
+
+
+# ==================== BULK RECOMMENDATION APIs ====================
+
+bulk_job_status: dict = {"running": False, "lastRun": None}
+
+
+async def _run_bulk_job(min_score: float, workers: Optional[int], restart: bool):
+    """Background task: recompute recommendations for every stored student"""
+    # The job runs in a worker thread; storage calls are sent back to this loop
+    loop = asyncio.get_running_loop()
+    
+    def source(start_after):
+        while True:
+            page = asyncio.run_coroutine_threadsafe(storage.list_students_after(start_after, 500), loop).result()
+            yield from page
+            if len(page) < 500:
+                return
+            start_after = page[-1]["id"]
+    
+    def write_batch(results):
+        return asyncio.run_coroutine_threadsafe(storage.save_recommendations(results), loop).result()
+    
+    # In-memory data does not survive a restart, so there is nothing to resume
+    checkpoint_path = None if isinstance(storage, InMemoryStorage) else DEFAULT_CHECKPOINT
+    
+    bulk_job_status["running"] = True
+    try:
+        summary = await asyncio.to_thread(
+            run_bulk_recommendations,
+            source, write_batch,
+            workers=workers,
+            min_score=min_score,
+            checkpoint_path=checkpoint_path,
+            restart=restart
+        )
+        bulk_job_status["lastRun"] = {"success": True, **summary, "finishedAt": datetime.utcnow().isoformat()}
+    except Exception as e:
+        bulk_job_status["lastRun"] = {"success": False, "error": str(e), "finishedAt": datetime.utcnow().isoformat()}
+    finally:
+        bulk_job_status["running"] = False
+
+
+@app.post("/api/recommendations/bulk", dependencies=[Depends(require_admin)])
+async def start_bulk_recommendations(
+    background_tasks: BackgroundTasks,
+    min_score: float = 50,
+    workers: Optional[int] = None,
+    restart: bool = False
+):
+    """
+    Start a bulk recommendation job over all stored students (Admin only)
+    
+    Runs in the background across a process pool; poll GET /api/recommendations/bulk
+    """
+    # Checked and set on the event loop with no await in between, so two
+    # concurrent requests cannot both start a job
+    if bulk_job_status["running"]:
+        raise HTTPException(status_code=409, detail="A bulk recommendation job is already running")
+    
+    bulk_job_status["running"] = True
+    background_tasks.add_task(_run_bulk_job, min_score, workers, restart)
+    
+    return {
+        "success": True,
+        "message": "Bulk recommendation job started",
+        "storage": storage.name
+    }
+
+
+@app.get("/api/recommendations/bulk", dependencies=[Depends(require_admin)])
+def get_bulk_recommendations_status():
+    """
+    Get the status and throughput of the last bulk recommendation job (Admin only)
+    """
+    return {
+        "success": True,
+        **bulk_job_status
+    }
 
 
 # ==================== FIREBASE TEST APIs ====================
@@ -987,7 +1409,7 @@ def explain_all_scholarships_eligibility(profile: StudentProfile):
     student_dict = profile.model_dump(by_alias=True, exclude_none=True)
     
     # Get all scholarships
-    scholarships = SCHOLARSHIPS_DATABASE
+    scholarships = get_scholarships()
     
     # Generate explanations for all
     report = explain_all_scholarships(student_dict, scholarships)
@@ -999,15 +1421,12 @@ def explain_all_scholarships_eligibility(profile: StudentProfile):
 
 
 @app.get("/api/explain/student/{student_id}/scholarship/{scholarship_id}")
-def explain_student_scholarship_eligibility(student_id: str, scholarship_id: str):
+async def explain_student_scholarship_eligibility(student_id: str, scholarship_id: str):
     """
     Explain eligibility for a specific student and scholarship (using stored student data)
     """
     # Get student
-    if USE_FIREBASE:
-        student_data = fb_get_student(student_id)
-    else:
-        student_data = students_db.get(student_id)
+    student_data = await storage.get_student(student_id)
     
     if not student_data:
         raise HTTPException(status_code=404, detail=f"Student '{student_id}' not found")
@@ -1029,23 +1448,20 @@ def explain_student_scholarship_eligibility(student_id: str, scholarship_id: str
 
 
 @app.get("/api/explain/student/{student_id}/all")
-def explain_student_all_scholarships(student_id: str):
+async def explain_student_all_scholarships(student_id: str):
     """
     Explain eligibility for a specific student against ALL scholarships
     
     Provides a complete eligibility report with detailed explanations
     """
     # Get student
-    if USE_FIREBASE:
-        student_data = fb_get_student(student_id)
-    else:
-        student_data = students_db.get(student_id)
+    student_data = await storage.get_student(student_id)
     
     if not student_data:
         raise HTTPException(status_code=404, detail=f"Student '{student_id}' not found")
     
     # Generate explanations for all scholarships
-    report = explain_all_scholarships(student_data, SCHOLARSHIPS_DATABASE)
+    report = await asyncio.to_thread(explain_all_scholarships, student_data, get_scholarships())
     
     return {
         "success": True,
@@ -1057,7 +1473,7 @@ def explain_student_all_scholarships(student_id: str):
 # ==================== COMPLETE PIPELINE API ====================
 # This demonstrates the full flow: Upload → OCR → AI Extraction → Normalization → Eligibility → Recommendations
 
-from services.gemini_service import parse_marksheet_with_ai
+from services.gemini_service import parse_marksheet_cached
 
 @app.post("/api/pipeline/complete")
 async def complete_scholarship_pipeline(
@@ -1101,16 +1517,14 @@ async def complete_scholarship_pipeline(
                 detail=f"Invalid file type. Allowed: {allowed_types}"
             )
         
-        # Save file temporarily
+        # Keep the upload in memory (decoded once by the OCR stage, never written to disk)
         upload_id = str(uuid.uuid4())
-        temp_dir = os.path.join(tempfile.gettempdir(), "scholarship_uploads")
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        file_ext = os.path.splitext(file.filename)[1] or ".jpg"
-        file_path = os.path.join(temp_dir, f"{upload_id}{file_ext}")
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        file_ext = os.path.splitext(file.filename)[1] or (".pdf" if file.content_type == "application/pdf" else ".jpg")
+        try:
+            data = await read_upload(file)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        content_hash = await asyncio.to_thread(hash_bytes, data)
         
         pipeline_results["stages"]["upload"] = {
             "status": "✅ Complete",
@@ -1123,18 +1537,25 @@ async def complete_scholarship_pipeline(
         # ========== STAGE 2: OCR EXTRACTION ==========
         stage_start = time.time()
         
-        # Preprocess if image
-        if file.content_type.startswith("image/"):
-            processed_path = preprocess_image(file_path)
-        else:
-            processed_path = file_path
-        
-        # Extract text
-        extracted_text = extract_text_from_file(processed_path)
+        # Preprocess if image, then extract text (in the OCR process pool,
+        # skipped when the same file was processed before)
+        preprocess = file.content_type.startswith("image/")
+        try:
+            document = await ocr_executor.extract_document_from_bytes(
+                data,
+                f"{upload_id}{file_ext}",
+                preprocess=preprocess,
+                content_hash=content_hash
+            )
+            extracted_text = document["text"]
+        except (OCRQueueFullError, OCRTimeoutError) as e:
+            raise ocr_http_error(e)
         
         pipeline_results["stages"]["ocr"] = {
             "status": "✅ Complete",
             "characterCount": len(extracted_text),
+            "pages": document["pages"],
+            "cached": document["cached"],
             "preview": extracted_text[:200] + "..." if len(extracted_text) > 200 else extracted_text
         }
         pipeline_results["timing"]["ocr"] = round(time.time() - stage_start, 3)
@@ -1144,7 +1565,11 @@ async def complete_scholarship_pipeline(
         
         try:
             # Use AI to extract structured data
-            student_profile = await parse_marksheet_with_ai(extracted_text)
+            student_profile = await parse_marksheet_cached(
+                content_hash,
+                ocr_text=extracted_text,
+                ocr_version=document["ocrVersion"]
+            )
             
             # Convert to dict
             student_data = student_profile.model_dump(by_alias=True, exclude_none=True)
@@ -1195,7 +1620,7 @@ async def complete_scholarship_pipeline(
         
         pipeline_results["stages"]["eligibility"] = {
             "status": "✅ Complete",
-            "totalScholarships": len(SCHOLARSHIPS_DATABASE),
+            "totalScholarships": len(get_scholarships()),
             "eligibleCount": len(matching_scholarships)
         }
         pipeline_results["timing"]["eligibility"] = round(time.time() - stage_start, 3)
@@ -1271,14 +1696,6 @@ async def complete_scholarship_pipeline(
         
         pipeline_results["explanations"] = explanations
         
-        # Cleanup temp file
-        try:
-            os.remove(file_path)
-            if processed_path != file_path:
-                os.remove(processed_path)
-        except:
-            pass
-        
         return pipeline_results
         
     except HTTPException:
@@ -1332,7 +1749,7 @@ def get_pipeline_status():
             },
             "eligibility_engine": {
                 "status": "✅ Active",
-                "totalScholarships": len(SCHOLARSHIPS_DATABASE),
+                "totalScholarships": len(get_scholarships()),
                 "criteria": ["Category", "Income", "Marks", "Region", "Gender", "Age"]
             },
             "recommendation_ranking": {
@@ -1344,8 +1761,8 @@ def get_pipeline_status():
                 "features": ["Detailed reasons", "Pass/Fail breakdown", "Suggestions"]
             },
             "database": {
-                "status": "✅ Firebase" if USE_FIREBASE else "⚠️ In-Memory",
-                "persistent": USE_FIREBASE
+                "status": "⚠️ In-Memory" if isinstance(storage, InMemoryStorage) else f"✅ {storage.name}",
+                "persistent": not isinstance(storage, InMemoryStorage)
             }
         },
         "flow": [
@@ -111,6 +111,7 @@ class ApplicationStatus(str, Enum):
     VERIFIED = "Verified"
     APPROVED = "Approved"
     REJECTED = "Rejected"
+    WITHDRAWN = "Withdrawn"
 
 
 class StudentApplication(BaseModel):
@@ -131,6 +132,26 @@ class StudentApplication(BaseModel):
         use_enum_values = True
 
 
+class StatusUpdate(BaseModel):
+    """Move an application to a new status"""
+    status: ApplicationStatus
+    reason: Optional[str] = None
+    
+    class Config:
+        use_enum_values = True
+
+
+class BulkStatusUpdate(BaseModel):
+    """Set the status of many applications at once"""
+    application_ids: List[str] = Field(alias="applicationIds")
+    status: ApplicationStatus
+    reason: Optional[str] = None
+    
+    class Config:
+        populate_by_name = True
+        use_enum_values = True
+
+
 class Language(str, Enum):
     """Supported languages"""
     ENGLISH = "English"
@@ -0,0 +1,47 @@
+"""
+Rebuild Stats Counters
+Recounts students and applications in persistent storage and resets the
+aggregate counters behind /api/stats (e.g. after an import or manual edits)
+
+Run with: python rebuild_stats.py [--backend firestore|sqlite]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from services.storage_service import create_storage
+
+
+async def rebuild(backend: str) -> dict:
+    storage = create_storage(backend)
+    try:
+        return await storage.rebuild_counters()
+    finally:
+        await storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recount stored documents and reset the /api/stats counters")
+    parser.add_argument(
+        "--backend",
+        choices=["firestore", "sqlite"],
+        default=os.environ.get("STORAGE_BACKEND") or "firestore",
+        help="Storage backend (default: STORAGE_BACKEND or firestore)"
+    )
+    args = parser.parse_args()
+
+    if args.backend == "firestore":
+        from services.firebase_service import initialize_firebase
+
+        if not initialize_firebase():
+            print("[ERROR] Firebase failed to initialize")
+            raise SystemExit(1)
+
+    counters = asyncio.run(rebuild(args.backend))
+    print(f"[OK] Counters rebuilt: {json.dumps(counters)}")
+
+
+if __name__ == "__main__":
+    main()
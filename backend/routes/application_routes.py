@@ -71,17 +71,6 @@ async def list_applications(student_id: Optional[str] = None, limit: int = 100):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.put("/{application_id}/status", response_model=dict)
-async def update_application_status(application_id: str, status: ApplicationStatus):
-    """Update application status"""
-    try:
-        firebase = get_firebase()
-        success = firebase.update_application(application_id, {"status": status.value})
-        return {"success": success, "message": f"Application status updated to {status.value}"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
 @router.get("/student/{student_id}", response_model=List[StudentApplication])
 async def get_student_applications(student_id: str):
     """Get all applications for a specific student"""
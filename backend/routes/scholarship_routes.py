@@ -6,7 +6,7 @@ from fastapi import APIRouter, HTTPException
 from typing import List, Optional
 from models.types import Scholarship
 # from database.firebase_service import get_firebase_service
-from services.scholarship_recommendation_engine import SCHOLARSHIPS_DATABASE, get_scholarship_by_id
+from services.scholarship_recommendation_engine import get_scholarships, get_scholarship_by_id
 
 router = APIRouter(prefix="/api/scholarships", tags=["scholarships"])
 
@@ -19,7 +19,7 @@ async def list_scholarships(category: Optional[str] = None, limit: int = 100):
     """
     try:
         scholarships = []
-        for s in SCHOLARSHIPS_DATABASE:
+        for s in get_scholarships():
             if category and s.get("category") != category:
                 continue
             
@@ -77,7 +77,7 @@ async def list_categories():
     """Get list of all scholarship categories"""
     try:
         categories = set()
-        for s in SCHOLARSHIPS_DATABASE:
+        for s in get_scholarships():
             categories.add(s["category"])
         return sorted(list(categories))
     except Exception as e:
@@ -89,7 +89,7 @@ async def list_tags():
     """Get list of all scholarship tags"""
     try:
         tags = set()
-        for s in SCHOLARSHIPS_DATABASE:
+        for s in get_scholarships():
             tags.update(s["tags"])
         return sorted(list(tags))
     except Exception as e:
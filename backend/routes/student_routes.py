@@ -6,12 +6,13 @@ from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from typing import List, Optional
 from models.types import StudentProfile, MatchResult
 # from database.firebase_service import get_firebase_service
-from services.ocr_service import extract_text_from_file, preprocess_image
-from services.gemini_service import parse_marksheet_with_ai, parse_marksheet_image_with_vision
+from services.ocr_executor import ocr_executor, OCRQueueFullError, OCRTimeoutError
+from services.gemini_service import parse_marksheet_cached, guess_image_mime_type
+from services.extraction_cache import hash_bytes
+from services.upload_service import read_upload, UploadTooLargeError
 from services.scholarship_recommendation_engine import find_matching_scholarships
 import os
-import tempfile
-import shutil
+import asyncio
 
 router = APIRouter(prefix="/api/students", tags=["students"])
 
@@ -105,45 +106,57 @@ async def upload_marksheet(file: UploadFile = File(...)):
                 detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            shutil.copyfileobj(file.file, tmp_file)
-            tmp_path = tmp_file.name
+        # Keep the upload in memory: images are decoded once and passed
+        # straight to Tesseract, nothing is written to disk
+        try:
+            data = await read_upload(file)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        
+        # Same file contents reuse the cached OCR text and parse
+        content_hash = await asyncio.to_thread(hash_bytes, data)
         
+        # Preprocess image if it's an image file, then extract text using
+        # OCR (both in the OCR process pool, off the event loop)
+        print(f"📄 Extracting text from: {file.filename}")
         try:
-            # Preprocess image if it's an image file
-            processed_path = tmp_path
-            if file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']:
-                processed_path = preprocess_image(tmp_path)
-            
-            # Extract text using OCR
-            print(f"📄 Extracting text from: {file.filename}")
-            ocr_text = extract_text_from_file(processed_path)
-            
-            # Check if OCR was successful or if we need to use Vision API
-            # OCR returns placeholder text starting with "[IMAGE_FILE:" when Tesseract is not available
-            use_vision_api = (
-                not ocr_text or 
-                len(ocr_text) < 50 or 
-                ocr_text.startswith("[IMAGE_FILE:") or
-                ocr_text.startswith("[PDF_FILE:")
+            preprocess = file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']
+            document = await ocr_executor.extract_document_from_bytes(
+                data, file.filename, preprocess=preprocess, content_hash=content_hash
             )
-            
-            if use_vision_api:
-                # Use Gemini Vision API to directly analyze the image
-                print("🔍 OCR not available or insufficient text. Using Gemini Vision API...")
-                student_profile = await parse_marksheet_image_with_vision(tmp_path)
-            else:
-                # Parse with AI from OCR text
-                print("🤖 Parsing OCR text with AI...")
-                student_profile = await parse_marksheet_with_ai(ocr_text)
-            
-            return student_profile
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+            ocr_text = document["text"]
+        except OCRQueueFullError:
+            raise HTTPException(status_code=503, detail="OCR service busy, please retry shortly", headers={"Retry-After": "5"})
+        except OCRTimeoutError as e:
+            raise HTTPException(status_code=504, detail=f"OCR extraction timed out: {e}")
+        
+        # Check if OCR was successful or if we need to use Vision API
+        # OCR returns placeholder text starting with "[IMAGE_FILE:" when Tesseract is not available
+        use_vision_api = (
+            not ocr_text or 
+            len(ocr_text) < 50 or 
+            ocr_text.startswith("[IMAGE_FILE:") or
+            ocr_text.startswith("[PDF_FILE:")
+        )
+        
+        if use_vision_api:
+            # Use Gemini Vision API to directly analyze the image
+            print("🔍 OCR not available or insufficient text. Using Gemini Vision API...")
+            student_profile = await parse_marksheet_cached(
+                content_hash,
+                image_data=data,
+                mime_type=guess_image_mime_type(file.filename)
+            )
+        else:
+            # Parse with AI from OCR text
+            print("🤖 Parsing OCR text with AI...")
+            student_profile = await parse_marksheet_cached(
+                content_hash,
+                ocr_text=ocr_text,
+                ocr_version=document["ocrVersion"]
+            )
+        
+        return student_profile
         
     except HTTPException:
         raise
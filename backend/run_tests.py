@@ -5,7 +5,10 @@ This runs tests directly without needing a separate server process
 
 from fastapi.testclient import TestClient
 import json
+import os
+import sys
 import time
+import unittest
 
 # Import the FastAPI app
 from main import app
@@ -141,9 +144,11 @@ def main():
         "isFirstGraduate": True
     }
     test_api("Direct Recommendations", "POST", "/api/scholarships/recommend-direct", recommend_data)
+    test_api("Direct Recommendations (Top 3)", "POST", "/api/scholarships/recommend-direct?limit=3", recommend_data)
     
     if student_id:
         test_api("Recommendations for Student", "GET", f"/api/scholarships/recommend/{student_id}")
+        test_api("Top Recommendations for Student", "GET", f"/api/scholarships/recommend/{student_id}?limit=3")
     
     # ===== APPLICATION APIs =====
     if student_id:
@@ -151,6 +156,7 @@ def main():
         apply_url = f"/api/applications/apply?student_id={student_id}&scholarship_id=sc-post-matric"
         result = test_api("Apply for Scholarship", "POST", apply_url)
         app_id = result.get("applicationId") if result else None
+        test_api("Apply Again (Should Fail)", "POST", apply_url)
         
         if app_id:
             test_api("Get Application Status", "GET", f"/api/applications/status/{app_id}")
@@ -160,15 +166,65 @@ def main():
     
     test_api("Get All Applications", "GET", "/api/applications")
     
+    # ===== BULK APIs =====
+    if admin_token:
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        bulk_students = [
+            {"name": f"Bulk Student {i}", "region": "Karnataka", "overallPercentage": 70.0 + i, "incomeLevel": "< 2 LPA", "category": "OBC"}
+            for i in range(5)
+        ]
+        result = test_api("Register Students (Bulk, Admin)", "POST", "/api/students/bulk", bulk_students, headers=headers)
+        bulk_ids = [sid for sid in (result or {}).get("studentIds", []) if sid]
+        bulk_app_ids = []
+        for sid in bulk_ids[:2]:
+            result = test_api("Apply for Scholarship (Bulk Student)", "POST", f"/api/applications/apply?student_id={sid}&scholarship_id=sc-post-matric")
+            if result and result.get("applicationId"):
+                bulk_app_ids.append(result["applicationId"])
+        if bulk_app_ids:
+            test_api("Verify Application (Admin)", "PUT", f"/api/applications/{bulk_app_ids[0]}/status",
+                     {"status": "Verified", "reason": "Documents checked"}, headers=headers)
+        test_api("Review Queue (Admin)", "GET", "/api/applications/review?status=Pending&limit=10", headers=headers)
+        test_api("Update Application Status (Bulk, Admin)", "PUT", "/api/applications/bulk/status",
+                 {"applicationIds": bulk_app_ids, "status": "Approved"}, headers=headers)
+        if bulk_app_ids:
+            test_api("Application History", "GET", f"/api/applications/{bulk_app_ids[0]}/history")
+    
+    # ===== CATALOGUE =====
+    test_api("Catalogue Info", "GET", "/api/catalogue")
+    
+    # ===== BULK RECOMMENDATIONS =====
+    if admin_token:
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        test_api("Start Bulk Recommendations (Admin)", "POST", "/api/recommendations/bulk?workers=2", headers=headers)
+        test_api("Bulk Recommendations Status (Admin)", "GET", "/api/recommendations/bulk", headers=headers)
+        test_api("Eligible Students for Scholarship (Admin)", "GET", "/api/scholarships/sc-post-matric/eligible-students?limit=10", headers=headers)
+        test_api("Rebuild Stats Counters (Admin)", "POST", "/api/stats/rebuild", headers=headers)
+    
     # ===== FIREBASE =====
     test_api("Firebase Status", "GET", "/api/firebase/status")
     
     # ===== FINAL STATS =====
     test_api("Final Stats", "GET", "/api/stats")
+    test_api("Recommendation Cache Stats", "GET", "/api/stats/recommendation-cache")
+    test_api("Student Cache Stats", "GET", "/api/stats/student-cache")
+    test_api("OCR Pool Stats", "GET", "/api/stats/ocr")
+    test_api("Extraction Cache Stats", "GET", "/api/stats/extraction-cache")
     
     print("\n" + "="*60)
     print("ALL TESTS COMPLETED!")
     print("="*60)
 
+
+def run_unit_tests():
+    """Run the assertion-based tests in tests/ (same as: python -m unittest discover tests)"""
+    print("\n" + "="*60)
+    print("UNIT TESTS")
+    print("="*60)
+    
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    suite = unittest.defaultTestLoader.discover(os.path.join(backend_dir, "tests"), top_level_dir=backend_dir)
+    return unittest.TextTestRunner(verbosity=2).run(suite).wasSuccessful()
+
 if __name__ == "__main__":
     main()
+    sys.exit(0 if run_unit_tests() else 1)
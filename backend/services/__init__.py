@@ -1,9 +1,13 @@
 # Services package
+import warnings
+
+from . import scholarship_recommendation_engine as _engine
 from .scholarship_recommendation_engine import (
     find_matching_scholarships,
     calculate_match_score,
+    score_matrix,
     get_scholarship_by_id,
-    SCHOLARSHIPS_DATABASE
+    get_scholarships
 )
 from .ocr_service import extract_text_from_file, extract_text_from_image, extract_text_from_pdf
 
@@ -13,9 +17,23 @@ from .ocr_service import extract_text_from_file, extract_text_from_image, extrac
 __all__ = [
     "find_matching_scholarships",
     "calculate_match_score",
+    "score_matrix",
     "get_scholarship_by_id",
+    "get_scholarships",
     "SCHOLARSHIPS_DATABASE",
     "extract_text_from_file",
     "extract_text_from_image",
     "extract_text_from_pdf"
 ]
+
+
+def __getattr__(name):
+    # Deprecated alias, resolved on each access so it follows catalogue reloads
+    if name == "SCHOLARSHIPS_DATABASE":
+        warnings.warn(
+            "services.SCHOLARSHIPS_DATABASE is deprecated; use get_scholarships()",
+            DeprecationWarning,
+            stacklevel=2
+        )
+        return _engine.SCHOLARSHIPS_DATABASE
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,125 @@
+"""
+Application Lifecycle Service
+Allowed application status transitions, applied through the storage layer's
+atomic compare-and-set so every change is validated and logged
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from models.types import ApplicationStatus
+from services.storage_service import StatusChange, StorageBackend
+
+PENDING = ApplicationStatus.PENDING.value
+VERIFIED = ApplicationStatus.VERIFIED.value
+APPROVED = ApplicationStatus.APPROVED.value
+REJECTED = ApplicationStatus.REJECTED.value
+WITHDRAWN = ApplicationStatus.WITHDRAWN.value
+
+# Status -> statuses it may move to (Approved, Rejected and Withdrawn are final)
+TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    PENDING: frozenset([VERIFIED, APPROVED, REJECTED, WITHDRAWN]),
+    VERIFIED: frozenset([APPROVED, REJECTED]),
+    APPROVED: frozenset(),
+    REJECTED: frozenset(),
+    WITHDRAWN: frozenset(),
+}
+
+
+def allowed_transitions(status: str) -> FrozenSet[str]:
+    """Statuses an application with the given status may move to"""
+    return TRANSITIONS.get(status, frozenset())
+
+
+def allowed_sources(status: str) -> FrozenSet[str]:
+    """Statuses from which an application may move to the given status"""
+    return frozenset(source for source, targets in TRANSITIONS.items() if status in targets)
+
+
+async def change_status(
+    storage: StorageBackend,
+    application_id: str,
+    status: str,
+    actor: Optional[str] = None,
+    reason: Optional[str] = None
+) -> Optional[StatusChange]:
+    """
+    Move an application to a new status if the transition is allowed
+
+    The current status is checked inside the storage write, so no separate
+    read is needed and concurrent changes cannot both apply.
+
+    Args:
+        storage: Storage backend
+        application_id: Application ID
+        status: Target status
+        actor: Who made the change (stored in the transition log)
+        reason: Optional note (stored in the transition log)
+
+    Returns:
+        StatusChange (applied=False with the current document if the
+        transition is not allowed), or None if the write failed
+    """
+    return await storage.set_application_status(
+        application_id,
+        expected=allowed_sources(status),
+        status=status,
+        updates={"updatedAt": datetime.utcnow().isoformat()},
+        log={"actor": actor, "reason": reason}
+    )
+
+
+async def change_status_bulk(
+    storage: StorageBackend,
+    application_ids: List[str],
+    status: str,
+    actor: Optional[str] = None,
+    reason: Optional[str] = None
+) -> Dict[str, StatusChange]:
+    """change_status for many applications, in batched writes"""
+    return await storage.set_application_status_bulk(
+        application_ids,
+        expected=allowed_sources(status),
+        status=status,
+        updates={"updatedAt": datetime.utcnow().isoformat()},
+        log={"actor": actor, "reason": reason}
+    )
+
+
+def review_cutoff(older_than_days: Optional[float]) -> Optional[str]:
+    """appliedAt bound for "older than N days" (ISO timestamps compare as strings)"""
+    if older_than_days is None:
+        return None
+    return (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+
+
+async def review_queue(
+    storage: StorageBackend,
+    status: str = PENDING,
+    scholarship_id: Optional[str] = None,
+    older_than_days: Optional[float] = None,
+    limit: int = 100,
+    start_after: Optional[Tuple[str, str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Oldest-first page of applications with a status, e.g. all Pending
+    applications for one scholarship that are older than N days
+
+    Args:
+        storage: Storage backend
+        status: Application status
+        scholarship_id: Only this scholarship
+        older_than_days: Only applications submitted more than this many days ago
+        limit: Page size
+        start_after: (appliedAt, id) of the last application of the previous page
+
+    Returns:
+        Applications ordered by appliedAt, then ID
+    """
+    return await storage.list_applications_by_age(
+        status,
+        scholarship_id=scholarship_id,
+        applied_before=review_cutoff(older_than_days),
+        limit=limit,
+        start_after=start_after
+    )
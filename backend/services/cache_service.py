@@ -0,0 +1,117 @@
+"""
+Cache Service for Student Scholarship Application
+Thread-safe LRU cache with per-entry TTL and hit/miss counters
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after ttl_seconds
+
+    Safe to share between FastAPI's threadpool workers. If sizeof is given,
+    the approximate memory held by the cached values is tracked as well.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl_seconds: Optional[float] = 300,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value (counts a hit or a miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                # Expired
+                del self._entries[key]
+                self.bytes -= size
+
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        size = self.sizeof(value) if self.sizeof else 0
+
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                self.bytes -= old[2]
+            self._entries[key] = (value, expires_at, size)
+            self._entries.move_to_end(key)
+            self.bytes += size
+
+            while len(self._entries) > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted[2]
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one entry. Returns True if it was cached"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self.bytes -= entry[2]
+            return True
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def configure(self, max_size: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+        """Change size/TTL limits; existing entries are dropped"""
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl_seconds is not None:
+                self.ttl_seconds = ttl_seconds or None
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        total = self.hits + self.misses
+        stats = {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": round(self.hits / total, 4) if total else 0.0
+        }
+        if self.sizeof:
+            stats["bytes"] = self.bytes
+        return stats
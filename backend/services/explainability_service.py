@@ -7,6 +7,8 @@ Shows exactly why a student is eligible or not eligible for each scholarship
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from services.scholarship_recommendation_engine import get_compiled_rules
+
 
 class EligibilityExplainer:
     """
@@ -86,16 +88,17 @@ def explain_eligibility(
         Comprehensive eligibility explanation
     """
     explainer = EligibilityExplainer()
-    rules = scholarship.get("rules", {})
+    compiled = get_compiled_rules(scholarship)
+    rules = compiled.rules
     
     # ==================== CATEGORY CHECK ====================
-    if "category" in rules:
+    if compiled.categories is not None:
         required_category = rules["category"]
         student_category = student.get("category")
+        passed = student_category in compiled.categories
         
         if isinstance(required_category, list):
             # Multiple categories allowed
-            passed = student_category in required_category
             if passed:
                 explainer.add_check(
                     criterion="Category",
@@ -118,7 +121,6 @@ def explain_eligibility(
                 )
         else:
             # Single category required
-            passed = student_category == required_category
             if passed:
                 explainer.add_check(
                     criterion="Category",
@@ -141,8 +143,8 @@ def explain_eligibility(
                 )
     
     # ==================== INCOME CHECK ====================
-    if "maxIncome" in rules:
-        max_income = rules["maxIncome"]
+    if compiled.max_income is not None:
+        max_income = compiled.max_income
         student_income = _parse_income(student.get("incomeLevel", "0"))
         
         passed = student_income <= max_income
@@ -174,8 +176,8 @@ def explain_eligibility(
             )
     
     # ==================== MARKS/PERCENTAGE CHECK ====================
-    if "minMarks" in rules:
-        min_marks = rules["minMarks"]
+    if compiled.min_marks is not None:
+        min_marks = compiled.min_marks
         student_marks = student.get("overallPercentage", 0)
         
         passed = student_marks >= min_marks
@@ -204,17 +206,15 @@ def explain_eligibility(
             )
     
     # ==================== EDUCATION LEVEL CHECK ====================
-    if "educationLevel" in rules:
+    if compiled.education_levels is not None or compiled.education_level is not None:
         required_levels = rules["educationLevel"]
         student_level = student.get("educationLevel", "Unknown")
+        student_level_lower = student_level.lower()
         
-        if isinstance(required_levels, list):
-            passed = student_level in required_levels or any(
-                level.lower() in student_level.lower() 
-                for level in required_levels
-            )
+        if compiled.education_levels is not None:
+            passed = any(level in student_level_lower for level in compiled.education_levels)
         else:
-            passed = student_level.lower() == required_levels.lower()
+            passed = student_level_lower == compiled.education_level
         
         if passed:
             explainer.add_check(
@@ -238,14 +238,10 @@ def explain_eligibility(
             )
     
     # ==================== GENDER CHECK ====================
-    if "gender" in rules:
+    if compiled.genders is not None:
         required_gender = rules["gender"]
         student_gender = student.get("gender")
-        
-        if isinstance(required_gender, list):
-            passed = student_gender in required_gender
-        else:
-            passed = student_gender == required_gender
+        passed = student_gender in compiled.genders
         
         if passed:
             explainer.add_check(
@@ -269,17 +265,18 @@ def explain_eligibility(
             )
     
     # ==================== REGION/STATE CHECK ====================
-    if "region" in rules or "state" in rules:
+    if compiled.regions is not None or compiled.region is not None:
         required_regions = rules.get("region") or rules.get("state")
         student_region = student.get("region", "Unknown")
+        student_region_lower = student_region.lower()
         
-        if isinstance(required_regions, list):
+        if compiled.regions is not None:
             passed = any(
-                r.lower() in student_region.lower() or student_region.lower() in r.lower()
-                for r in required_regions
+                r in student_region_lower or student_region_lower in r
+                for r in compiled.regions
             )
         else:
-            passed = required_regions.lower() in student_region.lower()
+            passed = compiled.region in student_region_lower
         
         if passed:
             explainer.add_check(
@@ -303,7 +300,7 @@ def explain_eligibility(
             )
     
     # ==================== FIRST GRADUATE CHECK ====================
-    if "firstGraduate" in rules and rules["firstGraduate"]:
+    if compiled.requires_first_graduate:
         is_first_grad = student.get("isFirstGraduate", False)
         
         if is_first_grad:
@@ -322,12 +319,12 @@ def explain_eligibility(
             )
     
     # ==================== AGE CHECK ====================
-    if "minAge" in rules or "maxAge" in rules:
+    if compiled.min_age is not None:
         student_age = student.get("age")
         
         if student_age:
-            min_age = rules.get("minAge", 0)
-            max_age = rules.get("maxAge", 100)
+            min_age = compiled.min_age
+            max_age = compiled.max_age
             
             passed = min_age <= student_age <= max_age
             
@@ -357,15 +354,15 @@ def explain_eligibility(
             explainer.add_warning("Age not provided - age requirement not verified")
     
     # ==================== SUBJECT/STREAM CHECK ====================
-    if "subjects" in rules or "streams" in rules:
+    if compiled.subjects is not None:
         required = rules.get("subjects") or rules.get("streams")
         student_marks = student.get("marks", [])
         student_subjects = [m.get("subject", "").lower() for m in student_marks if isinstance(m, dict)]
         
         if student_subjects:
             matched = any(
-                any(req.lower() in subj or subj in req.lower() for subj in student_subjects)
-                for req in required
+                any(req in subj or subj in req for subj in student_subjects)
+                for req in compiled.subjects
             )
             
             if matched:
@@ -0,0 +1,256 @@
+"""
+Extraction Cache Service
+Content-addressed on-disk cache for OCR text and AI-parsed marksheets, so
+re-uploading the same file skips Tesseract and the Gemini call
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Kinds of cached results
+KIND_OCR = "ocr"
+KIND_PROFILE = "profile"
+
+EXTRACTION_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_extraction_cache_lru ON extraction_cache (last_used);
+"""
+
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 of file contents"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    SQLite-backed LRU cache keyed by (kind, content hash, config version)
+
+    The version is any string describing the settings that produced the
+    value (OCR settings, model and prompt version); changing them changes the
+    key, so stale results are never returned and simply age out. Total stored
+    size is kept under max_bytes by evicting the least recently used entries.
+    The database is opened on first use. Errors are logged and treated as
+    misses, so the cache can never fail an upload.
+    """
+
+    def __init__(self, path: str = "extraction_cache.db", max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(kind: str, content_hash: str, version: str) -> str:
+        version_hash = hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+        return f"{kind}:{content_hash}:{version_hash}"
+
+    def _connect(self) -> sqlite3.Connection:
+        # Call with the lock held
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(EXTRACTION_CACHE_SCHEMA)
+            self.bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extraction_cache").fetchone()[0]
+            self._conn = conn
+            print(f"[OK] Extraction cache opened: {self.path} ({self.bytes} bytes)")
+        return self._conn
+
+    def get(self, kind: str, content_hash: str, version: str) -> Optional[Any]:
+        """Cached value, or None on a miss (marks the entry recently used)"""
+        if not self.enabled:
+            return None
+        key = self.make_key(kind, content_hash, version)
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT value FROM extraction_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE extraction_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.hits += 1
+                return json.loads(row[0])
+            except (sqlite3.Error, ValueError) as e:
+                print(f"[WARN] Extraction cache read failed: {e}")
+                self.misses += 1
+                return None
+
+    def set(self, kind: str, content_hash: str, version: str, value: Any) -> None:
+        """Store a JSON-serializable value, evicting old entries if over max_bytes"""
+        if not self.enabled:
+            return
+        key = self.make_key(kind, content_hash, version)
+        data = json.dumps(value)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    old = conn.execute("SELECT size FROM extraction_cache WHERE key = ?", (key,)).fetchone()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO extraction_cache (key, kind, content_hash, value, size, created_at, last_used) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, kind, content_hash, data, size, now, now)
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                self.bytes += size - (old[0] if old else 0)
+                self._evict(conn)
+            except sqlite3.Error as e:
+                print(f"[WARN] Extraction cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Call with the lock held
+        while self.bytes > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM extraction_cache ORDER BY last_used LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self.bytes = 0
+                return
+            for key, size in rows:
+                if self.bytes <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+                self.bytes -= size
+                self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        kind: str,
+        content_hash: str,
+        version: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Cached value, or the result of compute() (stored for next time)
+
+        Concurrent calls for the same key in this process share one compute().
+        Failures are not cached, nor are values rejected by cacheable.
+
+        Args:
+            kind: KIND_OCR or KIND_PROFILE
+            content_hash: hash_bytes / hash_file of the uploaded file
+            version: Settings that determine the result
+            compute: Coroutine function producing a JSON-serializable value
+            cacheable: Returns False for values that must not be stored
+                (e.g. fallback output); everything is stored when omitted
+
+        Returns:
+            (value, True if it was read from the cache; False if it was
+            computed, including by a concurrent call this one waited for)
+        """
+        if not self.enabled:
+            return await compute(), False
+
+        key = self.make_key(kind, content_hash, version)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            value, cached = await asyncio.shield(pending)
+            self.shared += 1
+            return value, cached
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            cached = await asyncio.to_thread(self.get, kind, content_hash, version)
+            if cached is not None:
+                future.set_result((cached, True))
+                return cached, True
+
+            value = await compute()
+            if cacheable is None or cacheable(value):
+                await asyncio.to_thread(self.set, kind, content_hash, version, value)
+            future.set_result((value, False))
+            return value, False
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            elif not future.done():
+                future.set_exception(e)
+                # Waiters re-raise it; nobody else needs to retrieve it
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio, size and eviction counters"""
+        total = self.hits + self.misses
+        stats = {
+            "enabled": self.enabled,
+            "path": self.path,
+            "bytes": self.bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / total, 4) if total else 0.0,
+            "sharedInflight": self.shared,
+            "evictions": self.evictions
+        }
+        with self._lock:
+            if self._conn is not None:
+                stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+        return stats
+
+    def clear(self) -> None:
+        """Remove every cached result"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._connect().execute("DELETE FROM extraction_cache")
+            self.bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Shared cache (EXTRACTION_CACHE_MAX_MB=0 disables it)
+extraction_cache = ExtractionCache(
+    path=os.environ.get("EXTRACTION_CACHE_PATH", "extraction_cache.db"),
+    max_bytes=int(float(os.environ.get("EXTRACTION_CACHE_MAX_MB", 256)) * 1024 * 1024)
+)
@@ -3,14 +3,20 @@ Firebase Service for Student Scholarship Application
 Handles all Firebase Firestore operations
 """
 
+import asyncio
 import os
-from typing import Optional, Dict, Any, List
+import threading
+from typing import Optional, Dict, Any, List, Iterator
 from datetime import datetime
 
+from services.application_lifecycle import change_status_bulk
+from services.storage_service import FirestoreStorage, StatusChange
+
 # Try importing firebase_admin
 try:
     import firebase_admin
     from firebase_admin import credentials, firestore
+    from google.cloud.firestore_v1.field_path import FieldPath
     FIREBASE_AVAILABLE = True
 except ImportError:
     FIREBASE_AVAILABLE = False
@@ -187,13 +193,14 @@ def delete_student(student_id: str) -> bool:
         return False
 
 
-def list_students(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+def list_students(limit: int = 100, offset: int = 0, start_after: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    List all students
+    List students in document-ID order
     
     Args:
         limit: Max results
-        offset: Skip results
+        offset: Skip results (billed as reads - prefer start_after)
+        start_after: Cursor - return students after this document ID
         
     Returns:
         List of student data dicts
@@ -203,7 +210,13 @@ def list_students(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         return []
     
     try:
-        docs = db.collection("students").limit(limit).stream()
+        collection = db.collection("students")
+        query = collection.order_by(FieldPath.document_id())
+        if start_after:
+            query = query.where(FieldPath.document_id(), ">", collection.document(start_after))
+        elif offset:
+            query = query.offset(offset)
+        docs = query.limit(limit).stream()
         students = []
         for doc in docs:
             data = doc.to_dict()
@@ -216,6 +229,83 @@ def list_students(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         return []
 
 
+def stream_students(start_after: Optional[str] = None, page_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    Stream every student in document-ID order, one page at a time
+    
+    Args:
+        start_after: Resume after this student ID (exclusive)
+        page_size: Documents fetched per round trip
+        
+    Yields:
+        Student data dicts (with "id")
+    """
+    db = get_firestore_client()
+    if db is None:
+        return
+    
+    collection = db.collection("students")
+    query = collection.order_by(FieldPath.document_id()).limit(page_size)
+    
+    if start_after:
+        last_doc = collection.document(start_after).get()
+        if last_doc.exists:
+            query = query.start_after(last_doc)
+        else:
+            query = query.where(FieldPath.document_id(), ">", collection.document(start_after))
+    
+    while True:
+        docs = list(query.stream())
+        for doc in docs:
+            data = doc.to_dict()
+            data["id"] = doc.id
+            yield data
+        
+        if len(docs) < page_size:
+            break
+        query = collection.order_by(FieldPath.document_id()).limit(page_size).start_after(docs[-1])
+
+
+# ==================== RECOMMENDATION OPERATIONS ====================
+
+def save_recommendations(results: Dict[str, List[Dict[str, Any]]]) -> bool:
+    """
+    Write precomputed recommendations for many students using batched writes
+    
+    Args:
+        results: Student ID -> list of MatchResult dicts
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    db = get_firestore_client()
+    if db is None:
+        return False
+    
+    try:
+        now = datetime.utcnow().isoformat()
+        items = list(results.items())
+        
+        # Firestore batches are limited to 500 writes
+        for i in range(0, len(items), 500):
+            batch = db.batch()
+            for student_id, recommendations in items[i:i + 500]:
+                doc_ref = db.collection("recommendations").document(student_id)
+                batch.set(doc_ref, {
+                    "studentId": student_id,
+                    "count": len(recommendations),
+                    "recommendations": recommendations,
+                    "generatedAt": now
+                })
+            batch.commit()
+        
+        print(f"[OK] Saved recommendations for {len(items)} students")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Error saving recommendations: {e}")
+        return False
+
+
 # ==================== APPLICATION OPERATIONS ====================
 
 def create_application(application_data: Dict[str, Any]) -> Optional[str]:
@@ -304,6 +394,164 @@ def delete_application(application_id: str) -> bool:
         return False
 
 
+# ==================== STORAGE-BACKED BULK OPERATIONS ====================
+# Sync entry points for scripts. They run the FirestoreStorage operations used
+# by the API, so the /api/stats counters and the application lifecycle stay
+# exact. A private event loop thread with its own async client keeps them off
+# the API's event loop.
+
+_storage: Optional[FirestoreStorage] = None
+_storage_loop: Optional[asyncio.AbstractEventLoop] = None
+_storage_lock = threading.Lock()
+
+
+def _get_storage() -> Optional[FirestoreStorage]:
+    """FirestoreStorage for the sync helpers (None if Firebase is not available)"""
+    global _storage, _storage_loop
+    
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if get_firestore_client() is None:
+                    return None
+                app = firebase_admin.get_app()
+                client = firestore.AsyncClient(credentials=app.credential.get_credential(), project=app.project_id)
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="firestore-sync", daemon=True).start()
+                _storage_loop = loop
+                _storage = FirestoreStorage(client=client)
+    return _storage
+
+
+def _run(coroutine):
+    """Run a storage coroutine on the helpers' event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coroutine, _storage_loop).result()
+
+
+def create_students_bulk(students: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """
+    Create many student documents in batched writes (counters included)
+    
+    Args:
+        students: Student profile dicts
+        
+    Returns:
+        Document IDs aligned with the input (None where the write failed)
+    """
+    storage = _get_storage()
+    if storage is None:
+        return [None] * len(students)
+    return _run(storage.create_students_bulk(students))
+
+
+def get_students_many(student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get many student documents in batched reads
+    
+    Args:
+        student_ids: Document IDs
+        
+    Returns:
+        Student ID -> student data for the documents that exist
+    """
+    storage = _get_storage()
+    if storage is None:
+        return {}
+    return _run(storage.get_students_many(student_ids))
+
+
+def update_applications_bulk(
+    application_ids: List[str],
+    status: str,
+    actor: Optional[str] = None,
+    reason: Optional[str] = None
+) -> Dict[str, Optional[StatusChange]]:
+    """
+    Move many applications to a status (application_lifecycle.change_status_bulk)
+    
+    Only allowed transitions are applied, and each one is written to the
+    application's transition log.
+    
+    Args:
+        application_ids: Application IDs
+        status: Target status
+        actor: Who made the change (stored in the transition log)
+        reason: Optional note (stored in the transition log)
+        
+    Returns:
+        Application ID -> StatusChange (None where the write failed)
+    """
+    storage = _get_storage()
+    if storage is None:
+        return {application_id: None for application_id in application_ids}
+    return _run(change_status_bulk(storage, application_ids, status, actor, reason))
+
+
+def update_student_if_exists(student_id: str, updates: Dict[str, Any]) -> Optional[bool]:
+    """
+    Update a student in one round trip, without a prior existence read
+    
+    Args:
+        student_id: Document ID
+        updates: Fields to update (None removes a field)
+        
+    Returns:
+        True if updated, False if the student does not exist, None on error
+    """
+    storage = _get_storage()
+    if storage is None:
+        return None
+    return _run(storage.update_student(student_id, updates))
+
+
+def delete_student_if_exists(student_id: str) -> Optional[bool]:
+    """
+    Delete a student in one round trip (counters included)
+    
+    Args:
+        student_id: Document ID
+        
+    Returns:
+        True if deleted, False if the student does not exist, None on error
+    """
+    storage = _get_storage()
+    if storage is None:
+        return None
+    return _run(storage.delete_student(student_id))
+
+
+def compare_and_set_application_status(
+    application_id: str,
+    expected: str,
+    status: str,
+    updates: Optional[Dict[str, Any]] = None,
+    actor: Optional[str] = None,
+    reason: Optional[str] = None
+) -> Optional[StatusChange]:
+    """
+    Change an application's status only if it is still `expected`
+    
+    The change is written to the transition log and the status counters.
+    
+    Args:
+        application_id: Document ID
+        expected: Status the application must currently have
+        status: New status
+        updates: Other fields to write with the status
+        actor: Who made the change (stored in the transition log)
+        reason: Optional note (stored in the transition log)
+        
+    Returns:
+        StatusChange, or None on error
+    """
+    storage = _get_storage()
+    if storage is None:
+        return None
+    return _run(storage.set_application_status(
+        application_id, expected, status, updates, {"actor": actor, "reason": reason}
+    ))
+
+
 # ==================== TEST FUNCTIONS ====================
 
 def test_firebase_write() -> Dict[str, Any]:
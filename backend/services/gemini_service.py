@@ -7,9 +7,10 @@ import os
 import json
 import httpx
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pathlib import Path
 from models.types import StudentProfile, SubjectMark
+from services.extraction_cache import extraction_cache, KIND_PROFILE
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -30,6 +31,14 @@ else:
 
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 
+# Bump when editing the prompts below (invalidates cached parse results)
+PROMPT_VERSION = 1
+
+
+def parser_signature(mode: str) -> str:
+    """Model and prompt behind a parse ("text" or "vision"), used to version cached results"""
+    return f"{GEMINI_API_URL}|{mode}|prompt-v{PROMPT_VERSION}"
+
 
 async def parse_marksheet_with_ai(ocr_text: str) -> StudentProfile:
     """
@@ -197,31 +206,64 @@ Return ONLY valid JSON, no other text."""
         raise
 
 
+async def parse_marksheet_cached(
+    content_hash: str,
+    ocr_text: Optional[str] = None,
+    image_path: Optional[str] = None,
+    ocr_version: str = "",
+    image_data: Optional[bytes] = None,
+    mime_type: Optional[str] = None
+) -> StudentProfile:
+    """
+    parse_marksheet_with_ai (given ocr_text) or the Gemini Vision parse (given
+    image_path or image_data), reusing the result for files with the same contents
+    
+    Args:
+        content_hash: Hash of the uploaded file contents
+        ocr_text: OCR text to parse
+        image_path: Image to analyze with Gemini Vision (when there is no usable OCR text)
+        ocr_version: ocr_config_signature the text was produced with
+        image_data: Image contents to analyze with Gemini Vision, instead of image_path
+        mime_type: MIME type of image_data
+        
+    Returns:
+        StudentProfile with extracted data
+    """
+    if ocr_text is not None:
+        version = f"{parser_signature('text')}|{ocr_version}"
+        parse = lambda: parse_marksheet_with_ai(ocr_text)
+    elif image_data is not None:
+        version = parser_signature("vision")
+        parse = lambda: parse_marksheet_image_bytes_with_vision(image_data, mime_type or "image/jpeg")
+    elif image_path is not None:
+        version = parser_signature("vision")
+        parse = lambda: parse_marksheet_image_with_vision(image_path)
+    else:
+        raise ValueError("ocr_text, image_data or image_path is required")
+    
+    async def compute() -> Dict[str, Any]:
+        return (await parse()).model_dump(by_alias=True)
+    
+    data, cached = await extraction_cache.get_or_compute(KIND_PROFILE, content_hash, version, compute)
+    if cached:
+        print("[OK] Using cached marksheet parse")
+    return StudentProfile(**data)
+
+
 def parse_marksheet_with_ai_sync(ocr_text: str) -> StudentProfile:
     """Synchronous wrapper for parse_marksheet_with_ai"""
     import asyncio
     return asyncio.run(parse_marksheet_with_ai(ocr_text))
 
 
-async def parse_marksheet_image_with_vision(image_path: str) -> StudentProfile:
-    """
-    Directly analyze a marksheet image using Gemini Vision API.
-    This is used when OCR is not available (Tesseract not installed).
-    """
-    import base64
+def guess_image_mime_type(filename: str) -> str:
+    """MIME type of an uploaded marksheet, from its file name"""
     import mimetypes
     
-    print(f"[INFO] Using Gemini Vision API to analyze image: {image_path}")
-    
-    # Read and encode the image
-    with open(image_path, "rb") as f:
-        image_data = base64.standard_b64encode(f.read()).decode("utf-8")
-    
-    # Determine MIME type
-    mime_type, _ = mimetypes.guess_type(image_path)
+    mime_type, _ = mimetypes.guess_type(filename)
     if mime_type is None:
         # Default based on extension
-        ext = image_path.lower().split('.')[-1]
+        ext = filename.lower().split('.')[-1]
         mime_map = {
             'jpg': 'image/jpeg',
             'jpeg': 'image/jpeg',
@@ -231,6 +273,37 @@ async def parse_marksheet_image_with_vision(image_path: str) -> StudentProfile:
             'pdf': 'application/pdf'
         }
         mime_type = mime_map.get(ext, 'image/jpeg')
+    return mime_type
+
+
+async def parse_marksheet_image_with_vision(image_path: str) -> StudentProfile:
+    """
+    Directly analyze a marksheet image using Gemini Vision API.
+    This is used when OCR is not available (Tesseract not installed).
+    """
+    print(f"[INFO] Using Gemini Vision API to analyze image: {image_path}")
+    
+    with open(image_path, "rb") as f:
+        data = f.read()
+    
+    return await parse_marksheet_image_bytes_with_vision(data, guess_image_mime_type(image_path))
+
+
+async def parse_marksheet_image_bytes_with_vision(data: bytes, mime_type: str) -> StudentProfile:
+    """
+    parse_marksheet_image_with_vision for an upload held in memory
+    
+    Args:
+        data: Image (or PDF) contents
+        mime_type: MIME type of the contents
+        
+    Returns:
+        StudentProfile with extracted data
+    """
+    import base64
+    
+    # Encode the image
+    image_data = base64.standard_b64encode(data).decode("utf-8")
     
     print(f"[INFO] Image MIME type: {mime_type}")
     
@@ -0,0 +1,254 @@
+"""
+OCR Executor Service
+Runs the blocking OCR work (image preprocessing, PDF rasterization and
+Tesseract) on a bounded process pool so async endpoints never block the event loop
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from services.extraction_cache import ExtractionCache, KIND_OCR, extraction_cache
+from services.ocr_service import extract_document, extract_document_from_bytes, is_complete_extraction, ocr_config_signature
+
+
+class OCRQueueFullError(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+    pass
+
+
+class OCRTimeoutError(Exception):
+    """Raised when an OCR job does not finish within the job timeout"""
+    pass
+
+
+def _init_worker() -> None:
+    """Worker initializer: pages and jobs already run in parallel, so one Tesseract (OpenMP) thread each"""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _ocr_job(file_path: str, preprocess: bool, timeout: float, page_workers: int) -> Dict[str, Any]:
+    """Worker: extract the text of a stored file (images are preprocessed in memory)"""
+    return extract_document(file_path, timeout=timeout, preprocess=preprocess, page_workers=page_workers)
+
+
+def _ocr_bytes_job(data: bytes, filename: str, preprocess: bool, timeout: float, page_workers: int) -> Dict[str, Any]:
+    """Worker: extract the text of an upload held in memory"""
+    return extract_document_from_bytes(data, filename, preprocess=preprocess, timeout=timeout, page_workers=page_workers)
+
+
+class OCRExecutor:
+    """
+    Process pool for OCR jobs with a queue-depth limit and per-job timeouts
+
+    At most workers + max_queue jobs are admitted at once; further submissions
+    fail fast with OCRQueueFullError instead of piling up. A timed-out job
+    keeps its slot until its worker actually finishes, so a stuck worker
+    reduces capacity rather than letting more jobs in than there are processes.
+
+    Each job processes up to page_workers PDF pages at a time; by default the
+    cores are split between the workers so the pool never runs more
+    pdftoppm/tesseract processes than there are cores.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 16,
+        timeout: float = 120,
+        cache: Optional[ExtractionCache] = None,
+        page_workers: Optional[int] = None
+    ):
+        self.workers = max(1, workers)
+        self.page_workers = page_workers or max(1, (os.cpu_count() or 1) // self.workers)
+        self.cache = cache
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created on first use; spawn because forking a process that already
+        # runs gRPC (Firestore) and watcher threads is not safe
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return self._pool
+
+    def _release(self, future: Future) -> None:
+        self.in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a picklable function in the pool and await its result
+
+        Raises:
+            OCRQueueFullError: if the pool and its queue are full
+            OCRTimeoutError: if the job exceeds the timeout
+        """
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise OCRQueueFullError(f"OCR queue full ({self.in_flight} jobs in progress)")
+
+        pool = self._get_pool()
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool
+            print("[WARN] OCR process pool broken - restarting it")
+            self._discard(pool)
+            pool = self._get_pool()
+            future = pool.submit(fn, *args)
+
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+
+        def release(done: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(self._release, done)
+            except RuntimeError:
+                # Loop already closed
+                self._release(done)
+
+        future.add_done_callback(release)
+
+        try:
+            # shield: a timeout gives up on the result without cancelling the
+            # job, which keeps its slot until the worker is really free
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout or None)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise OCRTimeoutError(f"OCR job did not finish within {self.timeout:g}s")
+        except BrokenProcessPool:
+            self.failed += 1
+            print("[WARN] OCR worker died - the pool will be restarted")
+            self._discard(pool)
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+
+        self.completed += 1
+        return result
+
+    async def _extract(
+        self,
+        job: Callable[..., Dict[str, Any]],
+        args: tuple,
+        preprocess: bool,
+        content_hash: Optional[str]
+    ) -> Dict[str, Any]:
+        # Tesseract is killed a little before the job times out, so a slow page
+        # ends the job cleanly instead of holding the worker
+        tesseract_timeout = max(1, self.timeout - 5) if self.timeout else 0
+
+        async def extract() -> Dict[str, Any]:
+            return await self.run(job, *args, preprocess, tesseract_timeout, self.page_workers)
+
+        # The first call asks the tesseract binary for its version (a blocking
+        # subprocess), so it never runs on the event loop
+        ocr_version = await asyncio.to_thread(ocr_config_signature, preprocess)
+
+        if content_hash is None or self.cache is None:
+            return {**await extract(), "cached": False, "ocrVersion": ocr_version}
+
+        # Placeholders (no Tesseract, or it failed or timed out) are not
+        # cached, so the next upload of the file is OCRed again
+        document, cached = await self.cache.get_or_compute(
+            KIND_OCR, content_hash, ocr_version, extract, cacheable=is_complete_extraction
+        )
+        return {**document, "cached": cached, "ocrVersion": ocr_version}
+
+    async def extract_document(
+        self,
+        file_path: str,
+        preprocess: bool = False,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract text from an image or PDF file in the pool
+
+        Args:
+            file_path: Path to the file (must be readable by the worker processes)
+            preprocess: Grayscale, contrast and sharpen images before OCR (the file is not modified)
+            content_hash: hash of the file contents; when given, a cached
+                result for the same contents is returned without OCR
+
+        Returns:
+            {"text", "pages", "cached", "ocrVersion"} (text and pages as
+            returned by ocr_service.extract_document, ocrVersion the
+            ocr_config_signature they were produced with)
+        """
+        return await self._extract(_ocr_job, (file_path,), preprocess, content_hash)
+
+    async def extract_document_from_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        preprocess: bool = False,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        extract_document for an upload held in memory (images never touch the disk)
+
+        Args:
+            data: File contents
+            filename: Original file name (its extension selects the file type)
+            preprocess: Grayscale, contrast and sharpen images before OCR
+            content_hash: hash_bytes(data), to use the extraction cache
+
+        Returns:
+            {"text", "pages", "cached", "ocrVersion"}
+        """
+        return await self._extract(_ocr_bytes_job, (data, filename), preprocess, content_hash)
+
+    async def extract_text(self, file_path: str, preprocess: bool = False, content_hash: Optional[str] = None) -> str:
+        """extract_document, returning only the text"""
+        return (await self.extract_document(file_path, preprocess, content_hash))["text"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, queue usage and job counters"""
+        return {
+            "workers": self.workers,
+            "pageWorkers": self.page_workers,
+            "maxQueue": self.max_queue,
+            "timeoutSeconds": self.timeout,
+            "inFlight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "timedOut": self.timed_out,
+            "rejected": self.rejected,
+            "started": self._pool is not None
+        }
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        # Only if no other job has replaced the broken pool already
+        if self._pool is pool:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (a new pool is started on the next job)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Shared executor, configured from the environment
+ocr_executor = OCRExecutor(
+    workers=int(os.environ.get("OCR_WORKERS") or min(4, os.cpu_count() or 1)),
+    max_queue=int(os.environ.get("OCR_MAX_QUEUE", 16)),
+    timeout=float(os.environ.get("OCR_JOB_TIMEOUT", 120)),
+    cache=extraction_cache,
+    page_workers=int(os.environ.get("OCR_PDF_PAGE_WORKERS") or 0) or None
+)
@@ -3,9 +3,17 @@ OCR Service for extracting text from images and PDFs
 Uses Tesseract OCR or falls back to basic extraction
 """
 
+import io
+import json
+import math
 import os
-from typing import Optional
-from PIL import Image
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 
 # Try importing pytesseract - it may not be available
 try:
@@ -29,7 +37,6 @@ try:
     
     if not tesseract_found:
         # Check if in PATH
-        import shutil
         if shutil.which("tesseract"):
             tesseract_found = True
             print("[OK] Tesseract found in PATH")
@@ -44,20 +51,160 @@ except ImportError:
 
 # Try importing pdf2image - it may not be available
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     PDF2IMAGE_AVAILABLE = True
 except ImportError:
     PDF2IMAGE_AVAILABLE = False
     print("[WARN] pdf2image not available - PDF processing limited")
 
+# Pages of one PDF rasterized and OCRed at the same time when called in this
+# process (pdftoppm and tesseract are separate processes, so threads use all
+# cores). The OCR process pool passes its own share of the cores instead.
+PDF_PAGE_WORKERS = int(os.environ.get("OCR_PDF_PAGE_WORKERS") or os.cpu_count() or 1)
 
-def extract_text_from_image(image_path: str) -> str:
+# pdftotext (poppler, installed alongside pdf2image's pdftoppm) reads the
+# embedded text layer of digitally generated PDFs without OCR
+PDFTOTEXT_PATH = shutil.which("pdftotext")
+PDFTOTEXT_AVAILABLE = PDFTOTEXT_PATH is not None
+if not PDFTOTEXT_AVAILABLE:
+    print("[WARN] pdftotext not found - every PDF page will be OCRed")
+
+# Letters/digits a page's text layer needs before OCR is skipped for it
+TEXT_LAYER_MIN_CHARS = int(os.environ.get("OCR_TEXT_LAYER_MIN_CHARS", 20))
+
+# How a page's text was obtained
+METHOD_TEXT_LAYER = "text_layer"
+METHOD_OCR = "ocr"
+METHOD_NONE = "none"
+
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif']
+
+# Longest side images are scaled down to before OCR: an A4 page at 300 DPI.
+# Phone photos are often larger, which makes Tesseract slower but not more accurate
+MAX_IMAGE_SIDE = int(os.environ.get("OCR_MAX_IMAGE_SIDE", 3508))
+
+# Bump when preprocessing or extraction logic changes (invalidates cached OCR results)
+OCR_PIPELINE_VERSION = 4
+
+
+@lru_cache(maxsize=1)
+def get_tesseract_version() -> Optional[str]:
+    """Installed Tesseract version (None if Tesseract is not available)"""
+    if not TESSERACT_AVAILABLE:
+        return None
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return None
+
+
+def ocr_config_signature(preprocess: bool, dpi: int = 300) -> str:
+    """Settings that determine extract_document's output, used to version cached results"""
+    return json.dumps({
+        "pipeline": OCR_PIPELINE_VERSION,
+        "tesseract": get_tesseract_version(),
+        "lang": "eng",
+        "dpi": dpi,
+        "preprocess": preprocess,
+        "maxImageSide": MAX_IMAGE_SIDE,
+        "pdf2image": PDF2IMAGE_AVAILABLE,
+        "textLayer": PDFTOTEXT_AVAILABLE,
+        "textLayerMinChars": TEXT_LAYER_MIN_CHARS
+    }, sort_keys=True)
+
+
+def load_image(data: bytes, max_side: int = MAX_IMAGE_SIDE, grayscale: bool = False) -> Image.Image:
+    """
+    Decode image bytes once, upright (EXIF orientation) and no larger than max_side
+    
+    JPEGs are decoded directly at a reduced scale (and in grayscale if
+    requested) instead of at full size and then shrunk.
+    
+    Args:
+        data: Encoded image (PNG, JPEG, ...)
+        max_side: Largest allowed width/height in pixels (0 = no limit)
+        grayscale: Decode straight to grayscale when the decoder supports it
+        
+    Returns:
+        Decoded PIL image
+    """
+    image = Image.open(io.BytesIO(data))
+    
+    if max_side and max(image.size) > max_side:
+        scale = max_side / max(image.size)
+        image.draft("L" if grayscale else image.mode, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    
+    image = ImageOps.exif_transpose(image)
+    
+    if max_side and max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    
+    return image
+
+
+def preprocess_pil_image(image: Image.Image) -> Image.Image:
+    """
+    Grayscale, contrast and sharpen an image for better OCR results
+    
+    Args:
+        image: Decoded image
+        
+    Returns:
+        Preprocessed image
+    """
+    # Convert to grayscale
+    image = image.convert('L')
+    
+    # Enhance contrast
+    enhancer = ImageEnhance.Contrast(image)
+    image = enhancer.enhance(2.0)
+    
+    # Sharpen
+    return image.filter(ImageFilter.SHARPEN)
+
+
+def _ocr_pil_image(image: Image.Image, name: str, timeout: float) -> Tuple[str, str]:
+    """extract_text_from_pil_image, also returning METHOD_OCR, or METHOD_NONE for the placeholder"""
+    if TESSERACT_AVAILABLE:
+        print("[INFO] Performing OCR with Tesseract...")
+        try:
+            text = pytesseract.image_to_string(image, lang='eng', timeout=timeout)
+            print(f"[OK] Extracted {len(text)} characters")
+            return text.strip(), METHOD_OCR
+        except Exception as e:
+            print(f"[WARN] Tesseract OCR failed: {e}")
+            # Fall through to AI-based extraction
+    
+    # Return image info for AI processing
+    print("[INFO] Using AI-based extraction (no Tesseract)")
+    width, height = image.size
+    return f"[IMAGE_FILE: {name}, size: {width}x{height}. Use AI vision for extraction.]", METHOD_NONE
+
+
+def extract_text_from_pil_image(image: Image.Image, name: str = "image", timeout: float = 0) -> str:
+    """
+    Extract text from a decoded image using Tesseract OCR
+    Falls back to returning placeholder if Tesseract is not available
+    
+    Args:
+        image: Decoded image
+        name: File name shown in the placeholder
+        timeout: Seconds before the Tesseract process is killed (0 = no limit)
+        
+    Returns:
+        Extracted text as string
+    """
+    return _ocr_pil_image(image, name, timeout)[0]
+
+
+def extract_text_from_image(image_path: str, timeout: float = 0) -> str:
     """
     Extract text from an image file using Tesseract OCR
     Falls back to returning placeholder if Tesseract is not available
     
     Args:
         image_path: Path to the image file
+        timeout: Seconds before the Tesseract process is killed (0 = no limit)
         
     Returns:
         Extracted text as string
@@ -65,122 +212,295 @@ def extract_text_from_image(image_path: str) -> str:
     try:
         print(f"[INFO] Opening image: {image_path}")
         image = Image.open(image_path)
-        
-        if TESSERACT_AVAILABLE:
-            print("[INFO] Performing OCR with Tesseract...")
-            try:
-                text = pytesseract.image_to_string(image, lang='eng')
-                print(f"[OK] Extracted {len(text)} characters")
-                return text.strip()
-            except Exception as e:
-                print(f"[WARN] Tesseract OCR failed: {e}")
-                # Fall through to AI-based extraction
-        
-        # Return image info for AI processing
-        print("[INFO] Using AI-based extraction (no Tesseract)")
-        width, height = image.size
-        return f"[IMAGE_FILE: {os.path.basename(image_path)}, size: {width}x{height}. Use AI vision for extraction.]"
+        return extract_text_from_pil_image(image, os.path.basename(image_path), timeout)
         
     except Exception as e:
         print(f"[ERROR] Error processing image: {e}")
         raise Exception(f"Image processing failed: {e}")
 
 
-def extract_text_from_pdf(pdf_path: str, dpi: int = 300) -> str:
+def get_pdf_page_count(pdf_path: str) -> int:
+    """Number of pages in a PDF (read with pdfinfo, nothing is rasterized)"""
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def extract_text_from_pdf_page(pdf_path: str, page_number: int, dpi: int = 300, timeout: float = 0) -> str:
     """
-    Extract text from a PDF file
+    Rasterize and OCR a single PDF page
+    
+    Only this page is converted, and its image is released as soon as its
+    text is produced.
     
     Args:
         pdf_path: Path to the PDF file
-        dpi: DPI for image conversion (higher = better quality but slower)
+        page_number: 1-based page number
+        dpi: DPI for image conversion
+        timeout: Seconds allowed for the Tesseract run (0 = no limit)
         
     Returns:
-        Extracted text from all pages
+        Text of the page
     """
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
     try:
-        if not PDF2IMAGE_AVAILABLE:
-            print("[WARN] pdf2image not available - returning placeholder for AI extraction")
-            return f"[PDF_FILE: {os.path.basename(pdf_path)}. Use AI vision for extraction.]"
-        
-        print(f"[INFO] Converting PDF to images: {pdf_path}")
-        
-        # Convert PDF to images
-        images = convert_from_path(pdf_path, dpi=dpi)
-        
-        print(f"[INFO] Processing {len(images)} pages...")
-        
-        all_text = []
-        for i, image in enumerate(images, 1):
-            print(f"[INFO] OCR on page {i}/{len(images)}...")
-            if TESSERACT_AVAILABLE:
-                page_text = pytesseract.image_to_string(image, lang='eng')
-            else:
-                page_text = f"[Page {i} - use AI vision for extraction]"
-            all_text.append(page_text)
-        
-        combined_text = "\n\n".join(all_text)
-        print(f"[OK] Extracted {len(combined_text)} characters from PDF")
+        if not images:
+            return ""
+        if TESSERACT_AVAILABLE:
+            return pytesseract.image_to_string(images[0], lang='eng', timeout=timeout)
+        return f"[Page {page_number} - use AI vision for extraction]"
+    finally:
+        for image in images:
+            image.close()
+
+
+def extract_pdf_text_layer(pdf_path: str, timeout: float = 0) -> List[str]:
+    """
+    Embedded text of every PDF page, from a single pdftotext run
+    
+    Args:
+        pdf_path: Path to the PDF file
+        timeout: Seconds before pdftotext is killed (0 = no limit)
         
-        return combined_text.strip()
+    Returns:
+        Text of each page in reading layout (empty for pages without a text layer)
+    """
+    result = subprocess.run(
+        [PDFTOTEXT_PATH, "-layout", "-enc", "UTF-8", pdf_path, "-"],
+        capture_output=True,
+        timeout=timeout or None,
+        check=True
+    )
+    # pdftotext ends every page with a form feed
+    pages = result.stdout.decode("utf-8", errors="replace").split("\f")
+    if pages and not pages[-1].strip():
+        pages.pop()
+    return pages
+
+
+def has_text_layer(text: str) -> bool:
+    """Whether extracted text is substantial enough to skip OCR"""
+    return sum(ch.isalnum() for ch in text) >= TEXT_LAYER_MIN_CHARS
+
+
+def ocr_pdf_page(pdf_path: str, page_number: int, dpi: int = 300, timeout: float = 0) -> Dict[str, Any]:
+    """
+    OCR a single PDF page
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_number: 1-based page number
+        dpi: DPI for image conversion
+        timeout: Seconds allowed for the Tesseract run (0 = no limit)
         
-    except Exception as e:
-        print(f"[ERROR] Error extracting text from PDF: {e}")
-        raise Exception(f"PDF OCR failed: {e}")
+    Returns:
+        {"page", "method", "text"} where method is ocr, or none without Tesseract
+    """
+    return {
+        "page": page_number,
+        "method": METHOD_OCR if TESSERACT_AVAILABLE else METHOD_NONE,
+        "text": extract_text_from_pdf_page(pdf_path, page_number, dpi, timeout)
+    }
 
 
-def extract_text_from_file(file_path: str) -> str:
+def extract_pages_from_pdf(
+    pdf_path: str,
+    dpi: int = 300,
+    timeout: float = 0,
+    page_workers: Optional[int] = None
+) -> List[Dict[str, Any]]:
     """
-    Extract text from image or PDF file
+    Text of every page of a PDF, with the method used for each page
+    
+    The text layer of the whole document is read with one pdftotext run;
+    only the pages without one are rasterized (one at a time) and OCRed.
+    OCR pages are processed concurrently, so at most page_workers page
+    images are held in memory at once.
     
     Args:
-        file_path: Path to the file
+        pdf_path: Path to the PDF file
+        dpi: DPI for image conversion (higher = better quality but slower)
+        timeout: Seconds allowed for the pdftotext run and each page's Tesseract run (0 = no limit)
+        page_workers: Pages processed at the same time (defaults to OCR_PDF_PAGE_WORKERS)
         
     Returns:
-        Extracted text
+        [{"page", "method", "text"}] in page order
     """
-    ext = os.path.splitext(file_path)[1].lower()
+    page_count = get_pdf_page_count(pdf_path)
+    
+    layer: List[str] = []
+    if PDFTOTEXT_AVAILABLE:
+        try:
+            layer = extract_pdf_text_layer(pdf_path, timeout)
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"[WARN] pdftotext failed, OCRing every page: {e}")
+    
+    pages: Dict[int, Dict[str, Any]] = {}
+    for page_number, text in enumerate(layer[:page_count], start=1):
+        if has_text_layer(text):
+            pages[page_number] = {"page": page_number, "method": METHOD_TEXT_LAYER, "text": text}
     
-    if ext == '.pdf':
-        return extract_text_from_pdf(file_path)
-    elif ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.webp', '.gif', '.webp', '.gif']:
-        return extract_text_from_image(file_path)
+    to_ocr = [page_number for page_number in range(1, page_count + 1) if page_number not in pages]
+    workers = max(1, min(len(to_ocr), page_workers or PDF_PAGE_WORKERS))
+    
+    print(f"[INFO] {pdf_path}: {len(pages)} of {page_count} pages have a text layer, OCRing {len(to_ocr)} ({workers} at a time)...")
+    
+    def extract_page(page_number: int) -> Dict[str, Any]:
+        return ocr_pdf_page(pdf_path, page_number, dpi, timeout)
+    
+    if workers == 1:
+        ocred = [extract_page(page_number) for page_number in to_ocr]
     else:
-        raise ValueError(f"Unsupported file type: {ext}")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            ocred = list(executor.map(extract_page, to_ocr))
+    
+    for page in ocred:
+        pages[page["page"]] = page
+    return [pages[page_number] for page_number in range(1, page_count + 1)]
 
 
-def preprocess_image(image_path: str, output_path: Optional[str] = None) -> str:
+def extract_text_from_pdf(pdf_path: str, dpi: int = 300, timeout: float = 0, page_workers: Optional[int] = None) -> str:
     """
-    Preprocess image for better OCR results
+    Extract text from a PDF file
     
     Args:
-        image_path: Path to input image
-        output_path: Optional path for output (if None, overwrites input)
+        pdf_path: Path to the PDF file
+        dpi: DPI for image conversion (higher = better quality but slower)
+        timeout: Seconds allowed for each page's Tesseract run (0 = no limit)
+        page_workers: Pages processed at the same time (defaults to OCR_PDF_PAGE_WORKERS)
         
     Returns:
-        Path to preprocessed image
+        Extracted text from all pages
     """
-    try:
-        from PIL import ImageEnhance, ImageFilter
+    return extract_document(pdf_path, timeout=timeout, dpi=dpi, page_workers=page_workers)["text"]
+
+
+def extract_document_from_bytes(
+    data: bytes,
+    filename: str,
+    preprocess: bool = False,
+    timeout: float = 0,
+    dpi: int = 300,
+    page_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    extract_document for an upload held in memory
+    
+    Images are decoded once, preprocessed and passed to Tesseract without
+    touching the disk. PDFs are written to a temporary file, since poppler
+    only reads files.
+    
+    Args:
+        data: File contents
+        filename: Original file name (its extension selects the file type)
+        preprocess: Grayscale, contrast and sharpen images before OCR
+        timeout: Seconds allowed for each pdftotext / Tesseract run (0 = no limit)
+        dpi: DPI for rasterizing PDF pages that need OCR
+        page_workers: PDF pages processed at the same time
         
-        image = Image.open(image_path)
+    Returns:
+        {"text": combined text, "pages": [{"page", "method", "characters"}]}
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    
+    if ext in IMAGE_EXTENSIONS:
+        try:
+            image = load_image(data, grayscale=preprocess)
+            if preprocess:
+                image = preprocess_pil_image(image)
+        except Exception as e:
+            print(f"[ERROR] Error processing image: {e}")
+            raise Exception(f"Image processing failed: {e}")
         
-        # Convert to grayscale
-        image = image.convert('L')
+        text, method = _ocr_pil_image(image, os.path.basename(filename), timeout)
+        return {"text": text, "pages": [{"page": 1, "method": method, "characters": len(text)}]}
+    if ext != '.pdf':
+        raise ValueError(f"Unsupported file type: {ext}")
+    
+    with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp_file:
+        tmp_file.write(data)
+    try:
+        return extract_document(tmp_file.name, timeout=timeout, dpi=dpi, page_workers=page_workers)
+    finally:
+        os.unlink(tmp_file.name)
+
+
+def extract_document(
+    file_path: str,
+    timeout: float = 0,
+    dpi: int = 300,
+    page_workers: Optional[int] = None,
+    preprocess: bool = False
+) -> Dict[str, Any]:
+    """
+    Extract text from an image or PDF file, reporting how each page was read
+    
+    Args:
+        file_path: Path to the file (left unchanged)
+        timeout: Seconds allowed for each pdftotext / Tesseract run (0 = no limit)
+        dpi: DPI for rasterizing PDF pages that need OCR
+        page_workers: PDF pages processed at the same time
+        preprocess: Grayscale, contrast and sharpen images before OCR
         
-        # Enhance contrast
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(2.0)
+    Returns:
+        {"text": combined text, "pages": [{"page", "method", "characters"}]}
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    
+    if ext in IMAGE_EXTENSIONS:
+        print(f"[INFO] Opening image: {file_path}")
+        with open(file_path, "rb") as f:
+            data = f.read()
+        return extract_document_from_bytes(data, file_path, preprocess=preprocess, timeout=timeout)
+    if ext != '.pdf':
+        raise ValueError(f"Unsupported file type: {ext}")
+    
+    try:
+        if not PDF2IMAGE_AVAILABLE:
+            print("[WARN] pdf2image not available - returning placeholder for AI extraction")
+            return {
+                "text": f"[PDF_FILE: {os.path.basename(file_path)}. Use AI vision for extraction.]",
+                "pages": []
+            }
         
-        # Sharpen
-        image = image.filter(ImageFilter.SHARPEN)
+        pages = extract_pages_from_pdf(file_path, dpi=dpi, timeout=timeout, page_workers=page_workers)
+        combined_text = "\n\n".join(page["text"] for page in pages).strip()
         
-        # Save
-        save_path = output_path or image_path
-        image.save(save_path)
+        text_layer_pages = sum(page["method"] == METHOD_TEXT_LAYER for page in pages)
+        print(f"[OK] Extracted {len(combined_text)} characters from PDF "
+              f"({text_layer_pages} of {len(pages)} pages from the text layer)")
         
-        print(f"[OK] Preprocessed image saved to: {save_path}")
-        return save_path
+        return {
+            "text": combined_text,
+            "pages": [
+                {"page": page["page"], "method": page["method"], "characters": len(page["text"])}
+                for page in pages
+            ]
+        }
         
     except Exception as e:
-        print(f"[WARN] Warning: Image preprocessing failed: {e}")
-        return image_path
+        print(f"[ERROR] Error extracting text from PDF: {e}")
+        raise Exception(f"PDF OCR failed: {e}")
+
+
+def is_complete_extraction(document: Dict[str, Any]) -> bool:
+    """
+    True if every page of an extract_document result was really read
+    
+    False for the placeholders returned when Tesseract or pdf2image is
+    missing, or Tesseract failed or timed out; those are not worth caching.
+    """
+    pages = document.get("pages")
+    return bool(pages) and all(page["method"] != METHOD_NONE for page in pages)
+
+
+def extract_text_from_file(file_path: str, timeout: float = 0) -> str:
+    """
+    Extract text from image or PDF file
+    
+    Args:
+        file_path: Path to the file
+        timeout: Seconds allowed for each Tesseract run (0 = no limit)
+        
+    Returns:
+        Extracted text
+    """
+    return extract_document(file_path, timeout=timeout)["text"]
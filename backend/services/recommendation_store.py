@@ -0,0 +1,273 @@
+"""
+Incremental Recommendation Store
+Keeps each student's scores for the scholarships they can match and, when the
+profile changes, re-scores only the scholarships whose rules read a changed field
+"""
+
+import heapq
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from models.types import StudentProfile, MatchResult
+from services.scholarship_recommendation_engine import (
+    EligibilityIndex,
+    StudentFacts,
+    build_match_results,
+    find_matching_scholarships,
+    get_eligibility_index,
+    score_compiled,
+    student_facts
+)
+
+
+class StoredScores(NamedTuple):
+    """Scores of one student against one catalogue snapshot"""
+    generation: int
+    facts: StudentFacts
+    positions: array       # unsigned ints, ascending index.scholarships positions
+    scores: array          # unsigned bytes, aligned with positions
+
+
+def _rank_key(pair: Tuple[int, int]) -> Tuple[int, int]:
+    # Best score first, ties in catalogue order
+    return pair[1], -pair[0]
+
+
+class RecommendationStore:
+    """
+    Sparse per-student score vectors, updated incrementally
+
+    Only scholarships scoring at least min_score are kept, and the initial
+    score visits only the candidates whose upper bound can reach it. The
+    store follows the eligibility index: when the catalogue is replaced
+    (a new index generation) every entry is dropped, so no incremental
+    re-score ever mixes old scores or bounds with the new catalogue.
+
+    The store lives in this process's memory (it is rebuilt on demand after a
+    restart) and is a bounded LRU: at most max_students entries and
+    max_scores stored scores in total, so idle students do not pin memory.
+    Scoring runs outside the lock; the lock only guards the entry table.
+    """
+
+    def __init__(self, max_students: int = 100000, max_scores: int = 10000000, min_score: float = 50):
+        self.max_students = max_students
+        self.max_scores = max_scores
+        self.min_score = min_score
+        self._entries: "OrderedDict[str, StoredScores]" = OrderedDict()
+        self._stored_scores = 0
+        self._generation = 0          # index generation the entries were computed for
+        self._lock = threading.Lock()
+        self.catalogue_resets = 0
+        self.full_scores = 0
+        self.incremental_updates = 0
+        self.unchanged_hits = 0
+        self.fallbacks = 0
+        self.evictions = 0
+        self.scholarships_rescored = 0
+        self.scholarships_skipped = 0
+
+    @staticmethod
+    def _pack(pairs: Iterable[Tuple[int, int]]) -> Tuple[array, array]:
+        positions = array("I")
+        scores = array("B")
+        for pos, score in pairs:
+            positions.append(pos)
+            scores.append(score)
+        return positions, scores
+
+    def _full_score(self, index: EligibilityIndex, student: StudentProfile, facts: StudentFacts) -> Tuple[array, array]:
+        """Score only the candidates whose upper bound reaches min_score"""
+        candidates = index.bounded_candidates(student, self.min_score)
+        pairs = []
+        for pos, _, _ in candidates:
+            score = score_compiled(facts, index.compiled[pos])
+            if score >= self.min_score:
+                pairs.append((pos, score))
+
+        self.full_scores += 1
+        self.scholarships_rescored += len(candidates)
+        self.scholarships_skipped += len(index) - len(candidates)
+        return self._pack(pairs)
+
+    def _rescore(
+        self,
+        index: EligibilityIndex,
+        entry: StoredScores,
+        student: StudentProfile,
+        facts: StudentFacts
+    ) -> Optional[Tuple[array, array]]:
+        """
+        Re-score only the rules touching changed fields
+
+        Returns:
+            New (positions, scores), or None when no scored field changed
+        """
+        changed = [field for field in StudentFacts._fields if getattr(entry.facts, field) != getattr(facts, field)]
+        if not changed:
+            self.unchanged_hits += 1
+            return None
+
+        affected = set()
+        for field in changed:
+            affected.update(index.by_dimension[field])
+
+        # Scholarships outside `affected` score exactly as before, so entries
+        # below min_score that were never stored stay below it
+        stored = dict(zip(entry.positions, entry.scores))
+        max_loss = 100 - self.min_score
+        lost = index.points_lost(student)
+        rescored = 0
+        for pos in affected:
+            if lost.get(pos, 0) > max_loss:
+                stored.pop(pos, None)
+                continue
+            score = score_compiled(facts, index.compiled[pos])
+            rescored += 1
+            if score >= self.min_score:
+                stored[pos] = score
+            else:
+                stored.pop(pos, None)
+
+        self.incremental_updates += 1
+        self.scholarships_rescored += rescored
+        self.scholarships_skipped += len(index) - rescored
+        return self._pack(sorted(stored.items()))
+
+    def _store(self, student_id: str, entry: StoredScores) -> None:
+        size = len(entry.positions)
+        if self.max_students <= 0 or size > self.max_scores:
+            return
+
+        with self._lock:
+            if entry.generation != self._generation:
+                # Scored against a catalogue that has been replaced meanwhile
+                return
+            old = self._entries.pop(student_id, None)
+            if old is not None:
+                self._stored_scores -= len(old.positions)
+            self._entries[student_id] = entry
+            self._stored_scores += size
+
+            while len(self._entries) > self.max_students or self._stored_scores > self.max_scores:
+                _, evicted = self._entries.popitem(last=False)
+                self._stored_scores -= len(evicted.positions)
+                self.evictions += 1
+
+    def scores_for(self, student_id: str, student: StudentProfile) -> Tuple[EligibilityIndex, StoredScores]:
+        """
+        Current stored scores of a student (computed, updated or reused as needed)
+
+        Concurrent calls for the same student may both score it; each entry is
+        consistent with the facts it stores, so the next call diffs against
+        whichever one was kept.
+
+        Args:
+            student_id: Student document ID
+            student: The student's current profile
+
+        Returns:
+            (index snapshot, scores of every scholarship reaching min_score)
+        """
+        index = get_eligibility_index()
+        facts = student_facts(student)
+
+        with self._lock:
+            if index.generation > self._generation:
+                # New catalogue: drop everything scored against the old one
+                self._entries.clear()
+                self._stored_scores = 0
+                self._generation = index.generation
+                self.catalogue_resets += 1
+            entry = self._entries.get(student_id)
+            if entry is not None:
+                self._entries.move_to_end(student_id)
+
+        if entry is not None and entry.generation == index.generation:
+            packed = self._rescore(index, entry, student, facts)
+            if packed is None:
+                return index, entry
+        else:
+            packed = self._full_score(index, student, facts)
+
+        entry = StoredScores(index.generation, facts, *packed)
+        self._store(student_id, entry)
+        return index, entry
+
+    def update(self, student_id: str, student: StudentProfile) -> None:
+        """Apply a profile update now, so the next recommendation call is a lookup"""
+        self.scores_for(student_id, student)
+
+    def recommend(
+        self,
+        student_id: str,
+        student: StudentProfile,
+        min_score: float = 50,
+        top_k: Optional[int] = None
+    ) -> List[MatchResult]:
+        """
+        Recommendations from the stored scores
+
+        Same ordering as find_matching_scholarships: best score first, ties in
+        catalogue order. A min_score below the store's floor is not covered by
+        the stored scores and goes through find_matching_scholarships.
+        """
+        if top_k is not None and top_k <= 0:
+            return []
+
+        if min_score < self.min_score:
+            self.fallbacks += 1
+            return find_matching_scholarships(student, min_score, top_k)
+
+        index, entry = self.scores_for(student_id, student)
+
+        pairs = ((pos, score) for pos, score in zip(entry.positions, entry.scores) if score >= min_score)
+        if top_k is not None:
+            ranked = heapq.nlargest(top_k, pairs, key=_rank_key)
+        else:
+            ranked = sorted(pairs, key=_rank_key, reverse=True)
+
+        return build_match_results(index, student, ranked)
+
+    def discard(self, student_id: str) -> bool:
+        """Forget a student's scores (e.g. after deletion)"""
+        with self._lock:
+            entry = self._entries.pop(student_id, None)
+            if entry is None:
+                return False
+            self._stored_scores -= len(entry.positions)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stored_scores = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Store size and how much work incremental updates saved"""
+        considered = self.scholarships_rescored + self.scholarships_skipped
+        return {
+            "students": len(self._entries),
+            "maxStudents": self.max_students,
+            "storedScores": self._stored_scores,
+            "maxScores": self.max_scores,
+            "minScore": self.min_score,
+            "evictions": self.evictions,
+            "catalogueResets": self.catalogue_resets,
+            "fullScores": self.full_scores,
+            "incrementalUpdates": self.incremental_updates,
+            "unchangedHits": self.unchanged_hits,
+            "fallbacks": self.fallbacks,
+            "scholarshipsRescored": self.scholarships_rescored,
+            "scholarshipsSkipped": self.scholarships_skipped,
+            "skipRatio": round(self.scholarships_skipped / considered, 4) if considered else 0.0
+        }
+
+
+recommendation_store = RecommendationStore(
+    max_students=int(os.environ.get("RECOMMENDATION_STORE_SIZE", 100000)),
+    max_scores=int(os.environ.get("RECOMMENDATION_STORE_MAX_SCORES", 10000000)),
+    min_score=float(os.environ.get("RECOMMENDATION_STORE_MIN_SCORE", 50))
+)
@@ -0,0 +1,324 @@
+"""
+Reverse Matching Service
+Finds the students eligible for one scholarship using secondary indexes over
+the student store, instead of running find_matching_scholarships per student
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from models.types import StudentProfile
+from services.rule_compiler import CompiledRules
+from services.scholarship_recommendation_engine import (
+    StudentFacts,
+    get_compiled_rules,
+    score_compiled,
+    student_facts
+)
+
+
+class RankedMatches(NamedTuple):
+    """Every match of one scholarship, sorted once per index version"""
+    version: int
+    rules: CompiledRules
+    keys: List[Tuple[int, str]]     # (-score, studentId), ascending
+
+
+class StudentIndex:
+    """
+    Secondary indexes over stored student profiles
+
+    Hash indexes on category, gender, region (lowercased) and parent occupation;
+    sorted (value, studentId) lists on normalized income and overall percentage.
+
+    The index lives in this process and is kept current by the student
+    endpoints of this process only. With max_age set it is rebuilt from the
+    store once it is older than that, so writes made by other processes show
+    up within max_age seconds.
+    """
+
+    def __init__(self, max_age: float = 0, cache_size: int = 64):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.max_age = max_age
+        self.cache_size = cache_size
+        self.version = 0
+        self._ranked: "OrderedDict[Tuple[Any, float], RankedMatches]" = OrderedDict()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.version += 1
+        self._ranked.clear()
+        self.facts: Dict[str, StudentFacts] = {}
+        self.regions: Dict[str, str] = {}
+        self.by_category: Dict[Any, Set[str]] = {}
+        self.by_gender: Dict[Any, Set[str]] = {}
+        self.by_region: Dict[str, Set[str]] = {}
+        self.by_parent_occupation: Dict[Any, Set[str]] = {}
+        self.by_income: List[Tuple[float, str]] = []
+        self.by_percentage: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.facts)
+
+    @staticmethod
+    def _add(index: Dict[Any, Set[str]], key: Any, student_id: str) -> None:
+        index.setdefault(key, set()).add(student_id)
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[str]], key: Any, student_id: str) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(student_id)
+            if not ids:
+                del index[key]
+
+    @staticmethod
+    def _remove_sorted(values: List[Tuple[float, str]], entry: Tuple[float, str]) -> None:
+        pos = bisect.bisect_left(values, entry)
+        if pos < len(values) and values[pos] == entry:
+            del values[pos]
+
+    def upsert(self, student_id: str, student: StudentProfile) -> None:
+        """Add or replace a student in every index"""
+        facts = student_facts(student)
+        region = (student.region or "").lower()
+
+        with self._lock:
+            self.remove(student_id)
+
+            self.version += 1
+            self.facts[student_id] = facts
+            self.regions[student_id] = region
+            self._add(self.by_category, facts.category, student_id)
+            self._add(self.by_gender, facts.gender, student_id)
+            self._add(self.by_region, region, student_id)
+            self._add(self.by_parent_occupation, facts.parent_occupation, student_id)
+            bisect.insort(self.by_income, (facts.income, student_id))
+            bisect.insort(self.by_percentage, (facts.percentage, student_id))
+
+    def remove(self, student_id: str) -> bool:
+        """Drop a student from every index. Returns True if it was indexed"""
+        with self._lock:
+            facts = self.facts.pop(student_id, None)
+            if facts is None:
+                return False
+
+            self.version += 1
+            region = self.regions.pop(student_id)
+            self._discard(self.by_category, facts.category, student_id)
+            self._discard(self.by_gender, facts.gender, student_id)
+            self._discard(self.by_region, region, student_id)
+            self._discard(self.by_parent_occupation, facts.parent_occupation, student_id)
+            self._remove_sorted(self.by_income, (facts.income, student_id))
+            self._remove_sorted(self.by_percentage, (facts.percentage, student_id))
+            return True
+
+    def load(self, students: Iterable[Dict[str, Any]]) -> int:
+        """
+        (Re)build the indexes from stored student documents
+
+        Args:
+            students: Student dicts with an "id" field (e.g. stream_students())
+
+        Returns:
+            Number of students indexed
+        """
+        with self._lock:
+            self._reset()
+            for student_data in students:
+                try:
+                    self.upsert(student_data["id"], StudentProfile(**student_data))
+                except Exception as e:
+                    print(f"[WARN] Not indexing student {student_data.get('id')}: {e}")
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+            return len(self.facts)
+
+    @property
+    def stale(self) -> bool:
+        """True before the first load, and once the index is older than max_age (0 = never)"""
+        if not self.loaded:
+            return True
+        return self.max_age > 0 and time.monotonic() - self.loaded_at > self.max_age
+
+    def ensure_loaded(self, loader: Callable[[], Iterable[Dict[str, Any]]]) -> None:
+        """Build the indexes from the given source on first use, and again once stale"""
+        if self.stale:
+            with self._lock:
+                if self.stale:
+                    count = self.load(loader())
+                    print(f"[OK] Student index built: {count} students")
+
+    # ==================== QUERIES ====================
+
+    def _union(self, index: Dict[Any, Set[str]], keys: Iterable[Any]) -> Set[str]:
+        ids: Set[str] = set()
+        for key in keys:
+            ids.update(index.get(key, ()))
+        return ids
+
+    def _range(self, values: List[Tuple[float, str]], low: Optional[float] = None, high: Optional[float] = None) -> Set[str]:
+        """IDs whose value is within [low, high]"""
+        start = 0 if low is None else bisect.bisect_left(values, (low, ""))
+        end = len(values) if high is None else bisect.bisect_right(values, (high, "\uffff"))
+        return {student_id for _, student_id in values[start:end]}
+
+    def _region_ids(self, rules: CompiledRules) -> Set[str]:
+        """Students passing the region/state rule (same matching as explain_eligibility)"""
+        if rules.regions is not None:
+            keys = [
+                region for region in self.by_region
+                if any(r in region or region in r for r in rules.regions)
+            ]
+        else:
+            keys = [region for region in self.by_region if rules.region in region]
+        return self._union(self.by_region, keys)
+
+    def candidates(self, rules: CompiledRules, min_score: float) -> Iterable[str]:
+        """
+        Students that can still reach min_score
+
+        A dimension whose lost points alone exceed 100 - min_score becomes a hard
+        filter, answered from its index; the rest is left to exact scoring.
+        The region rule is not scored, so it always filters.
+        """
+        max_loss = 100 - min_score
+        filters: List[Set[str]] = []
+
+        if rules.region is not None or rules.regions is not None:
+            filters.append(self._region_ids(rules))
+
+        # Category (30 points)
+        if rules.categories is not None and 30 > max_loss:
+            filters.append(self._union(self.by_category, rules.categories))
+
+        # Income (25 points, 15 when within 10% over the limit)
+        if rules.max_income is not None:
+            if 10 > max_loss:
+                filters.append(self._range(self.by_income, high=rules.max_income))
+            elif 25 > max_loss:
+                # income - max < income * 0.1  <=>  income < max / 0.9
+                filters.append(self._range(self.by_income, high=rules.max_income / 0.9))
+
+        # Marks (20 points, 10 when within 5 marks)
+        if rules.min_marks is not None:
+            if 10 > max_loss:
+                filters.append(self._range(self.by_percentage, low=rules.min_marks))
+            elif 20 > max_loss:
+                filters.append(self._range(self.by_percentage, low=rules.min_marks - 5))
+
+        # Gender (10 points)
+        if rules.genders is not None and 10 > max_loss:
+            filters.append(self._union(self.by_gender, rules.genders))
+
+        # Parent occupation (5 points)
+        if rules.parent_occupations is not None and 5 > max_loss:
+            filters.append(self._union(self.by_parent_occupation, rules.parent_occupations))
+
+        if not filters:
+            return list(self.facts)
+
+        filters.sort(key=len)
+        result = set(filters[0])
+        for ids in filters[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def match(
+        self,
+        scholarship: Dict[str, Any],
+        min_score: float = 50,
+        limit: int = 100,
+        after: Optional[Tuple[int, str]] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        One page of (studentId, score) for a scholarship, best score first
+
+        Args:
+            scholarship: Scholarship dict with "rules"
+            min_score: Minimum match score
+            limit: Page size
+            after: (score, studentId) of the last row of the previous page
+
+        Returns:
+            Up to `limit` (studentId, score) pairs ordered by score desc, then ID
+        """
+        keys = self._ranked_keys(scholarship, min_score)
+
+        # Seek past the cursor instead of re-scoring the earlier pages
+        start = 0 if after is None else bisect.bisect_right(keys, (-after[0], after[1]))
+        return [(student_id, -neg_score) for neg_score, student_id in keys[start:start + limit]]
+
+    def _ranked_keys(self, scholarship: Dict[str, Any], min_score: float) -> List[Tuple[int, str]]:
+        """Sorted (-score, studentId) of every match, scored once per index version"""
+        rules = get_compiled_rules(scholarship)
+        cache_key = (scholarship.get("id"), min_score)
+
+        with self._lock:
+            cached = self._ranked.get(cache_key)
+            if cached is not None and cached.version == self.version and cached.rules == rules:
+                self._ranked.move_to_end(cache_key)
+                return cached.keys
+
+            keys = []
+            for student_id in self.candidates(rules, min_score):
+                score = score_compiled(self.facts[student_id], rules)
+                if score >= min_score:
+                    keys.append((-score, student_id))
+            keys.sort()
+
+            if self.cache_size > 0:
+                self._ranked[cache_key] = RankedMatches(self.version, rules, keys)
+                self._ranked.move_to_end(cache_key)
+                while len(self._ranked) > self.cache_size:
+                    self._ranked.popitem(last=False)
+            return keys
+
+    def iter_matches(
+        self,
+        scholarship: Dict[str, Any],
+        min_score: float = 50,
+        page_size: int = 1000
+    ) -> Iterator[List[Tuple[str, int]]]:
+        """Stream every match page by page (e.g. for sending notifications)"""
+        after = None
+        while True:
+            page = self.match(scholarship, min_score, page_size, after)
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            student_id, score = page[-1]
+            after = (score, student_id)
+
+
+def encode_cursor(student_id: str, score: int) -> str:
+    """Opaque pagination cursor for the last row of a page"""
+    return f"{score}:{student_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    Parse a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    score, student_id = cursor.split(":", 1)
+    return int(score), student_id
+
+
+# Shared index (STUDENT_INDEX_MAX_AGE=0 never rebuilds it, for a single-process deployment)
+student_index = StudentIndex(
+    max_age=float(os.environ.get("STUDENT_INDEX_MAX_AGE", 300)),
+    cache_size=int(os.environ.get("STUDENT_INDEX_CACHE_SIZE", 64))
+)
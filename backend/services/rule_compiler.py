@@ -0,0 +1,89 @@
+"""
+Rule Compiler for Scholarship Eligibility
+Turns a scholarship's "rules" dict into an immutable predicate object once, so
+scoring and explanation only do set lookups and number comparisons per request
+"""
+
+from typing import Any, Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+
+class CompiledRules(NamedTuple):
+    """
+    Pre-parsed eligibility rules of one scholarship
+
+    None means the rule is absent (no restriction). Allowed-value lists are
+    frozensets; text matched by substring is pre-lowercased.
+    """
+    rules: Dict[str, Any]                          # original rules (for messages)
+    categories: Optional[FrozenSet[str]]
+    max_income: Optional[float]
+    min_income: Optional[float]
+    min_marks: Optional[float]
+    genders: Optional[FrozenSet[Any]]
+    is_first_graduate: Optional[bool]              # "isFirstGraduate" (scored)
+    requires_first_graduate: bool                  # "firstGraduate" (explained)
+    parent_occupations: Optional[FrozenSet[str]]
+    religions: Optional[FrozenSet[str]]
+    education_level: Optional[str]                 # single level, lowercased
+    education_levels: Optional[Tuple[str, ...]]    # list of levels, lowercased
+    region: Optional[str]                          # single region/state, lowercased
+    regions: Optional[Tuple[str, ...]]             # list of regions/states, lowercased
+    min_age: Optional[float]
+    max_age: Optional[float]
+    subjects: Optional[Tuple[str, ...]]            # subjects or streams, lowercased
+
+
+def _number(value: Any) -> Optional[float]:
+    """Keep ints/floats as given (messages print them), parse anything else"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return float(value)
+
+
+def _value_set(value: Any) -> FrozenSet[Any]:
+    return frozenset(value) if isinstance(value, list) else frozenset([value])
+
+
+def compile_rules(rules: Dict[str, Any]) -> CompiledRules:
+    """
+    Compile a scholarship rules dict
+
+    Args:
+        rules: Scholarship "rules" dict
+
+    Returns:
+        Immutable CompiledRules
+    """
+    education = rules.get("educationLevel")
+    region = rules.get("region") or rules.get("state") or ""
+    has_region = "region" in rules or "state" in rules
+    subjects = rules.get("subjects") or rules.get("streams") or []
+    has_subjects = "subjects" in rules or "streams" in rules
+    has_age = "minAge" in rules or "maxAge" in rules
+
+    return CompiledRules(
+        rules=rules,
+        categories=_value_set(rules["category"]) if "category" in rules else None,
+        max_income=_number(rules.get("maxIncome")),
+        min_income=_number(rules.get("minIncome")),
+        min_marks=_number(rules.get("minMarks")),
+        genders=_value_set(rules["gender"]) if "gender" in rules else None,
+        is_first_graduate=rules["isFirstGraduate"] if "isFirstGraduate" in rules else None,
+        requires_first_graduate=bool(rules.get("firstGraduate")),
+        parent_occupations=_value_set(rules["parentOccupations"]) if "parentOccupations" in rules else None,
+        religions=_value_set(rules["religions"]) if "religions" in rules else None,
+        education_level=education.lower() if isinstance(education, str) else None,
+        education_levels=tuple(level.lower() for level in education) if isinstance(education, list) else None,
+        region=region.lower() if has_region and not isinstance(region, list) else None,
+        regions=tuple(r.lower() for r in region) if has_region and isinstance(region, list) else None,
+        min_age=_number(rules.get("minAge", 0)) if has_age else None,
+        max_age=_number(rules.get("maxAge", 100)) if has_age else None,
+        subjects=tuple(s.lower() for s in subjects) if has_subjects else None,
+    )
+
+
+def compile_scholarship(scholarship: Dict[str, Any]) -> CompiledRules:
+    """Compile the rules of a scholarship dict"""
+    return compile_rules(scholarship.get("rules", {}))
@@ -0,0 +1,375 @@
+"""
+Scholarship Catalogue Service
+Loads the scholarship catalogue from JSON/JSONL/CSV/SQLite files, validates it
+and swaps it into the recommendation engine without a restart
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from models.types import Scholarship
+from services import scholarship_recommendation_engine as engine
+
+
+class CatalogueError(ValueError):
+    """Raised when a catalogue file cannot be loaded or fails validation"""
+
+
+# Allowed rule keys -> accepted value types
+RULE_SCHEMA = {
+    "category": (str, list),
+    "minIncome": (int, float),
+    "maxIncome": (int, float),
+    "minMarks": (int, float),
+    "educationLevel": (str, list),
+    "streams": (list,),
+    "subjects": (list,),
+    "gender": (str, list),
+    "region": (str, list),
+    "state": (str, list),
+    "isFirstGraduate": (bool,),
+    "firstGraduate": (bool,),
+    "parentOccupations": (list,),
+    "religions": (list,),
+    "minAge": (int, float),
+    "maxAge": (int, float),
+}
+
+SUPPORTED_EXTENSIONS = [".json", ".jsonl", ".ndjson", ".csv", ".db", ".sqlite", ".sqlite3"]
+
+
+# ==================== VALIDATION ====================
+
+def validate_rules(rules: Any) -> List[str]:
+    """
+    Check a rules dict against RULE_SCHEMA
+
+    Returns:
+        List of error messages (empty if valid)
+    """
+    if not isinstance(rules, dict):
+        return [f"rules must be an object, got {type(rules).__name__}"]
+
+    errors = []
+    for key, value in rules.items():
+        if key not in RULE_SCHEMA:
+            errors.append(f"unknown rule '{key}'")
+            continue
+
+        allowed = RULE_SCHEMA[key]
+        # bool is an int subclass - only accept it where bool is expected
+        if isinstance(value, bool) and bool not in allowed:
+            errors.append(f"rule '{key}' must be {'/'.join(t.__name__ for t in allowed)}")
+        elif not isinstance(value, allowed):
+            errors.append(f"rule '{key}' must be {'/'.join(t.__name__ for t in allowed)}")
+        elif isinstance(value, list) and not all(isinstance(v, str) for v in value):
+            errors.append(f"rule '{key}' must be a list of strings")
+
+    return errors
+
+
+def validate_scholarship(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate one scholarship against the Scholarship model and the rules schema
+
+    Returns:
+        Normalized scholarship dict (engine format, with "rules")
+
+    Raises:
+        CatalogueError: if the entry is invalid
+    """
+    if not isinstance(raw, dict):
+        raise CatalogueError(f"scholarship must be an object, got {type(raw).__name__}")
+
+    try:
+        model = Scholarship(**raw)
+    except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+        raise CatalogueError(f"scholarship '{raw.get('id', '?')}': {problems}")
+
+    rules = raw.get("rules", {})
+    errors = validate_rules(rules)
+    if errors:
+        raise CatalogueError(f"scholarship '{model.id}': {'; '.join(errors)}")
+
+    scholarship = model.model_dump(by_alias=True, exclude_none=True)
+    scholarship["rules"] = rules
+    return scholarship
+
+
+def validate_catalogue(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate a whole catalogue (all errors are reported together)
+
+    Raises:
+        CatalogueError: if any entry is invalid or IDs are duplicated
+    """
+    scholarships = []
+    errors = []
+    seen_ids = set()
+
+    for position, raw in enumerate(entries, 1):
+        try:
+            scholarship = validate_scholarship(raw)
+        except CatalogueError as e:
+            errors.append(f"#{position}: {e}")
+            continue
+
+        if scholarship["id"] in seen_ids:
+            errors.append(f"#{position}: duplicate scholarship id '{scholarship['id']}'")
+            continue
+
+        seen_ids.add(scholarship["id"])
+        scholarships.append(scholarship)
+
+    if errors:
+        shown = "\n".join(errors[:20])
+        more = f"\n... and {len(errors) - 20} more" if len(errors) > 20 else ""
+        raise CatalogueError(f"Catalogue validation failed ({len(errors)} errors):\n{shown}{more}")
+
+    return scholarships
+
+
+# ==================== LOADERS ====================
+
+def _parse_list_field(value: Any) -> List[str]:
+    """CSV/SQLite list column: JSON array or '|' separated values"""
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return value
+    value = str(value).strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [v.strip() for v in value.split("|") if v.strip()]
+
+
+def _parse_rules_field(value: Any) -> Any:
+    """CSV/SQLite rules column: JSON object"""
+    if value is None or value == "":
+        return {}
+    if isinstance(value, dict):
+        return value
+    return json.loads(value)
+
+
+def _from_flat_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a CSV/SQLite row into a scholarship dict"""
+    entry = {k: v for k, v in row.items() if k and v not in (None, "")}
+    entry["tags"] = _parse_list_field(row.get("tags"))
+    entry["rules"] = _parse_rules_field(row.get("rules"))
+    return entry
+
+
+def _load_json(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("scholarships")
+    if not isinstance(data, list):
+        raise CatalogueError("JSON catalogue must be a list or an object with a 'scholarships' list")
+    return data
+
+
+def _load_jsonl(path: str) -> List[Dict[str, Any]]:
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise CatalogueError(f"line {line_no}: invalid JSON ({e})")
+    return entries
+
+
+def _load_csv(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [_from_flat_row(row) for row in csv.DictReader(f)]
+
+
+def _load_sqlite(path: str) -> List[Dict[str, Any]]:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute("SELECT * FROM scholarships").fetchall()
+        return [_from_flat_row(dict(row)) for row in rows]
+    finally:
+        conn.close()
+
+
+def load_scholarships(path: str) -> List[Dict[str, Any]]:
+    """
+    Load and validate scholarships from a catalogue file
+
+    Supported formats:
+        .json           list of scholarships (or {"scholarships": [...]})
+        .jsonl/.ndjson  one scholarship per line
+        .csv            one row per scholarship; tags as JSON array or 'a|b|c', rules as JSON
+        .db/.sqlite     table "scholarships" with the same columns as the CSV
+
+    Raises:
+        CatalogueError: if the file cannot be read or fails validation
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    loaders = {
+        ".json": _load_json,
+        ".jsonl": _load_jsonl,
+        ".ndjson": _load_jsonl,
+        ".csv": _load_csv,
+        ".db": _load_sqlite,
+        ".sqlite": _load_sqlite,
+        ".sqlite3": _load_sqlite,
+    }
+    if ext not in loaders:
+        raise CatalogueError(f"Unsupported catalogue type: {ext}. Supported: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+    if not os.path.exists(path):
+        raise CatalogueError(f"Catalogue file not found: {path}")
+
+    try:
+        entries = loaders[ext](path)
+    except CatalogueError:
+        raise
+    except (OSError, ValueError, sqlite3.Error) as e:
+        raise CatalogueError(f"Failed to read catalogue {path}: {e}")
+
+    return validate_catalogue(entries)
+
+
+# ==================== RELOAD ====================
+
+_reload_lock = threading.Lock()
+_catalogue_info: Dict[str, Any] = {
+    "source": "builtin",
+    "version": 1,
+    "count": len(engine.SCHOLARSHIPS_DATABASE),
+    "loadedAt": datetime.utcnow().isoformat(),
+    "fileMtime": None,
+}
+
+
+def reload_catalogue(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a catalogue file and swap it in atomically
+
+    On any error the current catalogue stays active.
+
+    Args:
+        path: Catalogue file (defaults to SCHOLARSHIP_CATALOGUE_PATH or the last loaded file)
+
+    Returns:
+        Catalogue info (source, version, count, loadedAt)
+    """
+    path = path or os.environ.get("SCHOLARSHIP_CATALOGUE_PATH")
+    if not path and _catalogue_info["source"] != "builtin":
+        path = _catalogue_info["source"]
+    if not path:
+        raise CatalogueError("No catalogue path given and SCHOLARSHIP_CATALOGUE_PATH is not set")
+
+    # Serialize reloads; readers never take this lock
+    with _reload_lock:
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        scholarships = load_scholarships(path)
+        engine.install_scholarships(scholarships)
+
+        _catalogue_info.update({
+            "source": path,
+            "version": _catalogue_info["version"] + 1,
+            "count": len(scholarships),
+            "loadedAt": datetime.utcnow().isoformat(),
+            "fileMtime": mtime,
+        })
+
+    print(f"[OK] Scholarship catalogue v{_catalogue_info['version']} loaded: {len(scholarships)} scholarships from {path}")
+    return get_catalogue_info()
+
+
+def check_catalogue_path(path: str) -> str:
+    """
+    Validate a catalogue path supplied by a client
+
+    Only the configured SCHOLARSHIP_CATALOGUE_PATH, or a file inside
+    SCHOLARSHIP_CATALOGUE_DIR when that is set, may be loaded.
+
+    Returns:
+        The resolved path
+
+    Raises:
+        CatalogueError: if the path is outside the allowed locations
+    """
+    resolved = os.path.realpath(path)
+
+    configured = os.environ.get("SCHOLARSHIP_CATALOGUE_PATH")
+    if configured and resolved == os.path.realpath(configured):
+        return resolved
+
+    directory = os.environ.get("SCHOLARSHIP_CATALOGUE_DIR")
+    if directory:
+        directory = os.path.realpath(directory)
+        if os.path.commonpath([resolved, directory]) == directory:
+            return resolved
+
+    raise CatalogueError(
+        "Catalogue path must be SCHOLARSHIP_CATALOGUE_PATH or a file inside SCHOLARSHIP_CATALOGUE_DIR"
+    )
+
+
+def get_catalogue_info() -> Dict[str, Any]:
+    """Information about the active catalogue"""
+    return dict(_catalogue_info)
+
+
+class CatalogueWatcher(threading.Thread):
+    """Background thread that reloads the catalogue when its file changes"""
+
+    def __init__(self, path: str, interval: float = 30.0):
+        super().__init__(daemon=True, name="catalogue-watcher")
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                continue
+
+            if mtime != _catalogue_info.get("fileMtime"):
+                try:
+                    reload_catalogue(self.path)
+                except Exception as e:
+                    # Keep serving the previous catalogue and keep polling; retry on the next change
+                    with _reload_lock:
+                        _catalogue_info["fileMtime"] = mtime
+                    print(f"[ERROR] Catalogue reload failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_watcher: Optional[CatalogueWatcher] = None
+
+
+def start_catalogue_watcher(path: str, interval: float = 30.0) -> CatalogueWatcher:
+    """Start (or restart) watching a catalogue file for changes"""
+    global _watcher
+
+    if _watcher is not None:
+        _watcher.stop()
+
+    _watcher = CatalogueWatcher(path, interval)
+    _watcher.start()
+    print(f"[OK] Watching scholarship catalogue {path} every {interval}s")
+    return _watcher
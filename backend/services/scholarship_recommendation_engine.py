@@ -3,13 +3,28 @@ Scholarship Recommendation Engine
 Intelligent matching of students with scholarships based on eligibility rules
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple, NamedTuple
 from models.types import StudentProfile, MatchResult, Scholarship
+import bisect
+import heapq
+import itertools
+import os
 import re
 
+from services.cache_service import TTLCache
+from services.rule_compiler import CompiledRules, compile_scholarship
 
-# Define comprehensive scholarship database
-SCHOLARSHIPS_DATABASE = [
+# Try importing numpy - only needed for batch scoring (score_matrix)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Define comprehensive scholarship database (a tuple: replace it with
+# install_scholarships, never modify it in place)
+SCHOLARSHIPS_DATABASE = (
     # ============ SC/ST/OBC Scholarships ============
     {
         "id": "sc-post-matric",
@@ -252,7 +267,7 @@ SCHOLARSHIPS_DATABASE = [
             "educationLevel": ["10th", "12th", "Bachelor"]
         }
     }
-]
+)
 
 
 def parse_income_to_number(income_level: str) -> float:
@@ -269,74 +284,95 @@ def parse_income_to_number(income_level: str) -> float:
     return income_map.get(income_level, 300000)
 
 
-def calculate_match_score(student: StudentProfile, scholarship: Dict[str, Any]) -> float:
-    """Calculate match score for a student with a scholarship (0-100)"""
+def _student_income(student: StudentProfile) -> float:
+    """Income figure used for scoring (explicit annual income wins over the band)"""
+    return student.family_annual_income or parse_income_to_number(student.income_level)
+
+
+class StudentFacts(NamedTuple):
+    """The profile values scoring reads, extracted once per request"""
+    category: Any
+    income: float
+    percentage: float
+    gender: Any
+    is_first_graduate: Optional[bool]
+    parent_occupation: Optional[str]
+    religion: Optional[str]
+
+
+# StudentFacts field -> CompiledRules field that scores it
+RULE_DIMENSIONS = {
+    "category": "categories",
+    "income": "max_income",
+    "percentage": "min_marks",
+    "gender": "genders",
+    "is_first_graduate": "is_first_graduate",
+    "parent_occupation": "parent_occupations",
+    "religion": "religions",
+}
+
+
+def student_facts(student: StudentProfile) -> StudentFacts:
+    """Extract the scoring inputs from a student profile"""
+    return StudentFacts(
+        category=student.category or "General",
+        income=_student_income(student),
+        percentage=student.overall_percentage,
+        gender=student.gender,
+        is_first_graduate=student.is_first_graduate,
+        parent_occupation=student.parent_occupation,
+        religion=student.religion
+    )
+
+
+def score_compiled(facts: StudentFacts, rules: CompiledRules) -> int:
+    """Match score (0-100) of pre-extracted student facts against compiled rules"""
     score = 0
-    max_possible_score = 100
-    
-    rules = scholarship.get("rules", {})
     
     # Category matching (30 points)
-    if "category" in rules:
-        category_rules = rules["category"] if isinstance(rules["category"], list) else [rules["category"]]
-        if (student.category or "General") in category_rules:
-            score += 30
-    else:
-        score += 30  # No category restriction
+    if rules.categories is None or facts.category in rules.categories:
+        score += 30
     
     # Income matching (25 points)
-    if "maxIncome" in rules:
-        student_income = student.family_annual_income or parse_income_to_number(student.income_level)
-        if student_income <= rules["maxIncome"]:
-            score += 25
-        else:
-            # Partial points if slightly over
-            diff = student_income - rules["maxIncome"]
-            if diff < student_income * 0.1:
-                score += 15
-    else:
+    if rules.max_income is None:
         score += 25  # No income restriction
+    elif facts.income <= rules.max_income:
+        score += 25
+    elif facts.income - rules.max_income < facts.income * 0.1:
+        score += 15  # Partial points if slightly over
     
     # Marks matching (20 points)
-    if "minMarks" in rules:
-        if student.overall_percentage >= rules["minMarks"]:
-            score += 20
-        elif student.overall_percentage >= rules["minMarks"] - 5:
-            score += 10  # Close but not quite
-    else:
+    if rules.min_marks is None:
         score += 20  # No marks restriction
+    elif facts.percentage >= rules.min_marks:
+        score += 20
+    elif facts.percentage >= rules.min_marks - 5:
+        score += 10  # Close but not quite
     
     # Gender matching (10 points)
-    if "gender" in rules:
-        if student.gender == rules["gender"]:
-            score += 10
-    else:
+    if rules.genders is None or facts.gender in rules.genders:
         score += 10
     
     # First generation matching (5 points)
-    if "isFirstGraduate" in rules:
-        if student.is_first_graduate == rules["isFirstGraduate"]:
-            score += 5
-    else:
+    if rules.is_first_graduate is None or facts.is_first_graduate == rules.is_first_graduate:
         score += 5
     
     # Parent occupation matching (5 points)
-    if "parentOccupations" in rules:
-        if student.parent_occupation in rules["parentOccupations"]:
-            score += 5
-    else:
+    if rules.parent_occupations is None or facts.parent_occupation in rules.parent_occupations:
         score += 5
     
     # Religion matching (5 points)
-    if "religions" in rules:
-        if student.religion in rules["religions"]:
-            score += 5
-    else:
+    if rules.religions is None or facts.religion in rules.religions:
         score += 5
     
     return min(score, 100)
 
 
+def calculate_match_score(student: StudentProfile, scholarship: Dict[str, Any]) -> float:
+    """Calculate match score for a student with a scholarship (0-100)"""
+    return score_compiled(student_facts(student), get_compiled_rules(scholarship))
+
+
 def generate_autofill_statement(student: StudentProfile, scholarship: Dict[str, Any], match_score: float) -> str:
     """Generate personalized statement for scholarship application"""
     parts = []
@@ -364,68 +400,539 @@ def generate_autofill_statement(student: StudentProfile, scholarship: Dict[str,
     return " ".join(parts)
 
 
-def find_matching_scholarships(student: StudentProfile, min_score: float = 50) -> List[MatchResult]:
-    """Find all scholarships matching a student's profile"""
-    matches = []
+_index_generations = itertools.count(1)
+
+
+class EligibilityIndex:
+    """
+    Compiled eligibility index over the scholarship catalogue
+    
+    Scholarships are bucketed by the rule values that carry the most points
+    (category, income band, marks band and gender). At query time the buckets
+    give an upper bound on each scholarship's score, so only candidates that
+    can still reach min_score are passed to calculate_match_score.
+    """
+    
+    # Points lost on each indexed dimension when the rule is not met
+    CATEGORY_POINTS = 30
+    GENDER_POINTS = 10
     
-    for scholarship in SCHOLARSHIPS_DATABASE:
-        score = calculate_match_score(student, scholarship)
+    def __init__(self, scholarships: Sequence[Dict[str, Any]], catalogue_version: int = 0):
+        # Catalogue (and its version) this snapshot was built from (used to detect replacement)
+        self.catalogue = scholarships
+        self.catalogue_version = catalogue_version
+        self.scholarships = list(scholarships)
+        self.generation = next(_index_generations)
         
-        if score >= min_score:
-            reason_parts = []
-            
-            if score >= 90:
-                reason_parts.append("Excellent match!")
-            elif score >= 75:
-                reason_parts.append("Strong match!")
-            elif score >= 60:
-                reason_parts.append("Good match")
-            else:
-                reason_parts.append("Eligible")
-            
-            # Add specific reasons
-            rules = scholarship.get("rules", {})
-            
-            if "category" in rules:
-                cat_list = rules["category"] if isinstance(rules["category"], list) else [rules["category"]]
-                if (student.category or "General") in cat_list:
-                    reason_parts.append(f"matches {student.category} category")
-            
-            if "minMarks" in rules and student.overall_percentage >= rules["minMarks"]:
-                reason_parts.append(f"meets {rules['minMarks']}% marks requirement")
+        # Rules compiled once per snapshot, aligned with self.scholarships
+        self.compiled: List[CompiledRules] = [compile_scholarship(s) for s in self.scholarships]
+        
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.compiled_by_id: Dict[str, CompiledRules] = {}
+        for scholarship, compiled in zip(self.scholarships, self.compiled):
+            if scholarship["id"] not in self.by_id:
+                self.by_id[scholarship["id"]] = scholarship
+                self.compiled_by_id[scholarship["id"]] = compiled
+        
+        # StudentFacts field -> positions whose score depends on it
+        self.by_dimension: Dict[str, List[int]] = {
+            field: [pos for pos, rules in enumerate(self.compiled) if getattr(rules, rule_field) is not None]
+            for field, rule_field in RULE_DIMENSIONS.items()
+        }
+        
+        self._category_restricted: List[int] = []
+        self._category_allowed: Dict[str, set] = {}
+        self._income_bands: Dict[float, List[int]] = {}
+        self._marks_bands: Dict[float, List[int]] = {}
+        self._gender_buckets: Dict[frozenset, List[int]] = {}
+        
+        for pos, rules in enumerate(self.compiled):
+            if rules.categories is not None:
+                self._category_restricted.append(pos)
+                for value in rules.categories:
+                    self._category_allowed.setdefault(value, set()).add(pos)
             
-            if "maxIncome" in rules:
-                student_income = student.family_annual_income or parse_income_to_number(student.income_level)
-                if student_income <= rules["maxIncome"]:
-                    reason_parts.append(f"income under ₹{rules['maxIncome']:,}")
+            if rules.max_income is not None:
+                self._income_bands.setdefault(rules.max_income, []).append(pos)
             
-            reason = ". ".join(reason_parts) + "."
-            autofill = generate_autofill_statement(student, scholarship, score)
+            if rules.min_marks is not None:
+                self._marks_bands.setdefault(rules.min_marks, []).append(pos)
             
-            match = MatchResult(
-                id=scholarship["id"],
-                title=scholarship["title"],
-                provider=scholarship["provider"],
-                amount=scholarship["amount"],
-                deadline=scholarship["deadline"],
-                category=scholarship["category"],
-                criteria=scholarship["criteria"],
-                tags=scholarship["tags"],
-                match_score=score,
-                reason=reason,
-                autofill_statement=autofill
-            )
-            matches.append(match)
+            if rules.genders is not None:
+                self._gender_buckets.setdefault(rules.genders, []).append(pos)
+        
+        # Category -> restricted scholarships that do NOT accept it
+        self._category_excluded: Dict[str, List[int]] = {
+            value: [pos for pos in self._category_restricted if pos not in allowed]
+            for value, allowed in self._category_allowed.items()
+        }
+        
+        # Thresholds sorted so a query only visits the bands that cost points
+        self._income_thresholds = sorted(self._income_bands)
+        self._marks_thresholds = sorted(self._marks_bands, reverse=True)
+        
+        # Every percentage at which some marks rule changes its points
+        self._marks_cutoffs = sorted({m for m in self._marks_bands} | {m - 5 for m in self._marks_bands})
+    
+    def __len__(self) -> int:
+        return len(self.scholarships)
+    
+    def fingerprint(self, student: StudentProfile) -> Tuple:
+        """
+        Key made of exactly what calculate_match_score reads
+        
+        Income and percentage are reduced to their position among the catalogue
+        thresholds, so two students share a fingerprint only if every
+        scholarship scores them identically.
+        """
+        # Percentage: how many marks cutoffs it reaches
+        marks_bucket = bisect.bisect_right(self._marks_cutoffs, student.overall_percentage)
+        
+        # Income: thresholds it exceeds, and how many of those it exceeds by >= 10%
+        student_income = _student_income(student)
+        over = bisect.bisect_left(self._income_thresholds, student_income)
+        lo, hi = 0, over
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if student_income - self._income_thresholds[mid] < student_income * 0.1:
+                hi = mid
+            else:
+                lo = mid + 1
+        
+        return (
+            student.category or "General",
+            over,
+            lo,
+            marks_bucket,
+            student.gender,
+            student.is_first_graduate,
+            student.parent_occupation,
+            student.religion
+        )
+    
+    def points_lost(self, student: StudentProfile) -> Dict[int, int]:
+        """Lower bound on points lost per scholarship (only non-zero entries)"""
+        lost: Dict[int, int] = {}
+        
+        # Category (30 points)
+        category = student.category or "General"
+        excluded = self._category_excluded.get(category, self._category_restricted)
+        for pos in excluded:
+            lost[pos] = lost.get(pos, 0) + self.CATEGORY_POINTS
+        
+        # Income (25 points, 15 when slightly over)
+        student_income = _student_income(student)
+        for max_income in self._income_thresholds:
+            if student_income <= max_income:
+                break
+            diff = student_income - max_income
+            penalty = 10 if diff < student_income * 0.1 else 25
+            for pos in self._income_bands[max_income]:
+                lost[pos] = lost.get(pos, 0) + penalty
+        
+        # Marks (20 points, 10 when within 5%)
+        percentage = student.overall_percentage
+        for min_marks in self._marks_thresholds:
+            if percentage >= min_marks:
+                break
+            penalty = 10 if percentage >= min_marks - 5 else 20
+            for pos in self._marks_bands[min_marks]:
+                lost[pos] = lost.get(pos, 0) + penalty
+        
+        # Gender (10 points)
+        for genders, positions in self._gender_buckets.items():
+            if student.gender not in genders:
+                for pos in positions:
+                    lost[pos] = lost.get(pos, 0) + self.GENDER_POINTS
+        
+        return lost
+    
+    def candidates(self, student: StudentProfile, min_score: float = 0) -> List[Dict[str, Any]]:
+        """Scholarships (in catalogue order) whose best possible score reaches min_score"""
+        if min_score <= 0:
+            return self.scholarships
+        
+        return [scholarship for _, scholarship, _ in self.bounded_candidates(student, min_score)]
+    
+    def bounded_candidates(self, student: StudentProfile, min_score: float = 0) -> List[Tuple[int, Dict[str, Any], int]]:
+        """(position, scholarship, score upper bound) for every candidate that can reach min_score"""
+        max_loss = 100 - min_score
+        lost = self.points_lost(student)
+        
+        return [
+            (pos, scholarship, 100 - lost.get(pos, 0))
+            for pos, scholarship in enumerate(self.scholarships)
+            if lost.get(pos, 0) <= max_loss
+        ]
+
+
+# Current catalogue snapshot. Replaced as a whole (never mutated), so a request
+# that already holds it keeps a consistent view while a new catalogue is installed.
+_eligibility_index: Optional[EligibilityIndex] = None
+
+# Bumped by install_scholarships; an index built for an older version is rebuilt
+_catalogue_version = 1
+
+
+# Ranked (scholarship, score) lists keyed by index generation + profile fingerprint
+_score_cache = TTLCache(
+    max_size=int(os.environ.get("RECOMMENDATION_CACHE_SIZE", 10000)),
+    ttl_seconds=float(os.environ.get("RECOMMENDATION_CACHE_TTL", 3600))
+)
+
+
+def rebuild_eligibility_index() -> EligibilityIndex:
+    """Rebuild the eligibility index from the current SCHOLARSHIPS_DATABASE"""
+    global _eligibility_index
+    
+    # Version first: install_scholarships rebinds the list before bumping it
+    version = _catalogue_version
+    index = EligibilityIndex(SCHOLARSHIPS_DATABASE, version)
+    _eligibility_index = index
+    _score_cache.clear()
+    return index
+
+
+def install_scholarships(scholarships: List[Dict[str, Any]]) -> EligibilityIndex:
+    """
+    Atomically replace the scholarship catalogue
+    
+    The index is built before anything is swapped, and in-flight requests keep
+    using the snapshot they already hold.
+    """
+    global SCHOLARSHIPS_DATABASE, _eligibility_index, _catalogue_version
+    
+    catalogue = tuple(scholarships)
+    version = _catalogue_version + 1
+    index = EligibilityIndex(catalogue, version)
+    
+    # Rebind the list before bumping the version: a reader that sees the new
+    # version with the old index just rebuilds from the new list
+    SCHOLARSHIPS_DATABASE = catalogue
+    _catalogue_version = version
+    _eligibility_index = index
+    _score_cache.clear()
+    return index
+
+
+def configure_recommendation_cache(max_size: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+    """Resize the recommendation score cache (0 disables it) or change its TTL"""
+    _score_cache.configure(max_size=max_size, ttl_seconds=ttl_seconds)
+
+
+def get_recommendation_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the recommendation score cache"""
+    return _score_cache.stats()
+
+
+def get_eligibility_index() -> EligibilityIndex:
+    """
+    Get the eligibility index, rebuilding it if the catalogue was replaced
+    
+    install_scholarships bumps the catalogue version; SCHOLARSHIPS_DATABASE
+    rebound directly (e.g. by older scripts) is caught by the identity check.
+    """
+    index = _eligibility_index
+    
+    if (index is None or index.catalogue_version != _catalogue_version
+            or index.catalogue is not SCHOLARSHIPS_DATABASE):
+        return rebuild_eligibility_index()
+    return index
+
+
+def get_compiled_rules(scholarship: Dict[str, Any]) -> CompiledRules:
+    """Compiled rules of a scholarship (precompiled for catalogue entries, compiled on the fly otherwise)"""
+    index = get_eligibility_index()
+    scholarship_id = scholarship.get("id")
+    
+    if index.by_id.get(scholarship_id) is scholarship:
+        return index.compiled_by_id[scholarship_id]
+    return compile_scholarship(scholarship)
+
+
+def get_scholarships() -> List[Dict[str, Any]]:
+    """Current catalogue snapshot (treat as read-only)"""
+    return get_eligibility_index().scholarships
+
+
+def _build_match_result(
+    student: StudentProfile,
+    scholarship: Dict[str, Any],
+    score: float,
+    rules: Optional[CompiledRules] = None
+) -> MatchResult:
+    """Build the MatchResult (reason text + autofill statement) for a scored scholarship"""
+    reason_parts = []
+    
+    if score >= 90:
+        reason_parts.append("Excellent match!")
+    elif score >= 75:
+        reason_parts.append("Strong match!")
+    elif score >= 60:
+        reason_parts.append("Good match")
+    else:
+        reason_parts.append("Eligible")
+    
+    # Add specific reasons
+    if rules is None:
+        rules = get_compiled_rules(scholarship)
+    
+    if rules.categories is not None and (student.category or "General") in rules.categories:
+        reason_parts.append(f"matches {student.category} category")
+    
+    if rules.min_marks is not None and student.overall_percentage >= rules.min_marks:
+        reason_parts.append(f"meets {rules.min_marks}% marks requirement")
+    
+    if rules.max_income is not None and _student_income(student) <= rules.max_income:
+        reason_parts.append(f"income under ₹{rules.max_income:,}")
+    
+    reason = ". ".join(reason_parts) + "."
+    autofill = generate_autofill_statement(student, scholarship, score)
+    
+    return MatchResult(
+        id=scholarship["id"],
+        title=scholarship["title"],
+        provider=scholarship["provider"],
+        amount=scholarship["amount"],
+        deadline=scholarship["deadline"],
+        category=scholarship["category"],
+        criteria=scholarship["criteria"],
+        tags=scholarship["tags"],
+        match_score=score,
+        reason=reason,
+        autofill_statement=autofill
+    )
+
+
+def _select_top_k(index: EligibilityIndex, student: StudentProfile, min_score: float, top_k: int) -> List[Tuple[int, float]]:
+    """
+    Pick the top_k (position, score) pairs with a bounded min-heap
+    
+    Ties keep catalogue order, same as the stable sort in the full scan.
+    Candidates whose upper bound cannot beat the current K-th best are skipped
+    without being scored.
+    """
+    facts = student_facts(student)
+    
+    # Heap entries: (score, -position); root is the current worst survivor
+    heap: List[Tuple[float, int]] = []
+    
+    for pos, _, upper_bound in index.bounded_candidates(student, min_score):
+        if len(heap) == top_k:
+            # A later scholarship only displaces the root with a strictly higher score
+            if upper_bound <= heap[0][0]:
+                if heap[0][0] >= 100:
+                    break  # K perfect matches already - nothing can beat them
+                continue
+        
+        score = score_compiled(facts, index.compiled[pos])
+        if score < min_score:
+            continue
+        
+        entry = (score, -pos)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+    
+    heap.sort(key=lambda e: (-e[0], -e[1]))
+    return [(-neg_pos, score) for score, neg_pos in heap]
+
+
+def _rank_all(index: EligibilityIndex, student: StudentProfile, min_score: float) -> List[Tuple[int, float]]:
+    """Every (position, score) reaching min_score, best first"""
+    facts = student_facts(student)
+    ranked = []
+    
+    # Only score scholarships the index says can still reach min_score
+    for pos, _, _ in index.bounded_candidates(student, min_score):
+        score = score_compiled(facts, index.compiled[pos])
+        
+        if score >= min_score:
+            ranked.append((pos, score))
     
     # Sort by match score descending
-    matches.sort(key=lambda x: x.match_score, reverse=True)
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    
+    return ranked
+
+
+def find_matching_scholarships(
+    student: StudentProfile,
+    min_score: float = 50,
+    top_k: Optional[int] = None
+) -> List[MatchResult]:
+    """
+    Find all scholarships matching a student's profile
+    
+    With top_k set, only the K best matches are kept (selected on the numeric
+    score) and the reason/autofill text is built for those K only.
+    
+    The numeric ranking is cached per profile fingerprint; the reason and
+    autofill text are always rendered for this student.
+    """
+    if top_k is not None and top_k <= 0:
+        return []
+    
+    index = get_eligibility_index()
+    cache_key = (index.generation, index.fingerprint(student), min_score, top_k)
+    ranked = _score_cache.get(cache_key)
+    
+    if ranked is None:
+        if top_k is not None:
+            ranked = _select_top_k(index, student, min_score, top_k)
+        else:
+            ranked = _rank_all(index, student, min_score)
+        _score_cache.set(cache_key, ranked)
+    
+    return build_match_results(index, student, ranked)
+
+
+def build_match_results(index: EligibilityIndex, student: StudentProfile, ranked: List[Tuple[int, float]]) -> List[MatchResult]:
+    """Render MatchResults for ranked (position, score) pairs of an index snapshot"""
+    return [
+        _build_match_result(student, index.scholarships[pos], score, index.compiled[pos])
+        for pos, score in ranked
+    ]
+
+
+def _encode_value(vocab: Dict[Any, int], value: Any) -> int:
+    """Vocabulary code for a rule/profile value (-2 for unhashable values, which never match)"""
+    try:
+        return vocab.setdefault(value, len(vocab))
+    except TypeError:
+        return -2
+
+
+def score_matrix(students: List[StudentProfile], scholarships: Optional[List[Dict[str, Any]]] = None):
+    """
+    Score many students against many scholarships in one vectorized pass
+    
+    Equivalent to calling calculate_match_score for every (student, scholarship)
+    pair, with the same 30/25/20/10/5/5/5 weighting.
+    
+    Args:
+        students: Student profiles (rows)
+        scholarships: Scholarships to score against (columns), defaults to the current catalogue
+        
+    Returns:
+        numpy uint8 array of shape (len(students), len(scholarships))
+        
+    The result holds one byte per pair, so re-score very large student bases
+    in chunks of students.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("numpy is required for score_matrix. Run: pip install numpy")
+    
+    if scholarships is None:
+        index = get_eligibility_index()
+        scholarships, compiled = index.scholarships, index.compiled
+    else:
+        compiled = [get_compiled_rules(s) for s in scholarships]
+    
+    n_students, n_scholarships = len(students), len(scholarships)
+    
+    # ---------- Encode scholarship rules ----------
+    max_income = np.full(n_scholarships, np.nan)
+    min_marks = np.full(n_scholarships, np.nan)
+    
+    # Equality rule: -1 = no restriction, otherwise vocabulary code
+    first_gen_vocab: Dict[Any, int] = {}
+    first_gen_rule = np.full(n_scholarships, -1, dtype=np.int32)
+    
+    # Membership rules: per-scholarship list of allowed vocabulary codes
+    category_vocab: Dict[Any, int] = {}
+    gender_vocab: Dict[Any, int] = {}
+    occupation_vocab: Dict[Any, int] = {}
+    religion_vocab: Dict[Any, int] = {}
+    category_allowed: Dict[int, List[int]] = {}
+    gender_allowed: Dict[int, List[int]] = {}
+    occupation_allowed: Dict[int, List[int]] = {}
+    religion_allowed: Dict[int, List[int]] = {}
+    
+    for j, rules in enumerate(compiled):
+        if rules.max_income is not None:
+            max_income[j] = rules.max_income
+        if rules.min_marks is not None:
+            min_marks[j] = rules.min_marks
+        if rules.is_first_graduate is not None:
+            first_gen_rule[j] = _encode_value(first_gen_vocab, rules.is_first_graduate)
+        if rules.categories is not None:
+            category_allowed[j] = [_encode_value(category_vocab, v) for v in rules.categories]
+        if rules.genders is not None:
+            gender_allowed[j] = [_encode_value(gender_vocab, v) for v in rules.genders]
+        if rules.parent_occupations is not None:
+            occupation_allowed[j] = [_encode_value(occupation_vocab, v) for v in rules.parent_occupations]
+        if rules.religions is not None:
+            religion_allowed[j] = [_encode_value(religion_vocab, v) for v in rules.religions]
+    
+    def allowed_mask(allowed: Dict[int, List[int]], vocab: Dict[Any, int]):
+        """(vocab, scholarships) boolean mask; unrestricted columns are all True"""
+        mask = np.ones((len(vocab) + 1, n_scholarships), dtype=bool)
+        for j, codes in allowed.items():
+            mask[:, j] = False
+            for code in codes:
+                if code >= 0:
+                    mask[code, j] = True
+        return mask
+    
+    category_mask = allowed_mask(category_allowed, category_vocab)
+    gender_mask = allowed_mask(gender_allowed, gender_vocab)
+    occupation_mask = allowed_mask(occupation_allowed, occupation_vocab)
+    religion_mask = allowed_mask(religion_allowed, religion_vocab)
+    
+    # ---------- Encode student profiles ----------
+    def lookup(vocab: Dict[Any, int], value: Any) -> int:
+        """Vocabulary code for a profile value; unknown values map to the spare last row"""
+        try:
+            return vocab.get(value, len(vocab))
+        except TypeError:
+            return len(vocab)
+    
+    income = np.array([_student_income(s) for s in students], dtype=float).reshape(-1, 1)
+    percentage = np.array([s.overall_percentage for s in students], dtype=float).reshape(-1, 1)
+    category_code = np.array([lookup(category_vocab, s.category or "General") for s in students], dtype=np.int64)
+    occupation_code = np.array([lookup(occupation_vocab, s.parent_occupation) for s in students], dtype=np.int64)
+    religion_code = np.array([lookup(religion_vocab, s.religion) for s in students], dtype=np.int64)
+    gender_code = np.array([lookup(gender_vocab, s.gender) for s in students], dtype=np.int64)
+    first_gen_code = np.array([first_gen_vocab.get(s.is_first_graduate, -3) for s in students], dtype=np.int32).reshape(-1, 1)
+    
+    scores = np.zeros((n_students, n_scholarships), dtype=np.uint8)
+    
+    # Category matching (30 points)
+    scores += np.where(category_mask[category_code], 30, 0).astype(np.uint8)
+    
+    # Income matching (25 points, 15 if slightly over)
+    with np.errstate(invalid="ignore"):
+        income_points = np.where(
+            np.isnan(max_income), 25,
+            np.where(income <= max_income, 25, np.where(income - max_income < income * 0.1, 15, 0))
+        )
+    scores += income_points.astype(np.uint8)
+    
+    # Marks matching (20 points, 10 if within 5%)
+    with np.errstate(invalid="ignore"):
+        marks_points = np.where(
+            np.isnan(min_marks), 20,
+            np.where(percentage >= min_marks, 20, np.where(percentage >= min_marks - 5, 10, 0))
+        )
+    scores += marks_points.astype(np.uint8)
+    
+    # Gender matching (10 points)
+    scores += np.where(gender_mask[gender_code], 10, 0).astype(np.uint8)
+    
+    # First generation matching (5 points)
+    scores += np.where((first_gen_rule == -1) | (first_gen_code == first_gen_rule), 5, 0).astype(np.uint8)
+    
+    # Parent occupation matching (5 points)
+    scores += np.where(occupation_mask[occupation_code], 5, 0).astype(np.uint8)
+    
+    # Religion matching (5 points)
+    scores += np.where(religion_mask[religion_code], 5, 0).astype(np.uint8)
     
-    return matches
+    return scores
 
 
 def get_scholarship_by_id(scholarship_id: str) -> Optional[Dict[str, Any]]:
     """Get scholarship details by ID"""
-    for scholarship in SCHOLARSHIPS_DATABASE:
-        if scholarship["id"] == scholarship_id:
-            return scholarship
-    return None
+    return get_eligibility_index().by_id.get(scholarship_id)
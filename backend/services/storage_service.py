@@ -0,0 +1,1781 @@
+"""
+Storage Service for Student Scholarship Application
+Async storage repository used by the API handlers, with Firestore (asyncio
+client), SQLite and in-memory backends
+"""
+
+import asyncio
+import base64
+import bisect
+import copy
+import hashlib
+import json
+import os
+import queue
+import random
+import sqlite3
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Collection, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Union
+
+from services.cache_service import TTLCache
+
+# Try importing the asyncio Firestore client
+try:
+    from firebase_admin import firestore_async
+    from google.api_core.exceptions import AlreadyExists, NotFound
+    from google.cloud.firestore_v1 import DELETE_FIELD
+    from google.cloud.firestore_v1 import Increment
+    from google.cloud.firestore_v1.async_transaction import async_transactional
+    from google.cloud.firestore_v1.field_path import FieldPath
+    FIRESTORE_ASYNC_AVAILABLE = True
+except ImportError:
+    FIRESTORE_ASYNC_AVAILABLE = False
+
+class DuplicateApplicationError(ValueError):
+    """Raised by create_application when the student already applied for the scholarship"""
+
+
+class StatusChange(NamedTuple):
+    """Result of set_application_status"""
+    found: bool                              # the application exists
+    applied: bool                            # its status matched and was changed
+    application: Optional[Dict[str, Any]]    # after the change, or as found if not applied
+
+
+def _status_set(expected: Union[str, Collection[str]]) -> FrozenSet[str]:
+    return frozenset([expected]) if isinstance(expected, str) else frozenset(expected)
+
+
+def _transition_entry(
+    application_id: str,
+    from_status: Optional[str],
+    to_status: str,
+    at: Optional[str],
+    log: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """One record of an application's append-only status log"""
+    entry = {
+        "applicationId": application_id,
+        "from": from_status,
+        "to": to_status,
+        "at": at or datetime.utcnow().isoformat()
+    }
+    entry.update((key, value) for key, value in (log or {}).items() if value is not None)
+    return entry
+
+
+def _merge_fields(document: Dict[str, Any], updates: Dict[str, Any]) -> None:
+    """Apply field updates in place; None removes the field"""
+    for key, value in updates.items():
+        if value is None:
+            document.pop(key, None)
+        else:
+            document[key] = value
+
+
+# Firestore batches/transactions committed at once by the bulk operations
+BULK_CONCURRENCY = 8
+
+# Counter names: "students", "applications" and "status:<status>"
+STATUS_COUNTER_PREFIX = "status:"
+
+
+def _counters_view(values: Dict[str, int]) -> Dict[str, Any]:
+    """Shape flat counter name -> value pairs for get_counters()"""
+    return {
+        "students": values.get("students", 0),
+        "applications": values.get("applications", 0),
+        "applicationsByStatus": {
+            name[len(STATUS_COUNTER_PREFIX):]: value
+            for name, value in sorted(values.items())
+            if name.startswith(STATUS_COUNTER_PREFIX) and value
+        }
+    }
+
+
+class StorageBackend(ABC):
+    """
+    Async CRUD for students and applications
+
+    Mirrors firebase_service: lookups return None when missing, writes
+    return False/None on failure instead of raising. Updates and deletes of
+    a single document are conditional on it existing and take one round
+    trip: True when applied, False when it does not exist, None on failure.
+    """
+
+    name: str = "Unknown"
+
+    # ==================== STUDENT OPERATIONS ====================
+
+    @abstractmethod
+    async def create_student(self, student_data: Dict[str, Any]) -> Optional[str]:
+        """Store a new student. Returns the student ID"""
+
+    @abstractmethod
+    async def get_student(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """Student dict (with "id") or None"""
+
+    @abstractmethod
+    async def update_student(self, student_id: str, updates: Dict[str, Any]) -> Optional[bool]:
+        """Update-if-exists: merge fields into a student (None removes a field)"""
+
+    @abstractmethod
+    async def delete_student(self, student_id: str) -> Optional[bool]:
+        """Delete-if-exists"""
+
+    @abstractmethod
+    async def create_students_bulk(self, students: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Store many new students in as few round trips as possible. Returns IDs aligned with the input (None where the write failed)"""
+
+    @abstractmethod
+    async def get_students_many(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Student ID -> student dict for the IDs that exist, read in one batch"""
+
+    @abstractmethod
+    async def list_students(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Page of students by offset (prefer list_students_after, which does not re-read skipped rows)"""
+
+    @abstractmethod
+    async def count_students(self) -> int:
+        """Number of stored students"""
+
+    @abstractmethod
+    async def list_students_after(self, start_after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """Students in ID order, starting after the given ID (exclusive)"""
+
+    async def iter_students(self, start_after: Optional[str] = None, page_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Stream every student in ID order, one page per round trip"""
+        while True:
+            page = await self.list_students_after(start_after, page_size)
+            for student in page:
+                yield student
+            if len(page) < page_size:
+                return
+            start_after = page[-1]["id"]
+
+    # ==================== APPLICATION OPERATIONS ====================
+
+    @abstractmethod
+    async def create_application(self, application_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Store a new application (and the first entry of its status log).
+        Returns the application ID
+
+        (studentId, scholarshipId) is unique; the check and the insert are one
+        atomic step.
+
+        Raises:
+            DuplicateApplicationError: if the student already applied for the scholarship
+        """
+
+    @abstractmethod
+    async def get_application(self, application_id: str) -> Optional[Dict[str, Any]]:
+        """Application dict (with "id") or None"""
+
+    @abstractmethod
+    async def update_application(self, application_id: str, updates: Dict[str, Any]) -> bool:
+        """Update application fields (status changes belong in set_application_status, which logs them)"""
+
+    @abstractmethod
+    async def set_application_status(
+        self,
+        application_id: str,
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Optional[StatusChange]:
+        """
+        Compare-and-set: change the status only if it is currently one of `expected`
+
+        The check, the write and the status log entry are atomic, so two
+        concurrent changes cannot both apply. Other fields in `updates` are
+        written with the status; `log` adds fields (e.g. actor, reason) to
+        the log entry.
+
+        Returns:
+            StatusChange, or None if the write failed
+        """
+
+    @abstractmethod
+    async def set_application_status_bulk(
+        self,
+        application_ids: List[str],
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Optional[StatusChange]]:
+        """set_application_status for many applications, batched. Returns ID -> result"""
+
+    @abstractmethod
+    async def list_application_transitions(self, application_id: str) -> List[Dict[str, Any]]:
+        """Status log of an application, oldest first"""
+
+    @abstractmethod
+    async def delete_application(self, application_id: str) -> bool:
+        """Delete an application"""
+
+    @abstractmethod
+    async def list_applications(
+        self,
+        student_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Applications in ID order, optionally filtered by student and/or status, starting after an ID"""
+
+    @abstractmethod
+    async def count_applications(self, status: Optional[str] = None) -> int:
+        """Number of applications, optionally with a given status"""
+
+    @abstractmethod
+    async def list_applications_by_age(
+        self,
+        status: str,
+        scholarship_id: Optional[str] = None,
+        applied_before: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Applications with a status (and scholarship), oldest first, from an index
+
+        Args:
+            status: Application status
+            scholarship_id: Only this scholarship
+            applied_before: Only applications with appliedAt before this ISO timestamp
+            limit: Page size
+            start_after: (appliedAt, id) of the last application of the previous page
+        """
+
+    # ==================== AGGREGATE COUNTERS ====================
+
+    @abstractmethod
+    async def get_counters(self) -> Dict[str, Any]:
+        """
+        Maintained totals, updated in the same write as the documents they count
+
+        Returns:
+            {"students": int, "applications": int, "applicationsByStatus": {status: int}}
+        """
+
+    @abstractmethod
+    async def rebuild_counters(self) -> Dict[str, Any]:
+        """Recount every document and replace the counters. Returns the new counters"""
+
+    # ==================== RECOMMENDATION OPERATIONS ====================
+
+    @abstractmethod
+    async def save_recommendations(self, results: Dict[str, List[Dict[str, Any]]]) -> bool:
+        """Store precomputed recommendations (studentId -> MatchResult dicts)"""
+
+    async def close(self) -> None:
+        """Release connections (no-op by default)"""
+
+
+# ==================== IN-MEMORY BACKEND ====================
+
+class InMemoryStorage(StorageBackend):
+    """
+    Dict-backed storage (data is lost on restart)
+
+    Operates on the dicts it is given, so code that still reads them
+    directly sees the same data.
+    """
+
+    name = "In-memory"
+
+    def __init__(
+        self,
+        students: Dict[str, Dict[str, Any]],
+        applications: Dict[str, Dict[str, Any]],
+        recommendations: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.students = students
+        self.applications = applications
+        self.recommendations = recommendations if recommendations is not None else {}
+
+        # Sorted keys, so cursor pages start with a bisect instead of a scan
+        self._student_ids: List[str] = sorted(students)
+        self._application_ids: List[str] = sorted(applications)
+
+        # Uniqueness index: (studentId, scholarshipId) -> application ID
+        self._application_keys: Dict[Tuple[str, str], str] = {
+            (application["studentId"], application["scholarshipId"]): application_id
+            for application_id, application in applications.items()
+        }
+
+        # Secondary indexes: studentId / status -> sorted application IDs, and
+        # (status, scholarshipId or None for all) -> sorted (appliedAt, ID)
+        self._applications_by_student: Dict[str, List[str]] = {}
+        self._applications_by_status: Dict[str, List[str]] = {}
+        self._applications_by_age: Dict[Tuple[str, Optional[str]], List[Tuple[str, str]]] = {}
+        for application_id in self._application_ids:
+            application = applications[application_id]
+            self._index_add(self._applications_by_student, application["studentId"], application_id)
+            self._index_status(application_id, application, application["status"], add=True)
+
+        # Append-only status log: application ID -> transitions, oldest first
+        self.transitions: Dict[str, List[Dict[str, Any]]] = {}
+
+        self._counters: Dict[str, int] = {}
+        self._recount()
+
+    @staticmethod
+    def _remove_id(ids: List[str], key: str) -> None:
+        pos = bisect.bisect_left(ids, key)
+        if pos < len(ids) and ids[pos] == key:
+            del ids[pos]
+
+    @staticmethod
+    def _index_add(index: Dict[Any, List[Any]], key: Any, entry: Any) -> None:
+        bisect.insort(index.setdefault(key, []), entry)
+
+    @classmethod
+    def _index_remove(cls, index: Dict[Any, List[Any]], key: Any, entry: Any) -> None:
+        entries = index.get(key)
+        if entries is not None:
+            cls._remove_id(entries, entry)
+            if not entries:
+                del index[key]
+
+    def _index_status(self, application_id: str, application: Dict[str, Any], status: str, add: bool) -> None:
+        """Add an application to (or remove it from) the indexes keyed by the given status"""
+        update = self._index_add if add else self._index_remove
+        update(self._applications_by_status, status, application_id)
+        entry = (application.get("appliedAt") or "", application_id)
+        update(self._applications_by_age, (status, None), entry)
+        update(self._applications_by_age, (status, application["scholarshipId"]), entry)
+
+    # Handlers run on one event loop and none of these methods await, so a
+    # document change and its counter updates cannot interleave with another
+
+    def _bump(self, name: str, delta: int) -> None:
+        self._counters[name] = self._counters.get(name, 0) + delta
+
+    def _recount(self) -> None:
+        self._counters = {"students": len(self.students), "applications": len(self.applications)}
+        for application in self.applications.values():
+            self._bump(STATUS_COUNTER_PREFIX + application["status"], 1)
+
+    async def create_student(self, student_data: Dict[str, Any]) -> Optional[str]:
+        student_id = str(uuid.uuid4())
+        student_data["id"] = student_id
+        self.students[student_id] = student_data
+        bisect.insort(self._student_ids, student_id)
+        self._bump("students", 1)
+        return student_id
+
+    async def get_student(self, student_id: str) -> Optional[Dict[str, Any]]:
+        return self.students.get(student_id)
+
+    async def update_student(self, student_id: str, updates: Dict[str, Any]) -> Optional[bool]:
+        student = self.students.get(student_id)
+        if student is None:
+            return False
+        _merge_fields(student, updates)
+        return True
+
+    async def delete_student(self, student_id: str) -> Optional[bool]:
+        if self.students.pop(student_id, None) is None:
+            return False
+        self._remove_id(self._student_ids, student_id)
+        self._bump("students", -1)
+        return True
+
+    async def create_students_bulk(self, students: List[Dict[str, Any]]) -> List[Optional[str]]:
+        return [await self.create_student(student_data) for student_data in students]
+
+    async def get_students_many(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {student_id: self.students[student_id] for student_id in student_ids if student_id in self.students}
+
+    async def list_students(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        return [self.students[student_id] for student_id in self._student_ids[offset:offset + limit]]
+
+    async def count_students(self) -> int:
+        return len(self.students)
+
+    async def list_students_after(self, start_after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        ids = self._student_ids
+        start = bisect.bisect_right(ids, start_after) if start_after else 0
+        return [self.students[student_id] for student_id in ids[start:start + limit]]
+
+    async def create_application(self, application_data: Dict[str, Any]) -> Optional[str]:
+        key = (application_data["studentId"], application_data["scholarshipId"])
+        if key in self._application_keys:
+            raise DuplicateApplicationError(f"Student {key[0]} already applied for {key[1]}")
+
+        application_id = str(uuid.uuid4())
+        application_data["id"] = application_id
+        self.applications[application_id] = application_data
+        self._application_keys[key] = application_id
+        bisect.insort(self._application_ids, application_id)
+        self._index_add(self._applications_by_student, application_data["studentId"], application_id)
+        self._index_status(application_id, application_data, application_data["status"], add=True)
+        self._bump("applications", 1)
+        self._bump(STATUS_COUNTER_PREFIX + application_data["status"], 1)
+        self.transitions[application_id] = [
+            _transition_entry(application_id, None, application_data["status"], application_data.get("appliedAt"))
+        ]
+        return application_id
+
+    async def get_application(self, application_id: str) -> Optional[Dict[str, Any]]:
+        return self.applications.get(application_id)
+
+    async def update_application(self, application_id: str, updates: Dict[str, Any]) -> bool:
+        application = self.applications.get(application_id)
+        if application is None:
+            return False
+        old_status = application["status"]
+        application.update(updates)
+        if application["status"] != old_status:
+            self._index_status(application_id, application, old_status, add=False)
+            self._index_status(application_id, application, application["status"], add=True)
+            self._bump(STATUS_COUNTER_PREFIX + old_status, -1)
+            self._bump(STATUS_COUNTER_PREFIX + application["status"], 1)
+        return True
+
+    async def set_application_status(
+        self,
+        application_id: str,
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Optional[StatusChange]:
+        application = self.applications.get(application_id)
+        if application is None:
+            return StatusChange(False, False, None)
+        old_status = application["status"]
+        if old_status not in _status_set(expected):
+            return StatusChange(True, False, application)
+
+        fields = {**(updates or {}), "status": status}
+        await self.update_application(application_id, fields)
+        self.transitions.setdefault(application_id, []).append(
+            _transition_entry(application_id, old_status, status, fields.get("updatedAt"), log)
+        )
+        return StatusChange(True, True, application)
+
+    async def set_application_status_bulk(
+        self,
+        application_ids: List[str],
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Optional[StatusChange]]:
+        return {
+            application_id: await self.set_application_status(application_id, expected, status, updates, log)
+            for application_id in dict.fromkeys(application_ids)
+        }
+
+    async def list_application_transitions(self, application_id: str) -> List[Dict[str, Any]]:
+        return list(self.transitions.get(application_id, ()))
+
+    async def delete_application(self, application_id: str) -> bool:
+        application = self.applications.pop(application_id, None)
+        if application is None:
+            return False
+        self._application_keys.pop((application["studentId"], application["scholarshipId"]), None)
+        self._remove_id(self._application_ids, application_id)
+        self._index_remove(self._applications_by_student, application["studentId"], application_id)
+        self._index_status(application_id, application, application["status"], add=False)
+        self._bump("applications", -1)
+        self._bump(STATUS_COUNTER_PREFIX + application["status"], -1)
+        return True
+
+    async def list_applications(
+        self,
+        student_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        # Walk the smallest matching ID list; the other filter (if any) is checked per row
+        candidates = [self._application_ids]
+        if student_id:
+            candidates.append(self._applications_by_student.get(student_id, []))
+        if status:
+            candidates.append(self._applications_by_status.get(status, []))
+        ids = min(candidates, key=len)
+
+        start = bisect.bisect_right(ids, start_after) if start_after else 0
+        results = []
+        for pos in range(start, len(ids)):
+            application = self.applications[ids[pos]]
+            if student_id and application["studentId"] != student_id:
+                continue
+            if status and application["status"] != status:
+                continue
+            results.append(application)
+            if len(results) >= limit:
+                break
+        return results
+
+    async def count_applications(self, status: Optional[str] = None) -> int:
+        if not status:
+            return len(self.applications)
+        return len(self._applications_by_status.get(status, ()))
+
+    async def list_applications_by_age(
+        self,
+        status: str,
+        scholarship_id: Optional[str] = None,
+        applied_before: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        entries = self._applications_by_age.get((status, scholarship_id), [])
+        start = bisect.bisect_right(entries, tuple(start_after)) if start_after else 0
+        end = bisect.bisect_left(entries, (applied_before, "")) if applied_before else len(entries)
+        return [self.applications[application_id] for _, application_id in entries[start:min(start + limit, end)]]
+
+    async def get_counters(self) -> Dict[str, Any]:
+        return _counters_view(self._counters)
+
+    async def rebuild_counters(self) -> Dict[str, Any]:
+        self._recount()
+        return _counters_view(self._counters)
+
+    async def save_recommendations(self, results: Dict[str, List[Dict[str, Any]]]) -> bool:
+        now = datetime.utcnow().isoformat()
+        for student_id, recommendations in results.items():
+            self.recommendations[student_id] = {
+                "studentId": student_id,
+                "count": len(recommendations),
+                "recommendations": recommendations,
+                "generatedAt": now
+            }
+        return True
+
+
+# ==================== FIRESTORE BACKEND ====================
+
+class FirestoreStorage(StorageBackend):
+    """
+    Firestore storage on the asyncio client (firebase_admin.firestore_async)
+
+    Requests await Firestore round trips on the event loop instead of holding
+    a threadpool slot for their whole duration.
+    """
+
+    name = "Firebase"
+
+    def __init__(self, client=None, counter_shards: int = 10):
+        if client is None:
+            if not FIRESTORE_ASYNC_AVAILABLE:
+                raise RuntimeError("firebase_admin.firestore_async is not available")
+            # Uses the default app set up by firebase_service.initialize_firebase()
+            client = firestore_async.client()
+        self.db = client
+
+        # Sharded so concurrent writes do not contend on one counter document
+        self.counter_shards = max(1, counter_shards)
+
+    @staticmethod
+    def _to_dict(doc) -> Dict[str, Any]:
+        data = doc.to_dict()
+        data["id"] = doc.id
+        return data
+
+    def _counter_shard(self):
+        """A random counter shard document"""
+        return self.db.collection("counters").document(f"stats_{random.randrange(self.counter_shards)}")
+
+    @staticmethod
+    def _counter_update(collection: Optional[str], delta: int, status_deltas: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Merge-set fields that add delta to a collection total and status_deltas to the status counts"""
+        fields: Dict[str, Any] = {}
+        if collection:
+            fields[collection] = Increment(delta)
+        if status_deltas:
+            fields["applicationsByStatus"] = {status: Increment(d) for status, d in status_deltas.items()}
+        return fields
+
+    async def _add(
+        self,
+        collection: str,
+        data: Dict[str, Any],
+        status: Optional[str] = None,
+        doc_id: Optional[str] = None,
+        transition: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """
+        Create a document (auto ID unless doc_id is given), optionally with the
+        first entry of its status log. Raises AlreadyExists if doc_id is taken
+        """
+        try:
+            now = datetime.utcnow().isoformat()
+            data["createdAt"] = now
+            data["updatedAt"] = now
+            doc_ref = self.db.collection(collection).document(doc_id)
+
+            # Document, log entry and counter shard are written atomically
+            batch = self.db.batch()
+            batch.create(doc_ref, data)
+            if transition is not None:
+                batch.create(doc_ref.collection("transitions").document(), transition)
+            batch.set(self._counter_shard(), self._counter_update(collection, 1, {status: 1} if status else None), merge=True)
+            await batch.commit()
+            return doc_ref.id
+        except AlreadyExists:
+            raise
+        except Exception as e:
+            print(f"[ERROR] Error creating {collection} document: {e}")
+            return None
+
+    async def _get(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            doc = await self.db.collection(collection).document(doc_id).get()
+            return self._to_dict(doc) if doc.exists else None
+        except Exception as e:
+            print(f"[ERROR] Error getting {collection}/{doc_id}: {e}")
+            return None
+
+    async def _update(self, collection: str, doc_id: str, updates: Dict[str, Any]) -> Optional[bool]:
+        """update() has an exists precondition, so this is update-if-exists in one round trip"""
+        try:
+            updates["updatedAt"] = datetime.utcnow().isoformat()
+            fields = {key: DELETE_FIELD if value is None else value for key, value in updates.items()}
+            await self.db.collection(collection).document(doc_id).update(fields)
+            return True
+        except NotFound:
+            return False
+        except Exception as e:
+            print(f"[ERROR] Error updating {collection}/{doc_id}: {e}")
+            return None
+
+    async def _delete(self, collection: str, doc_id: str) -> bool:
+        doc_ref = self.db.collection(collection).document(doc_id)
+        shard = self._counter_shard()
+
+        @async_transactional
+        async def delete(transaction) -> bool:
+            snapshot = await doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return False
+            status = snapshot.get("status") if collection == "applications" else None
+            transaction.delete(doc_ref)
+            transaction.set(shard, self._counter_update(collection, -1, {status: -1} if status else None), merge=True)
+            return True
+
+        try:
+            return await delete(self.db.transaction())
+        except Exception as e:
+            print(f"[ERROR] Error deleting {collection}/{doc_id}: {e}")
+            return None
+
+    async def create_student(self, student_data: Dict[str, Any]) -> Optional[str]:
+        return await self._add("students", student_data)
+
+    async def get_student(self, student_id: str) -> Optional[Dict[str, Any]]:
+        return await self._get("students", student_id)
+
+    async def update_student(self, student_id: str, updates: Dict[str, Any]) -> Optional[bool]:
+        return await self._update("students", student_id, updates)
+
+    async def delete_student(self, student_id: str) -> Optional[bool]:
+        # No read needed: the exists precondition fails the whole batch (counter
+        # included) if the student is already gone
+        batch = self.db.batch()
+        batch.delete(self.db.collection("students").document(student_id), option=self.db.write_option(exists=True))
+        batch.set(self._counter_shard(), self._counter_update("students", -1), merge=True)
+        try:
+            await batch.commit()
+            return True
+        except NotFound:
+            return False
+        except Exception as e:
+            print(f"[ERROR] Error deleting students/{student_id}: {e}")
+            return None
+
+    async def create_students_bulk(self, students: List[Dict[str, Any]]) -> List[Optional[str]]:
+        now = datetime.utcnow().isoformat()
+        refs = [self.db.collection("students").document() for _ in students]
+        limit = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def commit(start: int) -> bool:
+            # 499 documents + the counter shard per batch (Firestore caps a batch at 500 writes)
+            chunk = list(zip(refs[start:start + 499], students[start:start + 499]))
+            batch = self.db.batch()
+            for doc_ref, student_data in chunk:
+                student_data["createdAt"] = now
+                student_data["updatedAt"] = now
+                batch.create(doc_ref, student_data)
+            batch.set(self._counter_shard(), self._counter_update("students", len(chunk)), merge=True)
+            async with limit:
+                try:
+                    await batch.commit()
+                    return True
+                except Exception as e:
+                    print(f"[ERROR] Error creating students {start}-{start + len(chunk) - 1}: {e}")
+                    return False
+
+        committed = await asyncio.gather(*(commit(start) for start in range(0, len(refs), 499)))
+        return [
+            doc_ref.id if committed[pos // 499] else None
+            for pos, doc_ref in enumerate(refs)
+        ]
+
+    async def get_students_many(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not student_ids:
+            return {}
+        try:
+            refs = [self.db.collection("students").document(student_id) for student_id in set(student_ids)]
+            return {doc.id: self._to_dict(doc) async for doc in self.db.get_all(refs) if doc.exists}
+        except Exception as e:
+            print(f"[ERROR] Error getting students: {e}")
+            return {}
+
+    async def list_students(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        try:
+            query = self.db.collection("students").offset(offset).limit(limit)
+            return [self._to_dict(doc) async for doc in query.stream()]
+        except Exception as e:
+            print(f"[ERROR] Error listing students: {e}")
+            return []
+
+    async def _count(self, query, label: str) -> int:
+        """Server-side aggregation count (no documents are transferred)"""
+        try:
+            result = await query.count().get()
+            return int(result[0][0].value)
+        except Exception as e:
+            print(f"[ERROR] Error counting {label}: {e}")
+            return 0
+
+    async def count_students(self) -> int:
+        return await self._count(self.db.collection("students"), "students")
+
+    async def list_students_after(self, start_after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        try:
+            collection = self.db.collection("students")
+            query = collection.order_by(FieldPath.document_id())
+            if start_after:
+                query = query.where(FieldPath.document_id(), ">", collection.document(start_after))
+            return [self._to_dict(doc) async for doc in query.limit(limit).stream()]
+        except Exception as e:
+            print(f"[ERROR] Error listing students: {e}")
+            return []
+
+    @staticmethod
+    def application_id_for(student_id: str, scholarship_id: str) -> str:
+        """
+        Deterministic document ID of a (student, scholarship) application
+
+        Creating the document fails if it exists, so Firestore itself enforces
+        one application per pair. Hashed so IDs stay valid and spread evenly.
+        """
+        return hashlib.sha1(f"{student_id}\x00{scholarship_id}".encode("utf-8")).hexdigest()
+
+    async def create_application(self, application_data: Dict[str, Any]) -> Optional[str]:
+        student_id, scholarship_id = application_data["studentId"], application_data["scholarshipId"]
+        application_id = self.application_id_for(student_id, scholarship_id)
+        try:
+            return await self._add(
+                "applications", application_data, application_data["status"],
+                doc_id=application_id,
+                transition=_transition_entry(
+                    application_id, None, application_data["status"], application_data.get("appliedAt")
+                )
+            )
+        except AlreadyExists:
+            raise DuplicateApplicationError(f"Student {student_id} already applied for {scholarship_id}")
+
+    async def get_application(self, application_id: str) -> Optional[Dict[str, Any]]:
+        return await self._get("applications", application_id)
+
+    async def update_application(self, application_id: str, updates: Dict[str, Any]) -> bool:
+        if "status" not in updates:
+            return await self._update("applications", application_id, updates)
+
+        # Status changes move the application between counters in the same transaction
+        doc_ref = self.db.collection("applications").document(application_id)
+        shard = self._counter_shard()
+        updates["updatedAt"] = datetime.utcnow().isoformat()
+
+        @async_transactional
+        async def update(transaction) -> bool:
+            snapshot = await doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return False
+            old_status = snapshot.get("status")
+            transaction.update(doc_ref, updates)
+            if updates["status"] != old_status:
+                transaction.set(shard, self._counter_update(None, 0, {old_status: -1, updates["status"]: 1}), merge=True)
+            return True
+
+        try:
+            return await update(self.db.transaction())
+        except Exception as e:
+            print(f"[ERROR] Error updating applications/{application_id}: {e}")
+            return False
+
+    def _change_status(
+        self,
+        transaction,
+        snapshot,
+        expected: FrozenSet[str],
+        fields: Dict[str, Any],
+        log: Optional[Dict[str, Any]],
+        status_deltas: Dict[str, int]
+    ) -> StatusChange:
+        """Queue one compare-and-set (update + log entry) on a transaction; counter deltas are collected"""
+        if not snapshot.exists:
+            return StatusChange(False, False, None)
+        application = self._to_dict(snapshot)
+        old_status = application["status"]
+        if old_status not in expected:
+            return StatusChange(True, False, application)
+
+        status = fields["status"]
+        transaction.update(snapshot.reference, fields)
+        transaction.create(
+            snapshot.reference.collection("transitions").document(),
+            _transition_entry(application["id"], old_status, status, fields["updatedAt"], log)
+        )
+        if status != old_status:
+            status_deltas[old_status] = status_deltas.get(old_status, 0) - 1
+            status_deltas[status] = status_deltas.get(status, 0) + 1
+        application.update(fields)
+        return StatusChange(True, True, application)
+
+    async def set_application_status(
+        self,
+        application_id: str,
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Optional[StatusChange]:
+        results = await self.set_application_status_bulk([application_id], expected, status, updates, log)
+        return results[application_id]
+
+    async def set_application_status_bulk(
+        self,
+        application_ids: List[str],
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Optional[StatusChange]]:
+        expected = _status_set(expected)
+        fields = {**(updates or {}), "status": status}
+        fields.setdefault("updatedAt", datetime.utcnow().isoformat())
+        ids = list(dict.fromkeys(application_ids))
+        limit = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def commit(chunk: List[str]) -> Dict[str, Optional[StatusChange]]:
+            refs = [self.db.collection("applications").document(application_id) for application_id in chunk]
+            shard = self._counter_shard()
+
+            @async_transactional
+            async def change(transaction) -> Dict[str, Optional[StatusChange]]:
+                # Current statuses are read in the transaction, so each change
+                # (and its counter move) applies exactly once
+                snapshots = {doc.id: doc async for doc in transaction.get_all(refs)}
+                status_deltas: Dict[str, int] = {}
+                results = {
+                    application_id: self._change_status(
+                        transaction, snapshots[application_id], expected, fields, log, status_deltas
+                    )
+                    for application_id in chunk
+                }
+                if status_deltas:
+                    transaction.set(shard, self._counter_update(None, 0, status_deltas), merge=True)
+                return results
+
+            async with limit:
+                try:
+                    return await change(self.db.transaction())
+                except Exception as e:
+                    print(f"[ERROR] Error changing application status: {e}")
+                    return {application_id: None for application_id in chunk}
+
+        results: Dict[str, Optional[StatusChange]] = {}
+        # 2 writes per application (document + log entry) + the counter shard per transaction
+        for chunk_results in await asyncio.gather(*(commit(ids[i:i + 249]) for i in range(0, len(ids), 249))):
+            results.update(chunk_results)
+        return results
+
+    async def list_application_transitions(self, application_id: str) -> List[Dict[str, Any]]:
+        try:
+            query = self.db.collection("applications").document(application_id).collection("transitions").order_by("at")
+            return [doc.to_dict() async for doc in query.stream()]
+        except Exception as e:
+            print(f"[ERROR] Error listing transitions of applications/{application_id}: {e}")
+            return []
+
+    async def delete_application(self, application_id: str) -> bool:
+        return await self._delete("applications", application_id)
+
+    async def list_applications(
+        self,
+        student_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        try:
+            collection = self.db.collection("applications")
+            query = collection.order_by(FieldPath.document_id())
+            if student_id:
+                query = query.where("studentId", "==", student_id)
+            if status:
+                query = query.where("status", "==", status)
+            if start_after:
+                query = query.where(FieldPath.document_id(), ">", collection.document(start_after))
+            return [self._to_dict(doc) async for doc in query.limit(limit).stream()]
+        except Exception as e:
+            print(f"[ERROR] Error listing applications: {e}")
+            return []
+
+    async def count_applications(self, status: Optional[str] = None) -> int:
+        query = self.db.collection("applications")
+        if status:
+            query = query.where("status", "==", status)
+        return await self._count(query, "applications")
+
+    async def list_applications_by_age(
+        self,
+        status: str,
+        scholarship_id: Optional[str] = None,
+        applied_before: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Needs composite indexes on (status, appliedAt) and (status, scholarshipId, appliedAt)"""
+        try:
+            query = self.db.collection("applications").where("status", "==", status)
+            if scholarship_id:
+                query = query.where("scholarshipId", "==", scholarship_id)
+            if applied_before:
+                query = query.where("appliedAt", "<", applied_before)
+            query = query.order_by("appliedAt").order_by(FieldPath.document_id())
+            if start_after:
+                query = query.start_after({"appliedAt": start_after[0], "__name__": start_after[1]})
+            return [self._to_dict(doc) async for doc in query.limit(limit).stream()]
+        except Exception as e:
+            print(f"[ERROR] Error listing applications by age: {e}")
+            return []
+
+    async def get_counters(self) -> Dict[str, Any]:
+        values: Dict[str, int] = {}
+        try:
+            shards = [self.db.collection("counters").document(f"stats_{i}") for i in range(self.counter_shards)]
+            async for snapshot in self.db.get_all(shards):
+                if not snapshot.exists:
+                    continue
+                data = snapshot.to_dict()
+                for name in ("students", "applications"):
+                    values[name] = values.get(name, 0) + data.get(name, 0)
+                for status, value in data.get("applicationsByStatus", {}).items():
+                    name = STATUS_COUNTER_PREFIX + status
+                    values[name] = values.get(name, 0) + value
+        except Exception as e:
+            print(f"[ERROR] Error reading counters: {e}")
+        return _counters_view(values)
+
+    async def rebuild_counters(self) -> Dict[str, Any]:
+        """
+        Recount from the collections and write the totals to shard 0
+
+        Writes that land while the recount runs may be lost; run it while
+        the API is idle.
+        """
+        values: Dict[str, int] = {
+            "students": await self._count(self.db.collection("students"), "students"),
+            "applications": 0
+        }
+        # Only the status field is transferred
+        async for doc in self.db.collection("applications").select(["status"]).stream():
+            name = STATUS_COUNTER_PREFIX + doc.get("status")
+            values[name] = values.get(name, 0) + 1
+            values["applications"] += 1
+
+        counters = _counters_view(values)
+        batch = self.db.batch()
+        for i in range(self.counter_shards):
+            shard = self.db.collection("counters").document(f"stats_{i}")
+            if i == 0:
+                batch.set(shard, counters)
+            else:
+                batch.delete(shard)
+        await batch.commit()
+        return counters
+
+    async def save_recommendations(self, results: Dict[str, List[Dict[str, Any]]]) -> bool:
+        try:
+            now = datetime.utcnow().isoformat()
+            items = list(results.items())
+
+            # Firestore batches are limited to 500 writes
+            for i in range(0, len(items), 500):
+                batch = self.db.batch()
+                for student_id, recommendations in items[i:i + 500]:
+                    batch.set(self.db.collection("recommendations").document(student_id), {
+                        "studentId": student_id,
+                        "count": len(recommendations),
+                        "recommendations": recommendations,
+                        "generatedAt": now
+                    })
+                await batch.commit()
+            return True
+        except Exception as e:
+            print(f"[ERROR] Error saving recommendations: {e}")
+            return False
+
+
+# ==================== SQLITE BACKEND ====================
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS applications (
+    id TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    scholarship_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    applied_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+
+-- (filter, id) so filtered cursor pages are index range scans in ID order
+CREATE INDEX IF NOT EXISTS idx_applications_student ON applications (student_id, id);
+CREATE INDEX IF NOT EXISTS idx_applications_scholarship ON applications (scholarship_id);
+-- One application per student and scholarship
+CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_unique ON applications (student_id, scholarship_id);
+-- Review queues: oldest applications with a status, overall or per scholarship
+CREATE INDEX IF NOT EXISTS idx_applications_age ON applications (status, applied_at, id);
+CREATE INDEX IF NOT EXISTS idx_applications_review ON applications (status, scholarship_id, applied_at, id);
+
+-- Append-only status log
+CREATE TABLE IF NOT EXISTS application_transitions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    application_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transitions_application ON application_transitions (application_id, seq);
+CREATE INDEX IF NOT EXISTS idx_applications_status ON applications (status, id);
+
+CREATE TABLE IF NOT EXISTS recommendations (
+    student_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    generated_at TEXT
+);
+
+-- Aggregate counters, updated in the same transaction as the rows they count
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite storage (WAL mode, pooled connections)
+
+    Documents are stored as JSON with the filtered fields (studentId,
+    scholarshipId, status) copied into indexed columns. Queries run in worker
+    threads so the event loop is never blocked on disk I/O. The SQL sticks to
+    plain types and standard statements so it ports to Postgres.
+    """
+
+    name = "SQLite"
+
+    def __init__(self, path: str = "scholarship.db", pool_size: int = 4):
+        if path == ":memory:":
+            raise ValueError("SQLiteStorage needs a file path (pooled connections cannot share :memory:)")
+
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+
+        with self._connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+            # Databases created before the counters table existed
+            if conn.execute("SELECT COUNT(*) FROM counters").fetchone()[0] == 0:
+                self._recount(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; multi-statement writes use explicit transactions
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self, conn: sqlite3.Connection):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def _run(self, fn, *args, default=None, label: str = "query"):
+        """Run fn(conn, *args) on a pooled connection in a worker thread"""
+        def call():
+            with self._connection() as conn:
+                return fn(conn, *args)
+
+        try:
+            return await asyncio.to_thread(call)
+        except sqlite3.Error as e:
+            print(f"[ERROR] SQLite {label} failed: {e}")
+            return default
+
+    @staticmethod
+    def _load(row) -> Optional[Dict[str, Any]]:
+        return json.loads(row["data"]) if row is not None else None
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, name: str, delta: int) -> None:
+        """Add delta to a counter (call inside the transaction that changes the rows)"""
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, delta)
+        )
+
+    def _recount(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        with self._transaction(conn):
+            values = {
+                "students": conn.execute("SELECT COUNT(*) FROM students").fetchone()[0],
+                "applications": conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+            }
+            for row in conn.execute("SELECT status, COUNT(*) FROM applications GROUP BY status"):
+                values[STATUS_COUNTER_PREFIX + row[0]] = row[1]
+            conn.execute("DELETE FROM counters")
+            conn.executemany("INSERT INTO counters (name, value) VALUES (?, ?)", values.items())
+        return values
+
+    # ==================== STUDENT OPERATIONS ====================
+
+    async def create_student(self, student_data: Dict[str, Any]) -> Optional[str]:
+        student_id = str(uuid.uuid4())
+        student_data["id"] = student_id
+
+        def insert(conn):
+            with self._transaction(conn):
+                conn.execute(
+                    "INSERT INTO students (id, data, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                    (student_id, json.dumps(student_data), student_data.get("createdAt"), student_data.get("updatedAt"))
+                )
+                self._bump(conn, "students", 1)
+            return student_id
+
+        return await self._run(insert, label="create student")
+
+    async def get_student(self, student_id: str) -> Optional[Dict[str, Any]]:
+        def select(conn):
+            return self._load(conn.execute("SELECT data FROM students WHERE id = ?", (student_id,)).fetchone())
+
+        return await self._run(select, label="get student")
+
+    async def update_student(self, student_id: str, updates: Dict[str, Any]) -> Optional[bool]:
+        def update(conn):
+            with self._transaction(conn):
+                row = conn.execute("SELECT data FROM students WHERE id = ?", (student_id,)).fetchone()
+                if row is None:
+                    return False
+                student = self._load(row)
+                _merge_fields(student, updates)
+                conn.execute(
+                    "UPDATE students SET data = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(student), student.get("updatedAt"), student_id)
+                )
+                return True
+
+        return await self._run(update, label="update student")
+
+    async def delete_student(self, student_id: str) -> Optional[bool]:
+        def delete(conn):
+            with self._transaction(conn):
+                if conn.execute("DELETE FROM students WHERE id = ?", (student_id,)).rowcount == 0:
+                    return False
+                self._bump(conn, "students", -1)
+                return True
+
+        return await self._run(delete, label="delete student")
+
+    async def create_students_bulk(self, students: List[Dict[str, Any]]) -> List[Optional[str]]:
+        for student_data in students:
+            student_data["id"] = str(uuid.uuid4())
+        rows = [
+            (student_data["id"], json.dumps(student_data), student_data.get("createdAt"), student_data.get("updatedAt"))
+            for student_data in students
+        ]
+
+        def insert(conn):
+            # One transaction (one fsync) for the whole import
+            with self._transaction(conn):
+                conn.executemany("INSERT INTO students (id, data, created_at, updated_at) VALUES (?, ?, ?, ?)", rows)
+                self._bump(conn, "students", len(rows))
+            return [row[0] for row in rows]
+
+        return await self._run(insert, default=[None] * len(students), label="create students")
+
+    async def get_students_many(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        ids = list(set(student_ids))
+
+        def select(conn):
+            students = {}
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT id, data FROM students WHERE id IN ({placeholders})", chunk):
+                    students[row["id"]] = self._load(row)
+            return students
+
+        return await self._run(select, default={}, label="get students")
+
+    async def list_students(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        def select(conn):
+            rows = conn.execute("SELECT data FROM students ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
+            return [self._load(row) for row in rows]
+
+        return await self._run(select, default=[], label="list students")
+
+    async def count_students(self) -> int:
+        def count(conn):
+            return conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+        return await self._run(count, default=0, label="count students")
+
+    async def list_students_after(self, start_after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        def select(conn):
+            rows = conn.execute(
+                "SELECT data FROM students WHERE id > ? ORDER BY id LIMIT ?",
+                (start_after or "", limit)
+            )
+            return [self._load(row) for row in rows]
+
+        return await self._run(select, default=[], label="list students")
+
+    # ==================== APPLICATION OPERATIONS ====================
+
+    async def create_application(self, application_data: Dict[str, Any]) -> Optional[str]:
+        application_id = str(uuid.uuid4())
+        application_data["id"] = application_id
+
+        def insert(conn):
+            with self._transaction(conn):
+                try:
+                    conn.execute(
+                        "INSERT INTO applications (id, student_id, scholarship_id, status, applied_at, updated_at, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            application_id,
+                            application_data["studentId"],
+                            application_data["scholarshipId"],
+                            application_data["status"],
+                            application_data.get("appliedAt"),
+                            application_data.get("updatedAt"),
+                            json.dumps(application_data)
+                        )
+                    )
+                except sqlite3.IntegrityError:
+                    # idx_applications_unique (the ID is a fresh UUID)
+                    raise DuplicateApplicationError(
+                        f"Student {application_data['studentId']} already applied for {application_data['scholarshipId']}"
+                    )
+                self._bump(conn, "applications", 1)
+                self._bump(conn, STATUS_COUNTER_PREFIX + application_data["status"], 1)
+                self._log_transition(conn, _transition_entry(
+                    application_id, None, application_data["status"], application_data.get("appliedAt")
+                ))
+            return application_id
+
+        return await self._run(insert, label="create application")
+
+    async def get_application(self, application_id: str) -> Optional[Dict[str, Any]]:
+        def select(conn):
+            return self._load(conn.execute("SELECT data FROM applications WHERE id = ?", (application_id,)).fetchone())
+
+        return await self._run(select, label="get application")
+
+    def _update_application_row(self, conn: sqlite3.Connection, application_id: str, updates: Dict[str, Any]) -> bool:
+        """Read-modify-write one application (call inside a transaction)"""
+        row = conn.execute("SELECT data FROM applications WHERE id = ?", (application_id,)).fetchone()
+        if row is None:
+            return False
+        application = self._load(row)
+        old_status = application["status"]
+        application.update(updates)
+        conn.execute(
+            "UPDATE applications SET status = ?, updated_at = ?, data = ? WHERE id = ?",
+            (application["status"], application.get("updatedAt"), json.dumps(application), application_id)
+        )
+        if application["status"] != old_status:
+            self._bump(conn, STATUS_COUNTER_PREFIX + old_status, -1)
+            self._bump(conn, STATUS_COUNTER_PREFIX + application["status"], 1)
+        return True
+
+    async def update_application(self, application_id: str, updates: Dict[str, Any]) -> bool:
+        def update(conn):
+            with self._transaction(conn):
+                return self._update_application_row(conn, application_id, updates)
+
+        return await self._run(update, default=False, label="update application")
+
+    @staticmethod
+    def _log_transition(conn: sqlite3.Connection, entry: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT INTO application_transitions (application_id, data) VALUES (?, ?)",
+            (entry["applicationId"], json.dumps(entry))
+        )
+
+    def _change_status_row(
+        self,
+        conn: sqlite3.Connection,
+        application_id: str,
+        expected: FrozenSet[str],
+        fields: Dict[str, Any],
+        log: Optional[Dict[str, Any]]
+    ) -> StatusChange:
+        """Compare-and-set one application's status, with its log entry (call inside a transaction)"""
+        application = self._load(conn.execute("SELECT data FROM applications WHERE id = ?", (application_id,)).fetchone())
+        if application is None:
+            return StatusChange(False, False, None)
+        old_status = application["status"]
+        if old_status not in expected:
+            return StatusChange(True, False, application)
+        self._update_application_row(conn, application_id, fields)
+        self._log_transition(conn, _transition_entry(application_id, old_status, fields["status"], fields.get("updatedAt"), log))
+        application.update(fields)
+        return StatusChange(True, True, application)
+
+    async def set_application_status(
+        self,
+        application_id: str,
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Optional[StatusChange]:
+        fields = {**(updates or {}), "status": status}
+
+        def change(conn):
+            with self._transaction(conn):
+                return self._change_status_row(conn, application_id, _status_set(expected), fields, log)
+
+        return await self._run(change, label="set application status")
+
+    async def set_application_status_bulk(
+        self,
+        application_ids: List[str],
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Optional[StatusChange]]:
+        fields = {**(updates or {}), "status": status}
+        ids = list(dict.fromkeys(application_ids))
+
+        def change(conn):
+            with self._transaction(conn):
+                return {
+                    application_id: self._change_status_row(conn, application_id, _status_set(expected), fields, log)
+                    for application_id in ids
+                }
+
+        return await self._run(
+            change,
+            default={application_id: None for application_id in ids},
+            label="set application status"
+        )
+
+    async def list_application_transitions(self, application_id: str) -> List[Dict[str, Any]]:
+        def select(conn):
+            rows = conn.execute(
+                "SELECT data FROM application_transitions WHERE application_id = ? ORDER BY seq",
+                (application_id,)
+            )
+            return [self._load(row) for row in rows]
+
+        return await self._run(select, default=[], label="list transitions")
+
+    async def delete_application(self, application_id: str) -> bool:
+        def delete(conn):
+            with self._transaction(conn):
+                row = conn.execute("SELECT status FROM applications WHERE id = ?", (application_id,)).fetchone()
+                if row is None:
+                    return False
+                conn.execute("DELETE FROM applications WHERE id = ?", (application_id,))
+                self._bump(conn, "applications", -1)
+                self._bump(conn, STATUS_COUNTER_PREFIX + row["status"], -1)
+                return True
+
+        return await self._run(delete, default=False, label="delete application")
+
+    @staticmethod
+    def _application_filter(student_id: Optional[str], status: Optional[str], start_after: Optional[str] = None):
+        clauses, params = [], []
+        if student_id:
+            clauses.append("student_id = ?")
+            params.append(student_id)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if start_after:
+            clauses.append("id > ?")
+            params.append(start_after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    async def list_applications(
+        self,
+        student_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        where, params = self._application_filter(student_id, status, start_after)
+
+        def select(conn):
+            rows = conn.execute(f"SELECT data FROM applications{where} ORDER BY id LIMIT ?", (*params, limit))
+            return [self._load(row) for row in rows]
+
+        return await self._run(select, default=[], label="list applications")
+
+    async def count_applications(self, status: Optional[str] = None) -> int:
+        where, params = self._application_filter(None, status)
+
+        def count(conn):
+            return conn.execute(f"SELECT COUNT(*) FROM applications{where}", params).fetchone()[0]
+
+        return await self._run(count, default=0, label="count applications")
+
+    async def list_applications_by_age(
+        self,
+        status: str,
+        scholarship_id: Optional[str] = None,
+        applied_before: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        # Range scan on idx_applications_review / idx_applications_age
+        clauses, params = ["status = ?"], [status]
+        if scholarship_id:
+            clauses.append("scholarship_id = ?")
+            params.append(scholarship_id)
+        if applied_before:
+            clauses.append("applied_at < ?")
+            params.append(applied_before)
+        if start_after:
+            clauses.append("(applied_at > ? OR (applied_at = ? AND id > ?))")
+            params.extend([start_after[0], start_after[0], start_after[1]])
+
+        def select(conn):
+            rows = conn.execute(
+                f"SELECT data FROM applications WHERE {' AND '.join(clauses)} ORDER BY applied_at, id LIMIT ?",
+                (*params, limit)
+            )
+            return [self._load(row) for row in rows]
+
+        return await self._run(select, default=[], label="list applications by age")
+
+    # ==================== AGGREGATE COUNTERS ====================
+
+    async def get_counters(self) -> Dict[str, Any]:
+        def select(conn):
+            return _counters_view({row["name"]: row["value"] for row in conn.execute("SELECT name, value FROM counters")})
+
+        return await self._run(select, default=_counters_view({}), label="get counters")
+
+    async def rebuild_counters(self) -> Dict[str, Any]:
+        def rebuild(conn):
+            return _counters_view(self._recount(conn))
+
+        return await self._run(rebuild, default=_counters_view({}), label="rebuild counters")
+
+    # ==================== RECOMMENDATION OPERATIONS ====================
+
+    async def save_recommendations(self, results: Dict[str, List[Dict[str, Any]]]) -> bool:
+        now = datetime.utcnow().isoformat()
+        rows = [
+            (student_id, json.dumps({
+                "studentId": student_id,
+                "count": len(recommendations),
+                "recommendations": recommendations,
+                "generatedAt": now
+            }), now)
+            for student_id, recommendations in results.items()
+        ]
+
+        def upsert(conn):
+            with self._transaction(conn):
+                conn.executemany(
+                    "INSERT INTO recommendations (student_id, data, generated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (student_id) DO UPDATE SET data = excluded.data, generated_at = excluded.generated_at",
+                    rows
+                )
+            return True
+
+        return await self._run(upsert, default=False, label="save recommendations")
+
+    async def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+# ==================== STUDENT CACHE ====================
+
+def _json_size(value: Any) -> int:
+    """Approximate memory held by a cached document (its JSON size)"""
+    return len(json.dumps(value, default=str))
+
+
+class CachedStorage(StorageBackend):
+    """
+    Read-through cache of student documents in front of another backend
+
+    Student writes go to the backend first and then drop the cached copy.
+    Everything else is passed through unchanged.
+    """
+
+    def __init__(self, backend: StorageBackend, max_size: int = 10000, ttl_seconds: Optional[float] = 60):
+        self.backend = backend
+        self.name = backend.name
+        self.cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds, sizeof=_json_size)
+        # Bumped before and after every student write; a read only fills the
+        # cache if no write started or finished while it was in flight (so it
+        # cannot cache data the write is replacing)
+        self._writes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio, size and approximate memory of the student cache"""
+        return self.cache.stats()
+
+    # ==================== STUDENT OPERATIONS ====================
+
+    async def create_student(self, student_data: Dict[str, Any]) -> Optional[str]:
+        return await self.backend.create_student(student_data)
+
+    async def get_student(self, student_id: str) -> Optional[Dict[str, Any]]:
+        cached = self.cache.get(student_id)
+        if cached is not None:
+            # Deep copy, so callers changing the dict (or its nested marks) do not change the cache
+            return copy.deepcopy(cached)
+
+        writes = self._writes
+        student = await self.backend.get_student(student_id)
+        if student is not None and writes == self._writes:
+            self.cache.set(student_id, copy.deepcopy(student))
+        return student
+
+    async def get_students_many(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        students: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for student_id in set(student_ids):
+            cached = self.cache.get(student_id)
+            if cached is not None:
+                students[student_id] = copy.deepcopy(cached)
+            else:
+                missing.append(student_id)
+
+        if missing:
+            writes = self._writes
+            fetched = await self.backend.get_students_many(missing)
+            if writes == self._writes:
+                for student_id, student in fetched.items():
+                    self.cache.set(student_id, copy.deepcopy(student))
+            students.update(fetched)
+        return students
+
+    async def update_student(self, student_id: str, updates: Dict[str, Any]) -> Optional[bool]:
+        self._writes += 1
+        try:
+            return await self.backend.update_student(student_id, updates)
+        finally:
+            self._writes += 1
+            self.cache.invalidate(student_id)
+
+    async def delete_student(self, student_id: str) -> Optional[bool]:
+        self._writes += 1
+        try:
+            return await self.backend.delete_student(student_id)
+        finally:
+            self._writes += 1
+            self.cache.invalidate(student_id)
+
+    async def create_students_bulk(self, students: List[Dict[str, Any]]) -> List[Optional[str]]:
+        return await self.backend.create_students_bulk(students)
+
+    async def list_students(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        return await self.backend.list_students(limit, offset)
+
+    async def count_students(self) -> int:
+        return await self.backend.count_students()
+
+    async def list_students_after(self, start_after: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        return await self.backend.list_students_after(start_after, limit)
+
+    # ==================== PASS-THROUGH ====================
+
+    async def create_application(self, application_data: Dict[str, Any]) -> Optional[str]:
+        return await self.backend.create_application(application_data)
+
+    async def get_application(self, application_id: str) -> Optional[Dict[str, Any]]:
+        return await self.backend.get_application(application_id)
+
+    async def update_application(self, application_id: str, updates: Dict[str, Any]) -> bool:
+        return await self.backend.update_application(application_id, updates)
+
+    async def set_application_status(
+        self,
+        application_id: str,
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Optional[StatusChange]:
+        return await self.backend.set_application_status(application_id, expected, status, updates, log)
+
+    async def set_application_status_bulk(
+        self,
+        application_ids: List[str],
+        expected: Union[str, Collection[str]],
+        status: str,
+        updates: Optional[Dict[str, Any]] = None,
+        log: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Optional[StatusChange]]:
+        return await self.backend.set_application_status_bulk(application_ids, expected, status, updates, log)
+
+    async def list_application_transitions(self, application_id: str) -> List[Dict[str, Any]]:
+        return await self.backend.list_application_transitions(application_id)
+
+    async def delete_application(self, application_id: str) -> bool:
+        return await self.backend.delete_application(application_id)
+
+    async def list_applications(
+        self,
+        student_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.backend.list_applications(student_id, status, limit, start_after)
+
+    async def count_applications(self, status: Optional[str] = None) -> int:
+        return await self.backend.count_applications(status)
+
+    async def list_applications_by_age(
+        self,
+        status: str,
+        scholarship_id: Optional[str] = None,
+        applied_before: Optional[str] = None,
+        limit: int = 100,
+        start_after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.backend.list_applications_by_age(status, scholarship_id, applied_before, limit, start_after)
+
+    async def get_counters(self) -> Dict[str, Any]:
+        return await self.backend.get_counters()
+
+    async def rebuild_counters(self) -> Dict[str, Any]:
+        return await self.backend.rebuild_counters()
+
+    async def save_recommendations(self, results: Dict[str, List[Dict[str, Any]]]) -> bool:
+        return await self.backend.save_recommendations(results)
+
+    async def close(self) -> None:
+        self.cache.clear()
+        await self.backend.close()
+
+
+# ==================== PAGINATION CURSORS ====================
+
+def encode_page_cursor(last_id: str) -> str:
+    """Opaque nextCursor token for the last document of a page"""
+    return base64.urlsafe_b64encode(last_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_cursor(cursor: str) -> str:
+    """
+    Document ID encoded in a nextCursor token
+
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = base64.b64decode(padded.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not last_id:
+        raise ValueError("Invalid cursor: empty")
+    return last_id
+
+
+def next_page_cursor(page: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """nextCursor for a page (None when it was the last page)"""
+    return encode_page_cursor(page[-1]["id"]) if page and len(page) >= limit else None
+
+
+# ==================== BACKEND SELECTION ====================
+
+STORAGE_BACKENDS = ["memory", "firestore", "sqlite"]
+
+
+def create_storage(
+    backend: str,
+    students: Optional[Dict[str, Dict[str, Any]]] = None,
+    applications: Optional[Dict[str, Dict[str, Any]]] = None,
+    recommendations: Optional[Dict[str, Dict[str, Any]]] = None
+) -> StorageBackend:
+    """
+    Create a storage backend by name
+
+    Args:
+        backend: "memory", "firestore" (COUNTER_SHARDS env var) or "sqlite"
+            (SQLITE_PATH / SQLITE_POOL_SIZE env vars)
+        students, applications, recommendations: Dicts used by the in-memory backend
+
+    Returns:
+        StorageBackend instance
+    """
+    backend = backend.lower()
+
+    if backend == "memory":
+        return InMemoryStorage(
+            students if students is not None else {},
+            applications if applications is not None else {},
+            recommendations
+        )
+    if backend == "firestore":
+        return FirestoreStorage(counter_shards=int(os.environ.get("COUNTER_SHARDS", 10)))
+    if backend == "sqlite":
+        return SQLiteStorage(
+            path=os.environ.get("SQLITE_PATH", "scholarship.db"),
+            pool_size=int(os.environ.get("SQLITE_POOL_SIZE", 4))
+        )
+
+    raise ValueError(f"Unknown storage backend: {backend}. Supported: {', '.join(STORAGE_BACKENDS)}")
@@ -0,0 +1,57 @@
+"""
+Upload Service
+Reads uploaded marksheets into memory with a size limit, so one oversized
+file cannot exhaust memory or tie up the OCR pool
+"""
+
+import os
+from typing import Optional
+
+from fastapi import UploadFile
+
+# Largest accepted marksheet upload (MAX_UPLOAD_MB, default 10 MB)
+MAX_UPLOAD_BYTES = int(float(os.environ.get("MAX_UPLOAD_MB", 10)) * 1024 * 1024)
+
+# Read size while enforcing the limit
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the size limit"""
+    pass
+
+
+async def read_upload(file: UploadFile, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Read an uploaded file, stopping as soon as it exceeds max_bytes
+
+    The declared size is checked first when the client sent one; otherwise the
+    file is read in chunks and never more than max_bytes + one chunk is held.
+
+    Args:
+        file: The uploaded file
+        max_bytes: Largest accepted size in bytes (default MAX_UPLOAD_BYTES)
+
+    Returns:
+        File contents
+
+    Raises:
+        UploadTooLargeError: If the file is larger than max_bytes
+    """
+    if max_bytes is None:
+        max_bytes = MAX_UPLOAD_BYTES
+    too_large = UploadTooLargeError(f"File too large (max {max_bytes / (1024 * 1024):g} MB)")
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+
+    chunks = []
+    total = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
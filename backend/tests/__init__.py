@@ -0,0 +1 @@
+"""Assertion-based tests (run with: python -m unittest discover tests)"""
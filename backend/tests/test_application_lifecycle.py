@@ -0,0 +1,143 @@
+"""
+Application lifecycle: status changes go through the storage compare-and-set,
+so only allowed transitions apply, each is logged once and counters follow
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from services import application_lifecycle as lifecycle
+from services.application_lifecycle import APPROVED, PENDING, REJECTED, VERIFIED, WITHDRAWN
+from services.storage_service import InMemoryStorage, SQLiteStorage
+
+
+class LifecycleTests:
+    """Shared cases; subclasses provide make_storage()"""
+
+    def make_storage(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.storage = self.make_storage()
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def apply(self, scholarship_id: str = "sc-post-matric") -> str:
+        return self.run_async(self.storage.create_application({
+            "studentId": "student-1",
+            "scholarshipId": scholarship_id,
+            "status": PENDING,
+            "appliedAt": "2026-01-01T00:00:00"
+        }))
+
+    def change(self, application_id: str, status: str, **kwargs):
+        return self.run_async(lifecycle.change_status(self.storage, application_id, status, **kwargs))
+
+    def test_allowed_path_is_applied_and_logged(self):
+        application_id = self.apply()
+        result = self.change(application_id, VERIFIED, actor="admin@test", reason="Documents checked")
+        self.assertTrue(result.found)
+        self.assertTrue(result.applied)
+        self.assertEqual(result.application["status"], VERIFIED)
+
+        result = self.change(application_id, APPROVED, actor="admin@test")
+        self.assertTrue(result.applied)
+
+        log = self.run_async(self.storage.list_application_transitions(application_id))
+        self.assertEqual([(entry["from"], entry["to"]) for entry in log],
+                         [(None, PENDING), (PENDING, VERIFIED), (VERIFIED, APPROVED)])
+        self.assertEqual(log[1]["actor"], "admin@test")
+        self.assertEqual(log[1]["reason"], "Documents checked")
+        self.assertNotIn("reason", log[2])
+
+    def test_disallowed_transitions_are_not_applied(self):
+        application_id = self.apply()
+        self.assertTrue(self.change(application_id, REJECTED).applied)
+
+        for status in (PENDING, VERIFIED, APPROVED, WITHDRAWN, REJECTED):
+            result = self.change(application_id, status)
+            self.assertTrue(result.found)
+            self.assertFalse(result.applied, status)
+            self.assertEqual(result.application["status"], REJECTED)
+
+        # Verified applications can no longer be withdrawn
+        application_id = self.apply("st-post-matric")
+        self.assertTrue(self.change(application_id, VERIFIED).applied)
+        self.assertFalse(self.change(application_id, WITHDRAWN).applied)
+
+        log = self.run_async(self.storage.list_application_transitions(application_id))
+        self.assertEqual(len(log), 2)
+
+    def test_missing_application(self):
+        result = self.change("missing", WITHDRAWN)
+        self.assertFalse(result.found)
+        self.assertFalse(result.applied)
+
+    def test_counters_follow_transitions(self):
+        first = self.apply()
+        second = self.apply("st-post-matric")
+        self.change(first, WITHDRAWN)
+        self.change(second, VERIFIED)
+        self.change(second, WITHDRAWN)  # not allowed, counters unchanged
+
+        counters = self.run_async(self.storage.get_counters())
+        self.assertEqual(counters["applications"], 2)
+        self.assertEqual(counters["applicationsByStatus"], {VERIFIED: 1, WITHDRAWN: 1})
+        self.assertEqual(self.run_async(self.storage.rebuild_counters()), counters)
+
+    def test_concurrent_changes_apply_once(self):
+        application_id = self.apply()
+        targets = [WITHDRAWN, APPROVED, REJECTED, WITHDRAWN] * 4
+
+        async def change_all():
+            return await asyncio.gather(*(
+                lifecycle.change_status(self.storage, application_id, status) for status in targets
+            ))
+
+        results = self.run_async(change_all())
+        applied = [status for status, result in zip(targets, results) if result.applied]
+        self.assertEqual(len(applied), 1)
+
+        log = self.run_async(self.storage.list_application_transitions(application_id))
+        self.assertEqual([(entry["from"], entry["to"]) for entry in log], [(None, PENDING), (PENDING, applied[0])])
+        application = self.run_async(self.storage.get_application(application_id))
+        self.assertEqual(application["status"], applied[0])
+
+    def test_bulk_change(self):
+        pending = self.apply()
+        rejected = self.apply("st-post-matric")
+        self.change(rejected, REJECTED)
+
+        results = self.run_async(lifecycle.change_status_bulk(
+            self.storage, [pending, rejected, "missing", pending], APPROVED, actor="admin@test"
+        ))
+        self.assertEqual(set(results), {pending, rejected, "missing"})
+        self.assertTrue(results[pending].applied)
+        self.assertFalse(results[rejected].applied)
+        self.assertFalse(results["missing"].found)
+
+        counters = self.run_async(self.storage.get_counters())
+        self.assertEqual(counters["applicationsByStatus"], {APPROVED: 1, REJECTED: 1})
+
+
+class InMemoryLifecycleTests(LifecycleTests, unittest.TestCase):
+    def make_storage(self):
+        return InMemoryStorage({}, {})
+
+
+class SQLiteLifecycleTests(LifecycleTests, unittest.TestCase):
+    def make_storage(self):
+        self.dir = tempfile.mkdtemp()
+        return SQLiteStorage(os.path.join(self.dir, "test.db"), pool_size=4)
+
+    def tearDown(self):
+        self.run_async(self.storage.close())
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
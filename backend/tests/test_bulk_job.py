@@ -0,0 +1,35 @@
+"""
+Bulk recommendation job: only one job may be started at a time
+"""
+
+import asyncio
+import unittest
+
+from fastapi import BackgroundTasks, HTTPException
+
+import main
+
+
+class BulkJobStartTests(unittest.TestCase):
+    def tearDown(self):
+        main.bulk_job_status["running"] = False
+
+    def test_concurrent_starts_admit_one_job(self):
+        async def start():
+            tasks = BackgroundTasks()
+            try:
+                await main.start_bulk_recommendations(tasks)
+                return len(tasks.tasks)
+            except HTTPException as e:
+                return e.status_code
+
+        async def start_many():
+            return await asyncio.gather(*(start() for _ in range(5)))
+
+        results = asyncio.run(start_many())
+        self.assertEqual(sorted(results), [1, 409, 409, 409, 409])
+        self.assertTrue(main.bulk_job_status["running"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Catalogue replacement: the eligibility index and the recommendation cache
+must never serve results from a previous catalogue
+"""
+
+import unittest
+import warnings
+
+import services
+from models.types import StudentProfile
+from services import scholarship_recommendation_engine as engine
+
+
+def make_student(**overrides) -> StudentProfile:
+    data = {
+        "name": "Test Student",
+        "region": "Karnataka",
+        "overallPercentage": 85.5,
+        "incomeLevel": "< 2 LPA",
+        "familyAnnualIncome": 150000,
+        "category": "SC",
+        "gender": "Female"
+    }
+    data.update(overrides)
+    return StudentProfile(**data)
+
+
+def match_ids(student: StudentProfile, **kwargs) -> list:
+    return [match.id for match in engine.find_matching_scholarships(student, **kwargs)]
+
+
+class CatalogueVersionTests(unittest.TestCase):
+    def setUp(self):
+        self.original = engine.SCHOLARSHIPS_DATABASE
+        self.student = make_student()
+
+    def tearDown(self):
+        engine.install_scholarships(self.original)
+
+    def test_install_invalidates_cached_rankings(self):
+        before = match_ids(self.student)
+        self.assertTrue(before)
+        # Second call is served from the cache
+        self.assertEqual(match_ids(self.student), before)
+
+        remaining = [s for s in self.original if s["id"] != before[0]]
+        old_index = engine.get_eligibility_index()
+        engine.install_scholarships(remaining)
+
+        after = match_ids(self.student)
+        self.assertNotIn(before[0], after)
+        self.assertEqual(after, before[1:])
+        self.assertIsNot(engine.get_eligibility_index(), old_index)
+        self.assertGreater(engine.get_eligibility_index().catalogue_version, old_index.catalogue_version)
+
+    def test_top_k_cache_invalidated(self):
+        before = match_ids(self.student, top_k=1)
+        engine.install_scholarships([s for s in self.original if s["id"] != before[0]])
+        after = match_ids(self.student, top_k=1)
+        self.assertEqual(len(after), 1)
+        self.assertNotEqual(after, before)
+
+    def test_direct_rebind_is_detected(self):
+        index = engine.get_eligibility_index()
+        engine.SCHOLARSHIPS_DATABASE = tuple(self.original[:3])
+        self.assertIsNot(engine.get_eligibility_index(), index)
+        self.assertEqual(len(engine.get_scholarships()), 3)
+
+    def test_catalogue_is_read_only(self):
+        with self.assertRaises(AttributeError):
+            engine.SCHOLARSHIPS_DATABASE.append({"id": "new"})
+        engine.install_scholarships(list(self.original[:2]))
+        self.assertIsInstance(engine.SCHOLARSHIPS_DATABASE, tuple)
+
+    def test_deprecated_alias_follows_reloads(self):
+        engine.install_scholarships(self.original[:4])
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            alias = services.SCHOLARSHIPS_DATABASE
+        self.assertEqual(len(alias), 4)
+        self.assertTrue(any(issubclass(w.category, DeprecationWarning) for w in caught))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Eligibility index pruning: ranked results must equal a full scan that
+scores every scholarship with calculate_match_score
+"""
+
+import copy
+import random
+import unittest
+
+from models.types import Category, Gender, StudentProfile
+from services import scholarship_recommendation_engine as engine
+
+CATEGORIES = [c.value for c in Category]
+GENDERS = [g.value for g in Gender]
+
+
+def random_student(rng: random.Random) -> StudentProfile:
+    return StudentProfile(**{
+        "name": "Student",
+        "region": rng.choice(["Tamil Nadu", "Kerala", "Delhi"]),
+        "incomeLevel": rng.choice(["< 1 LPA", "< 2 LPA", "< 5 LPA", "> 10 LPA"]),
+        "gender": rng.choice(GENDERS),
+        "category": rng.choice(CATEGORIES),
+        "familyAnnualIncome": rng.choice([None, rng.randint(50000, 1500000)]),
+        "overallPercentage": rng.uniform(30, 99),
+        "isFirstGraduate": rng.random() < 0.5
+    })
+
+
+def random_catalogue(rng: random.Random, size: int) -> list:
+    """Built-in scholarships with shuffled category, income, marks and gender rules"""
+    catalogue = []
+    for i in range(size):
+        scholarship = copy.deepcopy(rng.choice(engine.SCHOLARSHIPS_DATABASE))
+        scholarship["id"] = f"{scholarship['id']}-{i}"
+        rules = scholarship["rules"]
+        choice = rng.random()
+        if choice < 0.3:
+            rules["category"] = rng.choice(CATEGORIES)
+        elif choice < 0.7:
+            rules["category"] = rng.sample(CATEGORIES, rng.randint(1, 3))
+        else:
+            rules.pop("category", None)
+        rules["maxIncome"] = rng.choice([0, 100000, 250000, 800000, 1000000])
+        rules["minMarks"] = rng.choice([0, 50, 60, 75, 90])
+        if rng.random() < 0.2:
+            rules["gender"] = rng.choice(GENDERS)
+        catalogue.append(scholarship)
+    return catalogue
+
+
+def full_scan(student: StudentProfile, min_score: float) -> list:
+    """(id, score) for every scholarship reaching min_score, best first, ties in catalogue order"""
+    scored = [
+        (scholarship["id"], engine.calculate_match_score(student, scholarship))
+        for scholarship in engine.get_scholarships()
+    ]
+    ranked = [pair for pair in scored if pair[1] >= min_score]
+    ranked.sort(key=lambda pair: pair[1], reverse=True)
+    return ranked
+
+
+def ranked(matches) -> list:
+    return [(match.id, match.match_score) for match in matches]
+
+
+class EligibilityIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.original = engine.SCHOLARSHIPS_DATABASE
+        self.rng = random.Random(11)
+
+    def tearDown(self):
+        engine.install_scholarships(self.original)
+
+    def assert_pruning_matches_full_scan(self, students: int):
+        for _ in range(students):
+            student = random_student(self.rng)
+            for min_score in (0, 30, 50, 70, 90, 100):
+                expected = full_scan(student, min_score)
+                self.assertEqual(ranked(engine.find_matching_scholarships(student, min_score)), expected)
+                for top_k in (1, 3, 10):
+                    self.assertEqual(
+                        ranked(engine.find_matching_scholarships(student, min_score, top_k)),
+                        expected[:top_k]
+                    )
+
+    def test_builtin_catalogue(self):
+        self.assert_pruning_matches_full_scan(students=40)
+
+    def test_random_catalogue(self):
+        engine.install_scholarships(random_catalogue(self.rng, 200))
+        self.assert_pruning_matches_full_scan(students=40)
+
+    def test_upper_bound_never_below_score(self):
+        engine.install_scholarships(random_catalogue(self.rng, 200))
+        index = engine.get_eligibility_index()
+        for _ in range(40):
+            student = random_student(self.rng)
+            for pos, scholarship, upper_bound in index.bounded_candidates(student):
+                self.assertGreaterEqual(upper_bound, engine.calculate_match_score(student, scholarship))
+
+    def test_pruning_skips_candidates(self):
+        engine.install_scholarships(random_catalogue(self.rng, 200))
+        index = engine.get_eligibility_index()
+        skipped = sum(
+            len(index) - len(index.bounded_candidates(random_student(self.rng), 70))
+            for _ in range(20)
+        )
+        self.assertGreater(skipped, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Extraction cache: LRU eviction, config versioning, shared in-flight computes
+and what is (not) stored
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from services.extraction_cache import ExtractionCache, KIND_OCR, KIND_PROFILE
+from services.ocr_service import is_complete_extraction
+
+
+class ExtractionCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = ExtractionCache(os.path.join(self.dir, "cache.db"), max_bytes=1024 * 1024)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_round_trip_and_version(self):
+        self.cache.set(KIND_OCR, "h1", "v1", {"text": "hello"})
+        self.assertEqual(self.cache.get(KIND_OCR, "h1", "v1"), {"text": "hello"})
+        # Another config version or kind is a different entry
+        self.assertIsNone(self.cache.get(KIND_OCR, "h1", "v2"))
+        self.assertIsNone(self.cache.get(KIND_PROFILE, "h1", "v1"))
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_lru_eviction(self):
+        value = {"text": "x" * 1000}
+        size = len(json.dumps(value))
+        self.cache.max_bytes = size * 3
+
+        for name in ("a", "b", "c"):
+            self.cache.set(KIND_OCR, name, "v", value)
+            time.sleep(0.01)
+        # Touch "a", so "b" is now the least recently used
+        self.assertIsNotNone(self.cache.get(KIND_OCR, "a", "v"))
+        time.sleep(0.01)
+        self.cache.set(KIND_OCR, "d", "v", value)
+
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertIsNone(self.cache.get(KIND_OCR, "b", "v"))
+        for name in ("a", "c", "d"):
+            self.assertIsNotNone(self.cache.get(KIND_OCR, name, "v"))
+        self.assertLessEqual(self.cache.bytes, self.cache.max_bytes)
+        self.assertEqual(self.cache.stats()["entries"], 3)
+
+    def test_get_or_compute_caches(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"text": "hello"}
+
+        first = asyncio.run(self.cache.get_or_compute(KIND_OCR, "h", "v", compute))
+        second = asyncio.run(self.cache.get_or_compute(KIND_OCR, "h", "v", compute))
+        self.assertEqual(first, ({"text": "hello"}, False))
+        self.assertEqual(second, ({"text": "hello"}, True))
+        self.assertEqual(len(calls), 1)
+
+    def test_inflight_waiters_are_not_reported_cached(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"text": "hello"}
+
+        async def run_many():
+            return await asyncio.gather(*(
+                self.cache.get_or_compute(KIND_OCR, "h", "v", compute) for _ in range(4)
+            ))
+
+        results = asyncio.run(run_many())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [({"text": "hello"}, False)] * 4)
+        self.assertEqual(self.cache.shared, 3)
+
+    def test_uncacheable_values_are_not_stored(self):
+        placeholder = {"text": "[IMAGE_FILE: a.png, size: 1x1. Use AI vision for extraction.]",
+                       "pages": [{"page": 1, "method": "none", "characters": 60}]}
+
+        async def compute():
+            return placeholder
+
+        for _ in range(2):
+            value, cached = asyncio.run(self.cache.get_or_compute(
+                KIND_OCR, "h", "v", compute, cacheable=is_complete_extraction
+            ))
+            self.assertEqual(value, placeholder)
+            self.assertFalse(cached)
+        self.assertIsNone(self.cache.get(KIND_OCR, "h", "v"))
+
+    def test_failures_are_not_stored(self):
+        async def compute():
+            raise RuntimeError("tesseract timed out")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(self.cache.get_or_compute(KIND_OCR, "h", "v", compute))
+        self.assertIsNone(self.cache.get(KIND_OCR, "h", "v"))
+
+    def test_is_complete_extraction(self):
+        ocr_page = {"page": 1, "method": "ocr", "characters": 10}
+        layer_page = {"page": 2, "method": "text_layer", "characters": 10}
+        missing_page = {"page": 3, "method": "none", "characters": 10}
+        self.assertTrue(is_complete_extraction({"text": "x", "pages": [ocr_page, layer_page]}))
+        self.assertFalse(is_complete_extraction({"text": "x", "pages": [ocr_page, missing_page]}))
+        # pdf2image missing: placeholder text and no pages
+        self.assertFalse(is_complete_extraction({"text": "[PDF_FILE: a.pdf]", "pages": []}))
+
+
+if __name__ == "__main__":
+    unittest.main()
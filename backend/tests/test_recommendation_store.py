@@ -0,0 +1,74 @@
+"""
+Incremental recommendation store: results must match a fresh
+find_matching_scholarships call after any profile update or catalogue swap
+"""
+
+import random
+import unittest
+
+from models.types import Category, Gender, StudentProfile
+from services import scholarship_recommendation_engine as engine
+from services.recommendation_store import RecommendationStore
+
+
+def random_student(rng: random.Random) -> StudentProfile:
+    return StudentProfile(**{
+        "name": "Student",
+        "region": rng.choice(["Tamil Nadu", "Kerala", "Delhi"]),
+        "incomeLevel": "< 5 LPA",
+        "gender": rng.choice([g.value for g in Gender]),
+        "category": rng.choice([c.value for c in Category]),
+        "familyAnnualIncome": rng.randint(50000, 900000),
+        "overallPercentage": rng.uniform(40, 99),
+        "isFirstGraduate": rng.random() < 0.5
+    })
+
+
+def ranked(matches) -> list:
+    return [(match.id, match.match_score) for match in matches]
+
+
+class RecommendationStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.original = engine.SCHOLARSHIPS_DATABASE
+        self.rng = random.Random(7)
+
+    def tearDown(self):
+        engine.install_scholarships(self.original)
+
+    def assert_matches_engine(self, store, student_id, student, min_score=50, top_k=None):
+        self.assertEqual(
+            ranked(store.recommend(student_id, student, min_score, top_k)),
+            ranked(engine.find_matching_scholarships(student, min_score, top_k))
+        )
+
+    def test_incremental_updates_match_full_scoring(self):
+        store = RecommendationStore()
+        for i in range(150):
+            student = random_student(self.rng)
+            student_id = f"s{i % 10}"
+            for min_score, top_k in ((50, None), (70, 3), (30, 5)):
+                self.assert_matches_engine(store, student_id, student, min_score, top_k)
+        self.assertGreater(store.incremental_updates, 0)
+
+    def test_eviction_keeps_results_correct(self):
+        store = RecommendationStore(max_scores=20)
+        for i in range(40):
+            self.assert_matches_engine(store, f"s{i % 8}", random_student(self.rng))
+        self.assertLessEqual(store.stats()["storedScores"], 20)
+
+    def test_catalogue_swap_resets_store(self):
+        store = RecommendationStore()
+        students = {f"s{i}": random_student(self.rng) for i in range(5)}
+        for student_id, student in students.items():
+            store.update(student_id, student)
+
+        engine.install_scholarships(list(reversed(self.original))[:8])
+        for student_id, student in students.items():
+            self.assert_matches_engine(store, student_id, student)
+        self.assertEqual(store.catalogue_resets, 2)
+        self.assertEqual(store.stats()["students"], len(students))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+SQLite storage backend: merge updates, deletes and counters round-trip
+through the database the same way InMemoryStorage handles them
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from services.storage_service import DuplicateApplicationError, InMemoryStorage, SQLiteStorage
+
+
+def make_student(name: str, **fields) -> dict:
+    return {"name": name, "region": "Karnataka", "overallPercentage": 85.5, "category": "SC", **fields}
+
+
+class SQLiteStorageTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "test.db")
+        self.storage = SQLiteStorage(self.path, pool_size=2)
+
+    def tearDown(self):
+        self.run_async(self.storage.close())
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def reopen(self) -> None:
+        self.run_async(self.storage.close())
+        self.storage = SQLiteStorage(self.path, pool_size=2)
+
+    def test_merge_update_round_trip(self):
+        student_id = self.run_async(self.storage.create_student(make_student("Asha", gender="Female")))
+
+        updated = self.run_async(self.storage.update_student(student_id, {
+            "overallPercentage": 91.0,      # replaced
+            "district": "Mysuru",           # added
+            "gender": None                  # removed
+        }))
+        self.assertTrue(updated)
+
+        self.reopen()
+        student = self.run_async(self.storage.get_student(student_id))
+        self.assertEqual(student["id"], student_id)
+        self.assertEqual(student["name"], "Asha")
+        self.assertEqual(student["overallPercentage"], 91.0)
+        self.assertEqual(student["district"], "Mysuru")
+        self.assertNotIn("gender", student)
+
+    def test_update_missing_student(self):
+        self.assertFalse(self.run_async(self.storage.update_student("missing", {"name": "Nobody"})))
+        self.assertIsNone(self.run_async(self.storage.get_student("missing")))
+
+    def test_delete_round_trip(self):
+        keep = self.run_async(self.storage.create_student(make_student("Keep")))
+        gone = self.run_async(self.storage.create_student(make_student("Gone")))
+
+        self.assertTrue(self.run_async(self.storage.delete_student(gone)))
+        self.assertFalse(self.run_async(self.storage.delete_student(gone)))
+        self.assertFalse(self.run_async(self.storage.update_student(gone, {"name": "Back"})))
+
+        self.reopen()
+        self.assertIsNone(self.run_async(self.storage.get_student(gone)))
+        self.assertEqual(self.run_async(self.storage.get_students_many([keep, gone])).keys(), {keep})
+        self.assertEqual(self.run_async(self.storage.count_students()), 1)
+        self.assertEqual(self.run_async(self.storage.get_counters())["students"], 1)
+
+    def test_bulk_create_and_pages(self):
+        ids = self.run_async(self.storage.create_students_bulk([make_student(f"S{i}") for i in range(7)]))
+        self.assertEqual(len(set(ids)), 7)
+
+        seen, cursor = [], None
+        while True:
+            page = self.run_async(self.storage.list_students_after(cursor, limit=3))
+            if not page:
+                break
+            seen.extend(student["id"] for student in page)
+            cursor = page[-1]["id"]
+        self.assertEqual(seen, sorted(ids))
+        self.assertEqual(self.run_async(self.storage.get_counters())["students"], 7)
+
+    def test_application_round_trip(self):
+        application = {"studentId": "s1", "scholarshipId": "sc-post-matric", "status": "Pending",
+                       "appliedAt": "2026-01-01T00:00:00"}
+        application_id = self.run_async(self.storage.create_application(dict(application)))
+        with self.assertRaises(DuplicateApplicationError):
+            self.run_async(self.storage.create_application(dict(application)))
+
+        self.assertTrue(self.run_async(self.storage.update_application(application_id, {"notes": "ok"})))
+        self.assertEqual(self.run_async(self.storage.get_application(application_id))["notes"], "ok")
+
+        self.assertTrue(self.run_async(self.storage.delete_application(application_id)))
+        self.assertFalse(self.run_async(self.storage.delete_application(application_id)))
+        counters = self.run_async(self.storage.get_counters())
+        self.assertEqual(counters["applications"], 0)
+        self.assertEqual(counters["applicationsByStatus"], {})
+        # The pair is free again once the application is gone
+        self.assertIsNotNone(self.run_async(self.storage.create_application(dict(application))))
+
+    def test_matches_in_memory_storage(self):
+        memory = InMemoryStorage({}, {})
+
+        async def scenario(storage):
+            first = await storage.create_student(make_student("A", gender="Male"))
+            second = await storage.create_student(make_student("B"))
+            await storage.update_student(first, {"gender": None, "isFirstGraduate": True})
+            await storage.delete_student(second)
+            student = await storage.get_student(first)
+            return {key: value for key, value in student.items() if key != "id"}, await storage.get_counters()
+
+        self.assertEqual(self.run_async(scenario(self.storage)), self.run_async(scenario(memory)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Student API tests against the in-memory storage backend
+"""
+
+import unittest
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def make_student(name: str, percentage: float = 85.5) -> dict:
+    return {
+        "name": name,
+        "region": "Karnataka",
+        "overallPercentage": percentage,
+        "incomeLevel": "< 2 LPA",
+        "category": "SC"
+    }
+
+
+class StudentUpdateTests(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def register(self, name: str) -> str:
+        response = self.client.post("/api/students/register", json=make_student(name))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["studentId"]
+
+    def test_update_keeps_id_and_created_at(self):
+        student_id = self.register("Asha")
+        created_at = self.client.get(f"/api/students/{student_id}").json()["data"]["createdAt"]
+
+        response = self.client.put(f"/api/students/{student_id}", json=make_student("Asha R", 91.0))
+        self.assertEqual(response.status_code, 200)
+
+        student = self.client.get(f"/api/students/{student_id}").json()["data"]
+        self.assertEqual(student["id"], student_id)
+        self.assertEqual(student["createdAt"], created_at)
+        self.assertEqual(student["name"], "Asha R")
+        self.assertEqual(student["overallPercentage"], 91.0)
+
+    def test_list_after_update(self):
+        # A page ending in an updated student needs its id for nextCursor
+        first = self.register("Ravi")
+        second = self.register("Meena")
+        for student_id in (first, second):
+            response = self.client.put(f"/api/students/{student_id}", json=make_student("Updated"))
+            self.assertEqual(response.status_code, 200)
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 1}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/api/students", params=params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            for student in body["students"]:
+                self.assertIn("id", student)
+                self.assertIn("createdAt", student)
+                seen.append(student["id"])
+            cursor = body.get("nextCursor")
+            if not cursor:
+                break
+
+        self.assertIn(first, seen)
+        self.assertIn(second, seen)
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Marksheet uploads larger than MAX_UPLOAD_BYTES are rejected with 413
+"""
+
+import asyncio
+import io
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from main import app
+from routes.student_routes import router as student_router
+from services import upload_service
+
+LIMIT = 1024
+
+
+class UploadLimitTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(upload_service, "MAX_UPLOAD_BYTES", LIMIT)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+    def test_ocr_upload_too_large(self):
+        files = {"file": ("marksheet.png", b"x" * (LIMIT + 1), "image/png")}
+        response = self.client.post("/api/ocr/upload", files=files)
+        self.assertEqual(response.status_code, 413)
+
+    def test_ocr_upload_at_limit(self):
+        files = {"file": ("marksheet.png", b"x" * LIMIT, "image/png")}
+        response = self.client.post("/api/ocr/upload", files=files)
+        self.assertEqual(response.status_code, 200)
+
+    def test_pipeline_too_large(self):
+        files = {"file": ("marksheet.png", b"x" * (LIMIT + 1), "image/png")}
+        response = self.client.post("/api/pipeline/complete", files=files)
+        self.assertEqual(response.status_code, 413)
+
+    def test_student_route_too_large(self):
+        routes_app = FastAPI()
+        routes_app.include_router(student_router)
+        files = {"file": ("marksheet.png", b"x" * (LIMIT + 1), "image/png")}
+        response = TestClient(routes_app).post("/api/students/upload-marksheet", files=files)
+        self.assertEqual(response.status_code, 413)
+
+    def test_chunked_read_without_declared_size(self):
+        class Upload:
+            # A client that sent no size: only the chunked read can stop it
+            size = None
+
+            def __init__(self, data):
+                self._data = io.BytesIO(data)
+
+            async def read(self, n=-1):
+                return self._data.read(n)
+
+        with mock.patch.object(upload_service, "UPLOAD_CHUNK_SIZE", 100):
+            data = asyncio.run(upload_service.read_upload(Upload(b"x" * LIMIT)))
+            self.assertEqual(len(data), LIMIT)
+            with self.assertRaises(upload_service.UploadTooLargeError):
+                asyncio.run(upload_service.read_upload(Upload(b"x" * (LIMIT + 1))))
+
+
+if __name__ == "__main__":
+    unittest.main()